@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-17 16:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cartitem',
+            index=models.Index(fields=['is_stock_available', 'last_synced'], name='cartitem_sync_idx'),
+        ),
+    ]
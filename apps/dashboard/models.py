@@ -27,6 +27,12 @@ class CartItem(models.Model):
     is_stock_available = models.BooleanField(default=True)
     added_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Cart sync: in-stock items, least recently synced first
+            models.Index(fields=['is_stock_available', 'last_synced'], name='cartitem_sync_idx'),
+        ]
+
     def __str__(self):
          return f"{self.store_name} Item in {self.cart}"
 
@@ -1,6 +1,7 @@
 from django.urls import path
 from django.contrib.auth.decorators import login_required
 from . import views
+from apps.scraper.views import SearchStreamView
 
 app_name = 'dashboard'
 
@@ -18,5 +19,7 @@ urlpatterns = [
     # Scraper/Core features moved to Dashboard
     path('search/', login_required(views.ProductSearchView.as_view()), name='product_search'),
     path('task_status/<str:task_id>/', login_required(views.TaskStatusView.as_view()), name='task_status'),
+    # Async SSE view: checks the stream owner itself (login_required wraps sync views only)
+    path('search/stream/<str:stream_id>/', SearchStreamView.as_view(), name='search_stream'),
     path('api/history/<int:product_id>/', login_required(views.PriceHistoryAPIView.as_view()), name='price_history_api'),
 ]
@@ -8,6 +8,7 @@ from apps.accounts.models import User
 from .models import RedirectionLog, UniversalCart, CartItem, PriceHistoryLog
 from .utils import normalize_product_url, sanitize_xss
 from .decorators import rate_limit_cart
+from apps.scraper.decorators import simple_ratelimit
 from .serializers import TeamHandshakeSerializer
 from django.core.signing import Signer, BadSignature
 
@@ -30,7 +31,7 @@ from django.conf import settings
 from datetime import timedelta
 from django.utils import timezone
 
-from core.services.manager import get_coordinated_data
+from apps.scraper.services.manager import get_coordinated_data
 from django.db import transaction
 
 logger = logging.getLogger(__name__)
@@ -83,6 +84,12 @@ class ProductDetailView(LoginRequiredMixin, DetailView):
     def get_queryset(self):
         return super().get_queryset().filter(is_active=True)
 
+    def get_object(self, queryset=None):
+        product = super().get_object(queryset)
+        # Prices read off search cards get their detail scrape once someone opens the product
+        from apps.scraper.tasks import queue_provisional_confirmations
+        queue_provisional_confirmations(product.pk, self.request.user.pk)
+        return product
 
 
 def redirect_to_merchant(request):
@@ -126,10 +133,17 @@ class ProductSearchView(TemplateView):
         context['search_query'] = search_query
         return self.render_to_response(context)
 
+    # Each POST can start store searches: same budget as the scraper search view
+    @method_decorator(simple_ratelimit(key_prefix='search', limit=10, period=60))
     def post(self, request, *args, **kwargs):
         search_query = request.POST.get('q', '')
-        results = get_coordinated_data(search_query) 
-        return render(request, "core/partials/dashboard_results.html", {'results': results})
+        # apps.scraper listings: the tables the live search writes, so the freshness gate sees its results
+        results = get_coordinated_data(search_query)
+        from apps.scraper.views import start_live_search
+        return render(request, "core/partials/dashboard_results.html", {
+            'results': results,
+            'stream_url': start_live_search(search_query, request.user, results),
+        })
 
 class TaskStatusView(View):
     def get(self, request, task_id, *args, **kwargs):
@@ -346,7 +360,7 @@ def comparison_matrix_view(request):
             'title': sp.product.name,
             'price': sp.current_price,
             'url': sp.product_url,
-            'last_updated': sp.last_updated.isoformat(),
+            'last_updated': sp.last_checked.isoformat(),
             'rating': 4.5
         }
         
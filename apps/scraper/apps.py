@@ -6,6 +6,5 @@ class ScraperConfig(AppConfig):
 
     def ready(self):
         import apps.scraper.signals
-
-    def ready(self):
-        import apps.scraper.signals
+        from apps.scraper.services.storefront import StorefrontRouter
+        StorefrontRouter.warn_if_enabled()
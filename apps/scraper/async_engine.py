@@ -0,0 +1,202 @@
+import asyncio
+import logging
+import queue
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, Iterable, Iterator, List, Optional
+from urllib.parse import urlparse
+
+import aiohttp
+from django.conf import settings
+
+from .stealth_engine import AdvancedScraperSession
+from .rate_limiter import DomainRateLimiter, RateLimited
+from .circuit_breaker import StoreCircuitBreaker
+from .proxy_pool import ProxyPool
+from .services.metrics import ScraperMetrics
+from .security.handshake import SanitizationHandshake, UnsafeURLError
+from .utils.parsers import parse_product_html
+from .services.storefront import StorefrontRouter
+
+logger = logging.getLogger(__name__)
+
+class AsyncBatchScraper:
+    """
+    The asyncio Batch Engine.
+    Fetches thousands of product URLs from a single process over plain HTTP.
+    Concurrency is capped per domain and globally, and robots.txt crawl-delay
+    is enforced through the shared DomainRateLimiter with `asyncio.sleep`, so
+    waiting for politeness never blocks the other in-flight requests. Reuses the stealth header engine,
+    robots compliance manager and backoff policy of AdvancedScraperSession.
+    """
+
+    _SENTINEL = object()
+
+    def __init__(self, per_domain_limit: int = None, max_in_flight: int = None, timeout: float = 15):
+        self.per_domain_limit = per_domain_limit or getattr(settings, 'SCRAPER_ASYNC_DOMAIN_CONCURRENCY', 8)
+        self.max_in_flight = max_in_flight or getattr(settings, 'SCRAPER_ASYNC_MAX_IN_FLIGHT', 200)
+        self.timeout = timeout
+        self.session_manager = AdvancedScraperSession()
+
+        # Per-domain concurrency state (created inside the running loop)
+        self._domain_sems: Dict[str, asyncio.Semaphore] = {}
+        self._delays: Dict[str, float] = {}
+
+    @staticmethod
+    def store_for_url(url: str) -> str:
+        return "Amazon" if "amazon" in url.lower() else "Flipkart"
+
+    # --- Politeness ---
+
+    async def _crawl_delay(self, url: str, domain: str) -> float:
+        if domain not in self._delays:
+            # robots.txt fetch is blocking I/O; keep it off the event loop
+            self._delays[domain] = await asyncio.to_thread(
+                self.session_manager.compliance_engine.get_crawl_delay, url
+            )
+        return self._delays[domain]
+
+    async def _wait_for_slot(self, url: str, domain: str) -> None:
+        """
+        Reserves the next token for this domain from the cluster-wide bucket and
+        sleeps (asynchronously) until it is valid, plus a little jitter.
+        """
+        await self._crawl_delay(url, domain)
+        wait = await asyncio.to_thread(DomainRateLimiter.reserve, url)
+        wait += random.uniform(0, 0.5)
+        started = time.monotonic()
+        await asyncio.sleep(wait)
+        ScraperMetrics.observe("ratelimit.acquire_latency", time.monotonic() - started, domain)
+
+    # --- Fetch ---
+
+    async def _get(self, http: aiohttp.ClientSession, url: str, store_name: str) -> Optional[str]:
+        headers = self.session_manager.header_engine.get_random_headers()
+        for attempt in range(AdvancedScraperSession.MAX_RETRIES):
+            proxy = await asyncio.to_thread(ProxyPool.choose, store_name)
+            started = time.monotonic()
+            try:
+                async with http.get(url, headers=headers, proxy=proxy) as response:
+                    status = response.status
+                    retry_after = response.headers.get("Retry-After")
+                    if status == 200:
+                        html = await response.text()
+                        await asyncio.to_thread(ProxyPool.record_success, proxy, store_name, time.monotonic() - started)
+                        return html
+                if status not in AdvancedScraperSession.RETRY_STATUSES:
+                    return None
+
+                await asyncio.to_thread(ProxyPool.record_failure, proxy, store_name, status == 429)
+                state = await asyncio.to_thread(StoreCircuitBreaker.record_failure, store_name, f"http_{status}")
+                if state == StoreCircuitBreaker.OPEN:
+                    return None
+
+                # No sleeping on the domain semaphore: the URL comes back "deferred" with the
+                # (capped) Retry-After and the sweep reschedules it
+                wait_time = AdvancedScraperSession.backoff_seconds(attempt, retry_after)
+                logger.warning(f"Async Engine: {status} on {url}. Deferring {wait_time}s.")
+                self.session_manager.header_engine.current_identity = None
+                raise RateLimited(DomainRateLimiter.domain_for(url), wait_time)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning(f"Async Engine: Request failed for {url}: {e}")
+                await asyncio.to_thread(ProxyPool.record_failure, proxy, store_name)
+                if isinstance(e, asyncio.TimeoutError):
+                    await asyncio.to_thread(StoreCircuitBreaker.record_failure, store_name, "timeout")
+                await asyncio.sleep(AdvancedScraperSession.BACKOFF_FACTOR ** attempt)
+        return None
+
+    async def scrape(self, http: aiohttp.ClientSession, url: str) -> Dict[str, Any]:
+        """
+        Fetches and parses one URL. Pages that need the browser come back with
+        status 'escalate' so the caller can route them to the Selenium tier.
+        """
+        domain = urlparse(url).netloc
+        store_name = self.store_for_url(url)
+        sem = self._domain_sems.setdefault(domain, asyncio.Semaphore(self.per_domain_limit))
+
+        result = {"url": url, "store": store_name, "tier": "http", "timestamp": datetime.now().isoformat()}
+        try:
+            url = await asyncio.to_thread(
+                SanitizationHandshake.execute_sanitization_handshake, url, "scraper_system"
+            )
+            url = StorefrontRouter.rewrite(url)
+            async with sem:
+                # Paused stores are skipped; the next sweep picks them up again
+                if await asyncio.to_thread(StoreCircuitBreaker.is_open, store_name):
+                    result.update(status="deferred", error="Circuit open")
+                    return result
+                await self._wait_for_slot(url, domain)
+                html = await self._get(http, url, store_name)
+
+            if html is None:
+                result.update(status="escalate", error="No usable HTTP response")
+                return result
+
+            parsed = await asyncio.to_thread(parse_product_html, html, store_name)
+            if parsed["bot_wall"] or not parsed["title"] or not parsed["price"]:
+                result.update(status="escalate", error="Bot wall or JS-rendered page")
+                return result
+
+            await asyncio.to_thread(StoreCircuitBreaker.record_success, store_name)
+            result.update(
+                status="success",
+                title=parsed["title"],
+                name=parsed["title"],
+                price=parsed["price"],
+                image_url=parsed["image_url"] or "",
+                availability=parsed["availability"],
+            )
+        except RateLimited as e:
+            result.update(status="deferred", error=str(e), retry_after=e.retry_after)
+        except UnsafeURLError as e:
+            result.update(status="failed", error=str(e))
+        except Exception as e:
+            logger.exception(f"Async Engine: Unexpected error on {url}: {e}")
+            result.update(status="error", error=str(e))
+        finally:
+            result["success"] = result.get("status") == "success"
+        return result
+
+    async def _run(self, urls: List[str], out: "queue.Queue") -> None:
+        in_flight = asyncio.Semaphore(self.max_in_flight)
+        connector = aiohttp.TCPConnector(limit=self.max_in_flight, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as http:
+            async def bounded(url):
+                async with in_flight:
+                    out.put(await self.scrape(http, url))
+
+            await asyncio.gather(*(bounded(url) for url in urls))
+
+    # --- Sync Bridge ---
+
+    def stream(self, urls: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        """
+        Runs the event loop in a background thread and yields each result as soon
+        as it completes, so the (synchronous) caller can persist results through
+        the ORM while the rest of the batch is still in flight.
+        """
+        url_list = list(dict.fromkeys(urls))
+        out: "queue.Queue" = queue.Queue()
+
+        def runner():
+            try:
+                asyncio.run(self._run(url_list, out))
+            except Exception as e:
+                logger.exception(f"Async Engine: Batch aborted: {e}")
+            finally:
+                out.put(self._SENTINEL)
+
+        thread = threading.Thread(target=runner, name="async-batch-scraper", daemon=True)
+        thread.start()
+        logger.info(f"Async Engine: Streaming {len(url_list)} URLs (max in flight={self.max_in_flight}).")
+
+        while True:
+            item = out.get()
+            if item is self._SENTINEL:
+                break
+            yield item
+        thread.join()
@@ -0,0 +1,288 @@
+import logging
+import threading
+import time
+from typing import Dict, Any, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+class CircuitOpen(Exception):
+    """
+    Raised when a store's circuit is open (or its half-open probe is taken).
+    Celery tasks turn this into a retry with `countdown=retry_after`.
+    """
+
+    def __init__(self, scope: str, retry_after: float):
+        self.scope = scope
+        self.retry_after = retry_after
+        super().__init__(f"Circuit open for {scope}: next attempt in {retry_after:.0f}s")
+
+class StoreCircuitBreaker:
+    """
+    Cluster-Wide Block Detector.
+    One closed/open/half-open breaker per store (optionally per store+proxy), kept
+    in the shared Django cache. Bot walls, 429/503s and timeouts add weighted
+    failures inside a sliding window; crossing the threshold opens the circuit and
+    pauses the store. After the cooldown a single probe is let through: success
+    closes the circuit, failure re-opens it with a doubled cooldown.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    KEY_PREFIX = "scraper_breaker"
+    INDEX_KEY = f"{KEY_PREFIX}:index"
+    LOCK_TTL = 5
+    STATE_TTL = 60 * 60 * 24
+
+    # A captcha page is a much stronger block signal than one slow response
+    WEIGHTS = {"bot_wall": 3, "http_429": 2, "http_503": 1, "timeout": 1}
+
+    # Probe slots held by this thread, so the HTTP and browser tiers of one fetch share the probe
+    _local = threading.local()
+
+    # --- Configuration ---
+
+    @staticmethod
+    def _settings() -> Dict[str, float]:
+        return {
+            "threshold": float(getattr(settings, 'SCRAPER_BREAKER_THRESHOLD', 6)),
+            "window": float(getattr(settings, 'SCRAPER_BREAKER_WINDOW', 120)),
+            "cooldown": float(getattr(settings, 'SCRAPER_BREAKER_COOLDOWN', 300)),
+            "max_cooldown": float(getattr(settings, 'SCRAPER_BREAKER_MAX_COOLDOWN', 60 * 60)),
+            "probe_timeout": float(getattr(settings, 'SCRAPER_BREAKER_PROBE_TIMEOUT', 120)),
+        }
+
+    @staticmethod
+    def scope(store_name: str, proxy: str = None) -> str:
+        return f"{store_name}@{proxy}" if proxy else store_name
+
+    @staticmethod
+    def store_for_url(url: str) -> str:
+        return "Amazon" if "amazon" in (url or "").lower() else "Flipkart"
+
+    @classmethod
+    def _key(cls, scope: str) -> str:
+        return f"{cls.KEY_PREFIX}:{scope}"
+
+    @classmethod
+    def _probe_key(cls, scope: str) -> str:
+        return f"{cls.KEY_PREFIX}:probe:{scope}"
+
+    @classmethod
+    def _locked(cls, scope: str):
+        """Best-effort cross-process mutex built on the atomic cache.add()."""
+        lock_key = f"{cls.KEY_PREFIX}:lock:{scope}"
+        for _ in range(100):
+            if cache.add(lock_key, 1, cls.LOCK_TTL):
+                return lock_key
+            time.sleep(0.01)
+        logger.warning(f"CircuitBreaker: Lock contention on {scope}, proceeding unlocked.")
+        return None
+
+    @classmethod
+    def _load(cls, scope: str) -> Dict[str, Any]:
+        return cache.get(cls._key(scope)) or {
+            "state": cls.CLOSED, "failures": [], "opened_at": None, "cooldown": 0.0, "trips": 0, "last_reason": None,
+        }
+
+    @classmethod
+    def _save(cls, scope: str, state: Dict[str, Any]) -> None:
+        cache.set(cls._key(scope), state, cls.STATE_TTL)
+        index = cache.get(cls.INDEX_KEY) or []
+        if scope not in index:
+            index.append(scope)
+            cache.set(cls.INDEX_KEY, index, cls.STATE_TTL)
+
+    @classmethod
+    def _effective(cls, state: Dict[str, Any], now: float) -> Tuple[str, float]:
+        """(state, seconds until the next probe) with an elapsed cooldown read as half-open."""
+        if state["state"] == cls.OPEN:
+            remaining = state["opened_at"] + state["cooldown"] - now
+            if remaining > 0:
+                return cls.OPEN, remaining
+            return cls.HALF_OPEN, 0.0
+        return state["state"], 0.0
+
+    @classmethod
+    def _held_probes(cls) -> set:
+        if not hasattr(cls._local, "probes"):
+            cls._local.probes = set()
+        return cls._local.probes
+
+    @staticmethod
+    def _metric(name: str, scope: str) -> None:
+        from apps.scraper.services.metrics import ScraperMetrics
+        ScraperMetrics.increment(f"breaker.{name}", scope)
+
+    # --- Feeding ---
+
+    @classmethod
+    def record_failure(cls, store_name: str, reason: str, proxy: str = None) -> str:
+        """
+        Adds a weighted failure ('bot_wall', 'http_429', 'http_503', 'timeout').
+        Returns the resulting state. Never raises: a breaker must not break a scrape.
+        """
+        scope = cls.scope(store_name, proxy)
+        config = cls._settings()
+        try:
+            lock_key = cls._locked(scope)
+            try:
+                now = time.time()
+                state = cls._load(scope)
+                current, _ = cls._effective(state, now)
+                state["last_reason"] = reason
+                cls._metric(f"failure.{reason}", scope)
+
+                cls._held_probes().discard(scope)
+                if current == cls.HALF_OPEN:
+                    # The probe failed: back off harder
+                    cls._trip(scope, state, now, min(max(state["cooldown"], config["cooldown"]) * 2, config["max_cooldown"]))
+                elif current == cls.CLOSED:
+                    window_start = now - config["window"]
+                    state["failures"] = [f for f in state["failures"] if f[0] >= window_start]
+                    state["failures"].append((now, cls.WEIGHTS.get(reason, 1)))
+                    if sum(weight for _, weight in state["failures"]) >= config["threshold"]:
+                        cls._trip(scope, state, now, config["cooldown"])
+                cls._save(scope, state)
+                return state["state"]
+            finally:
+                if lock_key:
+                    cache.delete(lock_key)
+        except Exception as e:
+            logger.warning(f"CircuitBreaker: Could not record failure for {scope}: {e}")
+            return cls.CLOSED
+
+    @classmethod
+    def _trip(cls, scope: str, state: Dict[str, Any], now: float, cooldown: float) -> None:
+        state.update(state=cls.OPEN, opened_at=now, cooldown=cooldown, failures=[], trips=state["trips"] + 1)
+        cache.delete(cls._probe_key(scope))
+        cls._metric("opened", scope)
+        logger.warning(f"CircuitBreaker: {scope} OPEN for {cooldown:.0f}s ({state['last_reason']}).")
+
+    @classmethod
+    def record_success(cls, store_name: str, proxy: str = None) -> None:
+        """A successful page closes a half-open circuit; closed circuits only track failures."""
+        scope = cls.scope(store_name, proxy)
+        cls._held_probes().discard(scope)
+        try:
+            state = cache.get(cls._key(scope))
+            if not state or state["state"] == cls.CLOSED:
+                return
+            lock_key = cls._locked(scope)
+            try:
+                state = cls._load(scope)
+                current, _ = cls._effective(state, time.time())
+                if current == cls.HALF_OPEN:
+                    state.update(state=cls.CLOSED, opened_at=None, cooldown=0.0, failures=[], trips=0)
+                    cls._save(scope, state)
+                    cache.delete(cls._probe_key(scope))
+                    cls._metric("closed", scope)
+                    logger.info(f"CircuitBreaker: {scope} probe succeeded, circuit CLOSED.")
+            finally:
+                if lock_key:
+                    cache.delete(lock_key)
+        except Exception as e:
+            logger.warning(f"CircuitBreaker: Could not record success for {scope}: {e}")
+
+    # --- Gating ---
+
+    @classmethod
+    def allow(cls, store_name: str, proxy: str = None) -> Tuple[bool, float]:
+        """
+        Returns (allowed, retry_after). While half-open only the caller that wins
+        the atomic probe slot is allowed; everyone else waits for its verdict.
+        """
+        scope = cls.scope(store_name, proxy)
+        state = cache.get(cls._key(scope))
+        if not state:
+            return True, 0.0
+
+        current, remaining = cls._effective(state, time.time())
+        if current == cls.CLOSED:
+            return True, 0.0
+        if current == cls.OPEN:
+            return False, remaining
+
+        if scope in cls._held_probes():
+            return True, 0.0
+        probe_timeout = cls._settings()["probe_timeout"]
+        if cache.add(cls._probe_key(scope), 1, probe_timeout):
+            cls._held_probes().add(scope)
+            cls._metric("probe", scope)
+            logger.info(f"CircuitBreaker: {scope} HALF-OPEN, sending probe.")
+            return True, 0.0
+        return False, probe_timeout
+
+    @classmethod
+    def guard(cls, store_name: str, proxy: str = None) -> None:
+        """Raises CircuitOpen unless the store may be scraped right now."""
+        if not store_name:
+            return
+        allowed, retry_after = cls.allow(store_name, proxy)
+        if not allowed:
+            cls._metric("rejected", cls.scope(store_name, proxy))
+            raise CircuitOpen(cls.scope(store_name, proxy), retry_after)
+
+    @classmethod
+    def holds_probe(cls, store_name: str, proxy: str = None) -> bool:
+        """True while this thread holds the store's half-open probe slot."""
+        return cls.scope(store_name, proxy) in cls._held_probes()
+
+    @classmethod
+    def release_probe(cls, store_name: str, proxy: str = None) -> None:
+        """Forgets this thread's probe slot after an inconclusive fetch (the slot itself times out)."""
+        cls._held_probes().discard(cls.scope(store_name, proxy))
+
+    @classmethod
+    def is_open(cls, store_name: str, proxy: str = None) -> bool:
+        """True while the cooldown is running. Read-only: does not take the probe slot."""
+        state = cache.get(cls._key(cls.scope(store_name, proxy)))
+        return bool(state) and cls._effective(state, time.time())[0] == cls.OPEN
+
+    @classmethod
+    def retry_after(cls, store_name: str, proxy: str = None) -> float:
+        """Seconds left on the cooldown (0 when the store may be tried)."""
+        state = cache.get(cls._key(cls.scope(store_name, proxy)))
+        return cls._effective(state, time.time())[1] if state else 0.0
+
+    @classmethod
+    def dispatch_budget(cls, store_name: str, proxy: str = None) -> Optional[int]:
+        """
+        How many jobs a dispatcher may send to the store: None (no limit) when
+        closed, 0 while open, 1 (the probe) once the cooldown has elapsed.
+        """
+        state = cache.get(cls._key(cls.scope(store_name, proxy)))
+        if not state:
+            return None
+        current, _ = cls._effective(state, time.time())
+        if current == cls.CLOSED:
+            return None
+        if current == cls.OPEN or cache.get(cls._probe_key(cls.scope(store_name, proxy))):
+            return 0
+        return 1
+
+    # --- Reporting ---
+
+    @classmethod
+    def report(cls) -> Dict[str, Dict[str, Any]]:
+        """{scope: {state, retry_in, trips, failure_weight, last_reason}} for report_stats."""
+        now = time.time()
+        report = {}
+        for scope in cache.get(cls.INDEX_KEY) or []:
+            state = cache.get(cls._key(scope))
+            if not state:
+                continue
+            current, remaining = cls._effective(state, now)
+            window_start = now - cls._settings()["window"]
+            report[scope] = {
+                "state": current,
+                "retry_in": remaining,
+                "trips": state["trips"],
+                "failure_weight": sum(w for ts, w in state["failures"] if ts >= window_start),
+                "last_reason": state["last_reason"],
+            }
+        return report
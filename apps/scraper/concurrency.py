@@ -1,10 +1,16 @@
 from apps.scraper.tasks import scrape_product_task
+from apps.scraper.services.single_flight import SingleFlight
 
 def run_scraper_async(url: str, store_name: str, callback=None):
     """
     "Fire and Forget" Scraper Trigger.
     Offloads scraping to Celery Worker via Redis.
+    Returns None when the product is already queued, in flight or freshly scraped.
     """
+    # Every stale search hit calls this; only the first one per product enqueues a task
+    if not SingleFlight.claim_dispatch(url):
+        return None
+
     # Callback is ignored in async pattern as we rely on signals/db updates
     result = scrape_product_task.delay(url, store_name)
     return result
@@ -5,13 +5,20 @@ import os
 import re
 from datetime import datetime
 from decimal import Decimal
-from typing import Dict, Any, Optional, Union
+from typing import Dict, Any, Iterable, List, Optional, Union
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
-from apps.scraper.utils.driver_factory import WebDriverFactory
+from apps.scraper.utils.driver_factory import WebDriverFactory, PooledDriver, TabLease
+from apps.scraper.utils.resource_policy import ResourcePolicy
+from apps.scraper.logic.extraction import ExtractionEngine
+from apps.scraper.utils.parsers import ParsePool
+from apps.scraper.selectors import SelectorRegistry
+from apps.scraper.rate_limiter import DomainRateLimiter, RateLimited
+from apps.scraper.circuit_breaker import StoreCircuitBreaker, CircuitOpen
+from apps.scraper.proxy_pool import ProxyPool
 
 logger = logging.getLogger(__name__)
 
@@ -22,15 +29,23 @@ class BaseScraper(abc.ABC):
     Ensures resource management via Context Manager.
     """
 
+    # Store this scraper serves; selects the per-store resource blocklist
+    STORE_NAME: Optional[str] = None
+
     def __init__(self):
         self.driver: Optional[webdriver.Chrome] = None
+        self._lease: Optional[Union[PooledDriver, TabLease]] = None
+        self._pool = None
 
     def __enter__(self):
         """
-        Context Manager entry point. Initializes the WebDriver.
+        Context Manager entry point. Leases a warm WebDriver (or, in multi-tab mode,
+        a tab of a shared browser) from the per-process pool.
         """
         try:
-            self.driver = WebDriverFactory.get_driver()
+            self._pool = WebDriverFactory.lease_pool()
+            self._lease = self._pool.acquire(self.STORE_NAME)
+            self.driver = self._lease.driver
             return self
         except Exception as e:
             logger.error(f"Failed to initialize driver in Context Manager: {e}")
@@ -38,18 +53,35 @@ class BaseScraper(abc.ABC):
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         """
-        Context Manager exit point. Ensures the driver is quit strictly.
+        Context Manager exit point. Returns the driver to the pool
+        (or quits it if the scraper created it outside the pool).
         """
-        if self.driver:
+        if self._lease:
+            # A dead browser must not go back into the pool
+            self._pool.release(self._lease, discard=isinstance(exc_val, WebDriverException))
+            logger.info("WebDriver returned to pool via Context Manager.")
+        elif self.driver:
             try:
                 self.driver.quit()
                 logger.info("WebDriver closed via Context Manager.")
             except Exception as e:
                 logger.error(f"Error closing WebDriver in Context Manager: {e}")
+        self._lease = None
+        self.driver = None
         
         if exc_type:
             logger.error(f"Scraper exited with error: {exc_val}")
 
+    def record_page(self):
+        """Counts a navigation against the leased driver's recycle budget."""
+        if self._lease:
+            self._lease.record_page()
+
+    @property
+    def proxy(self) -> Optional[str]:
+        """Egress proxy of the leased browser (None for direct or unpooled drivers)."""
+        return self._lease.proxy if self._lease else None
+
     def wait_for_element(self, selector: str, by: str = By.CSS_SELECTOR, timeout: int = 10) -> Optional[Any]:
         """
         Waits for an element to be present in the DOM.
@@ -66,6 +98,34 @@ class BaseScraper(abc.ABC):
             logger.warning(f"Timeout waiting for element: {selector}")
             return None
 
+    def find_field(self, field: str, timeout: float = 10) -> Optional[Any]:
+        """
+        Adaptive element lookup for one product field.
+        Probes every candidate (SelectorRegistry order, current winner first) without
+        waiting, then falls back to ONE wait on the combined selector group, so a stale
+        primary selector no longer costs a full timeout per page. Outcomes feed the registry.
+        """
+        if not self.driver:
+            raise RuntimeError("Driver is not initialized.")
+        selectors = SelectorRegistry.ordered(self.STORE_NAME, field)
+        started = time.monotonic()
+
+        def probe():
+            for index, selector in enumerate(selectors):
+                found = self.driver.find_elements(By.CSS_SELECTOR, selector)
+                if found:
+                    SelectorRegistry.record(self.STORE_NAME, field, selectors[:index + 1], selector,
+                                            time.monotonic() - started)
+                    return found[0]
+            return None
+
+        element = probe()
+        if element is None and self.wait_for_element(", ".join(selectors), By.CSS_SELECTOR, timeout=timeout):
+            element = probe()
+        if element is None:
+            SelectorRegistry.record(self.STORE_NAME, field, selectors, None)
+        return element
+
     def clean_price(self, price_str: str) -> Decimal:
         """
         Robust price cleaner. Removes currency symbols, commas, and whitespace.
@@ -99,6 +159,71 @@ class BaseScraper(abc.ABC):
         except Exception as e:
             logger.error(f"Failed to take screenshot: {e}")
 
+    def extract_fields(self) -> Dict[str, Any]:
+        """
+        Pulls every product field from the rendered page.
+        Stores with a selector spec use the single-round-trip ExtractionEngine;
+        otherwise (or if the in-page script fails) falls back to get_title/get_price.
+        """
+        if self.STORE_NAME:
+            extracted = ExtractionEngine.extract(self.driver, self.STORE_NAME)
+            if extracted is not None:
+                price_text = extracted.get("price_text")
+                return {
+                    "title": extracted.get("title"),
+                    "price": self.clean_price(price_text) if price_text else None,
+                    "image_url": extracted.get("image_url") or "",
+                    "availability": extracted.get("availability"),
+                    "bot_wall": extracted.get("bot_wall", False),
+                }
+
+        return {"title": self.get_title(), "price": self.get_price(), "bot_wall": self.is_bot_wall()}
+
+    def is_bot_wall(self) -> bool:
+        """Page-source check for the store's captcha/block markers."""
+        if not self.STORE_NAME:
+            return False
+        from apps.scraper.selectors import StoreSelector
+        try:
+            page_source = self.driver.page_source
+        except WebDriverException:
+            return False
+        return any(marker in page_source for marker in StoreSelector.bot_wall_markers(self.STORE_NAME))
+
+    def search_cards(self, search_url: str) -> List[Dict[str, Any]]:
+        """
+        Loads a search page once and parses every result card offline (name, URL,
+        price, image, availability), so a search costs one page load instead of
+        one per result. Returns [] on a bot wall or an empty page.
+        """
+        from django.conf import settings
+        from apps.scraper.selectors import StoreSelector
+        from apps.scraper.utils.parsers import parse_search_html
+
+        # Outside the try: a RateLimited must reach the task layer
+        DomainRateLimiter.acquire(search_url)
+
+        try:
+            self.driver.get(search_url)
+            self.record_page()
+            self.wait_for_element(StoreSelector.search_spec(self.STORE_NAME)["card"], By.CSS_SELECTOR)
+            page_source = self.driver.page_source
+        except Exception as e:
+            logger.error(f"Error searching {self.STORE_NAME}: {e}")
+            return []
+
+        if any(marker in page_source for marker in StoreSelector.bot_wall_markers(self.STORE_NAME)):
+            logger.warning(f"Bot wall detected on {self.STORE_NAME} search.")
+            ProxyPool.record_failure(self.proxy, self.STORE_NAME, ban=True)
+            StoreCircuitBreaker.record_failure(self.STORE_NAME, "bot_wall")
+            return []
+
+        limit = int(getattr(settings, 'SCRAPER_SEARCH_RESULT_LIMIT', 10))
+        results = parse_search_html(page_source, self.STORE_NAME, base_url=search_url, limit=limit)
+        if results:
+            StoreCircuitBreaker.record_success(self.STORE_NAME)
+        return results
+
     @abc.abstractmethod
     def get_title(self) -> Optional[str]:
         """Extract product title. Must be implemented by children."""
@@ -114,6 +239,9 @@ class BaseScraper(abc.ABC):
         Template Method: Defines the skeleton of the scraping operation.
         Includes Retry Logic for robustness.
         """
+        # Deferred: apps.scraper.services imports the store scrapers, which import this module
+        from apps.scraper.services.storefront import StorefrontRouter
+
         attempts = 0
         max_retries = 3
         
@@ -122,26 +250,52 @@ class BaseScraper(abc.ABC):
                 if not self.driver:
                     self.driver = WebDriverFactory.get_driver()
 
+                # A blocked store is paused cluster-wide instead of retried into the captcha
+                StoreCircuitBreaker.guard(self.STORE_NAME)
+                target = StorefrontRouter.rewrite(url)
+                DomainRateLimiter.acquire(target)
                 logger.info(f"Scraping attempt {attempts + 1} for {url}")
-                self.driver.get(url)
+                loaded = time.monotonic()
+                self.driver.get(target)
+                load_seconds = time.monotonic() - loaded
+                self.record_page()
                 
+                fields = self.extract_fields()
+                if fields.pop("bot_wall"):
+                    logger.warning(f"Bot wall detected on {url}.")
+                    ProxyPool.record_failure(self.proxy, self.STORE_NAME, ban=True)
+                    if self.STORE_NAME:
+                        StoreCircuitBreaker.record_failure(self.STORE_NAME, "bot_wall")
+                    return {
+                        "url": url,
+                        "status": "blocked",
+                        "error": "Bot wall detected",
+                        "timestamp": datetime.now().isoformat()
+                    }
+
                 # Basic standardized response structure
                 data = {
                     "url": url,
-                    "title": self.get_title(),
-                    "price": self.get_price(),
+                    **fields,
                     "timestamp": datetime.now().isoformat(),
                     "status": "success"
                 }
                 
                 if not data["title"] or not data["price"]:
                     logger.warning("Partial data extracted. Retrying might be needed.")
-                
+
+                ResourcePolicy.record_page(self.driver, self.STORE_NAME)
+                if self.STORE_NAME and data["title"] and data["price"]:
+                    StoreCircuitBreaker.record_success(self.STORE_NAME)
+                    ProxyPool.record_success(self.proxy, self.STORE_NAME, load_seconds)
                 return data
 
             except (TimeoutException, WebDriverException) as e:
                 attempts += 1
                 logger.warning(f"Attempt {attempts} failed: {e}")
+                ProxyPool.record_failure(self.proxy, self.STORE_NAME)
+                if self.STORE_NAME and isinstance(e, TimeoutException):
+                    StoreCircuitBreaker.record_failure(self.STORE_NAME, "timeout")
                 
                 # Take screenshot on failure
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -158,6 +312,10 @@ class BaseScraper(abc.ABC):
                 
                 # Exponential Backoff
                 time.sleep(2 ** attempts)
+
+            except (RateLimited, CircuitOpen):
+                # Let the task layer reschedule instead of holding the worker slot
+                raise
             
             except Exception as e:
                 logger.exception(f"Critical error scraping {url}: {e}")
@@ -167,3 +325,125 @@ class BaseScraper(abc.ABC):
                     "error": str(e),
                     "timestamp": datetime.now().isoformat()
                 }
+
+    def scrape_many(self, urls: Iterable[str]) -> List[Dict[str, Any]]:
+        """
+        Pipelined Batch Scrape.
+        Navigates and snapshots each page's rendered HTML in one round trip, then
+        hands the HTML to the ParsePool and moves straight on to the next URL, so
+        parsing overlaps with the next navigation. Results keep the input order.
+        URLs the batch could not get to (rate limit or open circuit) come back as
+        status "deferred" with a `retry_after`, so finished pages are never thrown away;
+        pages whose snapshot script failed or timed out come back "failed".
+        A bot wall is fed to the breaker as soon as its page loads and defers the
+        rest of the batch; a half-open probe loads one page and defers the rest
+        until that page's verdict is in.
+        Stores without a selector spec fall back to `scrape()` per URL.
+        """
+        if not self.STORE_NAME:
+            return [self.scrape(url) for url in urls]
+
+        from apps.scraper.selectors import StoreSelector
+        from apps.scraper.services.replay import FixtureCorpus
+        from apps.scraper.services.storefront import StorefrontRouter
+
+        markers = StoreSelector.bot_wall_markers(self.STORE_NAME)
+        pending = []
+        deferred = None
+        probing = False
+        for url in urls:
+            if deferred is None:
+                allowed, retry_after = StoreCircuitBreaker.allow(self.STORE_NAME)
+                if not allowed:
+                    # Store got blocked mid-batch: leave the rest for a later attempt
+                    deferred = {"error": "Circuit open", "retry_after": retry_after}
+            if deferred is not None:
+                pending.append((url, None, dict(deferred, status="deferred"), None, None))
+                continue
+            # Half-open: this page is the store's one probe
+            probing = StoreCircuitBreaker.holds_probe(self.STORE_NAME)
+            try:
+                target = StorefrontRouter.rewrite(url)
+                DomainRateLimiter.acquire(target)
+                loaded = time.monotonic()
+                self.driver.get(target)
+                load_seconds = time.monotonic() - loaded
+                self.record_page()
+                html = ExtractionEngine.snapshot(self.driver, self.STORE_NAME)
+                ResourcePolicy.record_page(self.driver, self.STORE_NAME)
+            except RateLimited as e:
+                # The domain's budget is spent: the rest of the batch waits for the next token
+                deferred = {"error": str(e), "retry_after": e.retry_after}
+                pending.append((url, None, dict(deferred, status="deferred"), None, None))
+                continue
+            except (TimeoutException, WebDriverException) as e:
+                logger.warning(f"Batch navigation failed for {url}: {e}")
+                ProxyPool.record_failure(self.proxy, self.STORE_NAME)
+                if isinstance(e, TimeoutException):
+                    StoreCircuitBreaker.record_failure(self.STORE_NAME, "timeout")
+                pending.append((url, None, {"status": "failed", "error": str(e)}, None, None))
+                if probing:
+                    deferred = {"error": "Circuit probe inconclusive", "retry_after": None}
+                continue
+            if html is None:
+                # The snapshot script failed or timed out: a retry, not an empty "success"
+                logger.warning(f"Batch snapshot unavailable for {url}.")
+                pending.append((url, None, {"status": "failed", "error": "snapshot unavailable"}, None, None))
+                if probing:
+                    deferred = {"error": "Circuit probe inconclusive", "retry_after": None}
+                continue
+            if any(marker in html for marker in markers):
+                # Feed the breaker now, not after the batch, and stop loading pages into the captcha
+                logger.warning(f"Bot wall detected mid-batch on {url}; deferring the rest.")
+                ProxyPool.record_failure(self.proxy, self.STORE_NAME, ban=True)
+                StoreCircuitBreaker.record_failure(self.STORE_NAME, "bot_wall")
+                pending.append((url, None, {"status": "blocked", "error": "Bot wall detected"}, None, None))
+                deferred = {"error": "Bot wall", "retry_after": StoreCircuitBreaker.retry_after(self.STORE_NAME)}
+                continue
+            if probing:
+                # The rest waits for the probe's verdict (settled in the result loop below)
+                deferred = {"error": "Circuit probe pending", "retry_after": None}
+
+            # Rendered HTML is only kept around when the fixture corpus is recording
+            keep = html if FixtureCorpus.capture_enabled() else None
+            pending.append((url, ParsePool.submit(html, self.STORE_NAME), None, keep, load_seconds))
+
+        results = []
+        for url, future, failure, html, load_seconds in pending:
+            timestamp = datetime.now().isoformat()
+            if future is None:
+                results.append({"url": url, **failure, "timestamp": timestamp})
+                continue
+            try:
+                parsed = future.result()
+            except Exception as e:
+                logger.exception(f"Offline parse failed for {url}: {e}")
+                results.append({"url": url, "status": "error", "error": str(e), "timestamp": timestamp})
+                continue
+
+            FixtureCorpus().capture_safely(url, html, self.STORE_NAME, tier="browser")
+            if parsed["bot_wall"]:
+                ProxyPool.record_failure(self.proxy, self.STORE_NAME, ban=True)
+                StoreCircuitBreaker.record_failure(self.STORE_NAME, "bot_wall")
+                results.append({"url": url, "status": "blocked", "error": "Bot wall detected", "timestamp": timestamp})
+                continue
+            if not parsed["title"] or not parsed["price"]:
+                logger.warning(f"Partial data extracted for {url}.")
+            else:
+                StoreCircuitBreaker.record_success(self.STORE_NAME)
+                ProxyPool.record_success(self.proxy, self.STORE_NAME, load_seconds)
+            results.append({
+                "url": url,
+                "title": parsed["title"],
+                "price": parsed["price"],
+                "image_url": parsed["image_url"] or "",
+                "availability": parsed["availability"],
+                "timestamp": timestamp,
+                "status": "success",
+            })
+
+        # Pages deferred behind the probe come back once its verdict allows (0 when it closed the circuit)
+        for result in results:
+            if result["status"] == "deferred" and result["retry_after"] is None:
+                result["retry_after"] = StoreCircuitBreaker.retry_after(self.STORE_NAME)
+        return results
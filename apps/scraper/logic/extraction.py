@@ -0,0 +1,189 @@
+import json
+import logging
+import time
+import uuid
+from typing import Dict, Any, Optional
+
+from apps.scraper.selectors import StoreSelector, SelectorRegistry
+
+logger = logging.getLogger(__name__)
+
+# Runs inside the page. Polls until title and price resolve (or the deadline passes),
+# then returns every field in a single response: one WebDriver round trip in total.
+_EXTRACTION_JS = """
+const spec = %(spec)s;
+%(clock)s
+
+function first(selectors) {
+    for (const sel of selectors) {
+        let el = null;
+        try { el = document.querySelector(sel); } catch (e) { continue; }
+        if (el) return {el: el, selector: sel};
+    }
+    return null;
+}
+function text(hit) {
+    return hit ? (hit.el.textContent || "").trim() || null : null;
+}
+function image(hit) {
+    if (!hit) return null;
+    const el = hit.el.tagName === "IMG" ? hit.el : hit.el.querySelector("img");
+    if (!el) return null;
+    return el.getAttribute("data-old-hires") || el.getAttribute("src") || el.getAttribute("data-src") || null;
+}
+function botWall() {
+    const html = document.documentElement ? document.documentElement.innerHTML : "";
+    return spec.markers.some(m => html.indexOf(m) !== -1);
+}
+function collect() {
+    const hits = {};
+    for (const field of Object.keys(spec.fields)) {
+        hits[field] = first(spec.fields[field]);
+        if (hits[field] && !(field in foundAt)) foundAt[field] = elapsed();
+    }
+    return {
+        title: text(hits.title),
+        price_text: text(hits.price),
+        image_url: image(hits.image),
+        availability: text(hits.availability),
+        bot_wall: botWall(),
+        matched: Object.fromEntries(Object.entries(hits).map(([k, v]) => [k, v ? v.selector : null])),
+        found_ms: foundAt,
+    };
+}
+%(finish)s
+"""
+
+_ASYNC_CLOCK = """
+const done = arguments[arguments.length - 1];
+const started = Date.now();
+const deadline = started + %(timeout_ms)d;
+const foundAt = {};
+function elapsed() { return Date.now() - started; }
+"""
+
+_ASYNC_FINISH = """
+(function poll() {
+    const result = collect();
+    if (result.bot_wall || (result.title && result.price_text) || Date.now() > deadline) {
+        // Snapshot mode hands back the rendered HTML for offline parsing instead
+        done(spec.snapshot ? document.documentElement.outerHTML : JSON.stringify(result));
+    } else {
+        setTimeout(poll, %(interval_ms)d);
+    }
+})();
+"""
+
+# Step mode: one check per call, the caller sleeps between calls and owns the clock.
+# First-seen times survive between calls on the window, keyed by the run id.
+_STEP_CLOCK = """
+const finalCheck = arguments[0], elapsedMs = arguments[1], runId = arguments[2];
+if (window.__extractRun !== runId) { window.__extractRun = runId; window.__extractFoundAt = {}; }
+const foundAt = window.__extractFoundAt;
+function elapsed() { return elapsedMs; }
+"""
+
+_STEP_FINISH = """
+const result = collect();
+if (result.bot_wall || (result.title && result.price_text) || finalCheck) {
+    return spec.snapshot ? document.documentElement.outerHTML : JSON.stringify(result);
+}
+return null;
+"""
+
+class ExtractionEngine:
+    """
+    Single-Round-Trip Extraction.
+    Compiles a store's selector spec (StoreSelector primary + fallbacks + bot-wall
+    markers) into one in-page script. Waiting for the DOM, walking the fallbacks and
+    detecting a bot wall all happen inside the browser, and the fields come back as
+    one JSON object instead of a dozen find_element/get_attribute calls.
+    Drivers that share a browser lock (TabDriver, POLLS_IN_STEPS) get a step
+    script instead: short synchronous checks with the wait done in Python, so
+    the lock is free for sibling tabs between polls.
+    """
+
+    POLL_INTERVAL_MS = 100
+
+    # Compiled scripts keyed by (selector spec, timeout); the spec changes when SelectorRegistry reorders
+    _compiled: Dict[tuple, str] = {}
+
+    @staticmethod
+    def field_spec(store_name: str) -> Dict[str, list]:
+        return {field: SelectorRegistry.ordered(store_name, field) for field in StoreSelector.FIELDS}
+
+    @classmethod
+    def compile(cls, store_name: str, timeout: float = 10, snapshot: bool = False, step: bool = False) -> str:
+        spec = {
+            "fields": cls.field_spec(store_name),
+            "markers": StoreSelector.bot_wall_markers(store_name),
+            "snapshot": snapshot,
+        }
+        spec_json = json.dumps(spec)
+        key = (spec_json, timeout, step)
+        if key not in cls._compiled:
+            values = {"timeout_ms": int(timeout * 1000), "interval_ms": cls.POLL_INTERVAL_MS}
+            cls._compiled[key] = _EXTRACTION_JS % {
+                "spec": spec_json,
+                "clock": (_STEP_CLOCK if step else _ASYNC_CLOCK) % values,
+                "finish": (_STEP_FINISH if step else _ASYNC_FINISH) % values,
+            }
+        return cls._compiled[key]
+
+    @classmethod
+    def _run(cls, driver, store_name: str, timeout: float, snapshot: bool) -> Optional[str]:
+        """One in-page async wait, or for lock-sharing tab drivers a Python-side poll of step checks."""
+        if not getattr(driver, "POLLS_IN_STEPS", False):
+            return driver.execute_async_script(cls.compile(store_name, timeout, snapshot=snapshot))
+        script = cls.compile(store_name, timeout, snapshot=snapshot, step=True)
+        run_id = uuid.uuid4().hex
+        started = time.monotonic()
+        while True:
+            elapsed = time.monotonic() - started
+            final = elapsed >= timeout
+            raw = driver.execute_script(script, final, int(elapsed * 1000), run_id)
+            if raw is not None or final:
+                return raw
+            time.sleep(cls.POLL_INTERVAL_MS / 1000)
+
+    @classmethod
+    def record_outcome(cls, store_name: str, fields: Dict[str, list], extracted: Dict[str, Any]) -> None:
+        """Feeds which selector won each field (and how fast) back into SelectorRegistry."""
+        if extracted.get("bot_wall"):
+            return
+        found_ms = extracted.get("found_ms") or {}
+        for field, order in fields.items():
+            winner = (extracted.get("matched") or {}).get(field)
+            tried = order[:order.index(winner) + 1] if winner in order else order
+            latency = found_ms[field] / 1000 if field in found_ms else None
+            SelectorRegistry.record(store_name, field, tried, winner, latency)
+
+    @classmethod
+    def extract(cls, driver, store_name: str, timeout: float = 10) -> Optional[Dict[str, Any]]:
+        """
+        Returns {title, price_text, image_url, availability, bot_wall, matched}
+        or None if the script could not run. `timeout` must stay below the
+        driver's script timeout (30s by default).
+        """
+        fields = cls.field_spec(store_name)
+        try:
+            raw = cls._run(driver, store_name, timeout, snapshot=False)
+            extracted = json.loads(raw) if raw else None
+        except Exception as e:
+            logger.warning(f"ExtractionEngine: In-page extraction failed for {store_name}: {e}")
+            return None
+        if extracted:
+            cls.record_outcome(store_name, fields, extracted)
+        return extracted
+
+    @classmethod
+    def snapshot(cls, driver, store_name: str, timeout: float = 10) -> Optional[str]:
+        """
+        Waits in-page until title/price render (or a bot wall shows) and returns the
+        document HTML in the same round trip, ready for offline parsing.
+        """
+        try:
+            return cls._run(driver, store_name, timeout, snapshot=True)
+        except Exception as e:
+            logger.warning(f"ExtractionEngine: Snapshot failed for {store_name}: {e}")
+            return None
@@ -5,6 +5,7 @@ import random
 from selenium.common.exceptions import NoSuchElementException, TimeoutException, WebDriverException
 from selenium.webdriver.common.by import By
 from apps.scraper.logic.base_scraper import BaseScraper
+from apps.scraper.rate_limiter import DomainRateLimiter
 
 logger = logging.getLogger(__name__)
 
@@ -43,10 +44,14 @@ class StealthScraper(BaseScraper):
         """
         Navigate to URL with stealth checks and error handling.
         """
+        from apps.scraper.services.storefront import StorefrontRouter
+        url = StorefrontRouter.rewrite(url)
         try:
+            # Politeness via the shared per-domain token bucket instead of a fixed sleep
+            DomainRateLimiter.acquire(url)
             logger.info(f"Navigating to {url}...")
             self.driver.get(url)
-            self.random_sleep(3, 7) # Variance in load time
+            self.record_page()
             
             # Stealth Check: Inject JS to remove webdriver property just in case
             self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
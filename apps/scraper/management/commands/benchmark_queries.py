@@ -0,0 +1,266 @@
+import random
+import statistics
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from apps.dashboard.models import CartItem, UniversalCart
+from apps.scraper.models import PriceAlert, PriceHistory, Product, StorePrice
+
+PREFIX = "benchmark-queries"
+EMAIL = f"{PREFIX}@example.invalid"
+
+# The indexes added for the hot queries below; --compare drops them for the "before" run
+BENCHMARK_INDEXES = [
+    (PriceAlert, "pricealert_url_open_idx"),
+    (PriceAlert, "pricealert_user_open_idx"),
+    (PriceHistory, "pricehistory_listing_idx"),
+    (StorePrice, "storeprice_due_idx"),
+    (StorePrice, "storeprice_stale_idx"),
+    (CartItem, "cartitem_sync_idx"),
+]
+
+class Command(BaseCommand):
+    help = ('Seeds a synthetic price history (1M rows by default) and reports timings and EXPLAIN plans '
+            'for the hot periodic queries. Meant for a development database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help='PriceHistory rows to seed')
+        parser.add_argument('--listings', type=int, default=5_000, help='StorePrice rows the history is spread over')
+        parser.add_argument('--alerts', type=int, default=50_000, help='PriceAlert rows to seed')
+        parser.add_argument('--cart-items', type=int, default=20_000, help='CartItem rows to seed')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per query (median reported)')
+        parser.add_argument('--compare', action='store_true',
+                            help='Also time every query with the new indexes dropped (they are restored afterwards)')
+        parser.add_argument('--no-explain', action='store_true', help='Skip the EXPLAIN output')
+        parser.add_argument('--cleanup', action='store_true', help='Delete the seeded data and exit')
+
+    def handle(self, *args, **options):
+        if options['cleanup']:
+            self.cleanup()
+            return
+
+        self.seed(options)
+        queries = self.queries()
+
+        before = {}
+        if options['compare']:
+            # "Before" = the pre-index query shape (URL match instead of URL hash) on the pre-index schema
+            with self.indexes_dropped():
+                before = {name: self.time(legacy or build, options['repeat']) for name, build, legacy in queries}
+                if not options['no_explain']:
+                    self.explain(queries, "WITHOUT NEW INDEXES", legacy=True)
+        after = {name: self.time(build, options['repeat']) for name, build, _ in queries}
+        if not options['no_explain']:
+            self.explain(queries, "WITH NEW INDEXES")
+
+        self.stdout.write(self.style.SUCCESS("\n" + "=" * 72))
+        self.stdout.write(self.style.SUCCESS(f"  HOT QUERY TIMINGS ({connection.vendor}, median of {options['repeat']})"))
+        self.stdout.write(self.style.SUCCESS("=" * 72))
+        for name, _, _ in queries:
+            if name in before:
+                speedup = before[name] / after[name] if after[name] else float('inf')
+                self.stdout.write(f" {name:<26} before={before[name]:>9.2f}ms  after={after[name]:>9.2f}ms  x{speedup:.1f}")
+            else:
+                self.stdout.write(f" {name:<26} {after[name]:>9.2f}ms")
+        self.stdout.write("")
+
+    # --- Seeding ---
+
+    def seed(self, options):
+        products = Product.objects.filter(name__startswith=PREFIX)
+        listings = list(StorePrice.objects.filter(product__in=products).values_list("pk", flat=True))
+        if len(listings) < options['listings']:
+            listings += self.seed_listings(options['listings'] - len(listings), start=len(listings) // 2 + 1)
+
+        history = PriceHistory.objects.filter(store_price_id__in=listings).count()
+        if history < options['rows']:
+            self.seed_history(listings, options['rows'] - history)
+
+        urls = list(StorePrice.objects.filter(pk__in=listings).values_list("product_url", flat=True))
+        user = self.benchmark_user()
+        alerts = PriceAlert.objects.filter(user=user).count()
+        if alerts < options['alerts']:
+            self.seed_alerts(user, urls, options['alerts'] - alerts)
+
+        cart, _ = UniversalCart.objects.get_or_create(user=user)
+        items = cart.items.count()
+        if items < options['cart_items']:
+            self.seed_cart(cart, urls, options['cart_items'] - items)
+
+    def seed_listings(self, count, start):
+        self.stdout.write(f"Seeding {count} listings...")
+        now = timezone.now()
+        # One product per Amazon/Flipkart pair
+        products = [
+            Product(name=f"{PREFIX} {start + i}", slug=f"{PREFIX}-{start + i}-{uuid.uuid4().hex[:6]}", sku=uuid.uuid4().hex[:8].upper())
+            for i in range((count + 1) // 2)
+        ]
+        Product.objects.bulk_create(products, batch_size=2000)
+        products = Product.objects.filter(slug__in=[p.slug for p in products])
+        rows = []
+        for product in products:
+            for store_name in ("Amazon", "Flipkart"):
+                rows.append(StorePrice(
+                    product=product, store_name=store_name,
+                    current_price=Decimal(random.randint(500, 90_000)),
+                    product_url=f"https://www.{store_name.lower()}.in/{PREFIX}/{product.slug}/{'x' * 200}",
+                    is_available=random.random() > 0.1,
+                    next_refresh_at=now + timedelta(minutes=random.randint(-120, 720)),
+                ))
+        with transaction.atomic():
+            StorePrice.objects.bulk_create(rows, batch_size=2000)
+        return list(StorePrice.objects.filter(product__in=products).values_list("pk", flat=True))
+
+    def seed_history(self, listings, count):
+        self.stdout.write(f"Seeding {count} history rows...")
+        now = timezone.now()
+        batch = []
+        for n in range(count):
+            batch.append(PriceHistory(
+                store_price_id=random.choice(listings),
+                price=Decimal(random.randint(500, 90_000)),
+                recorded_at=now - timedelta(minutes=random.randint(0, 60 * 24 * 365)),
+            ))
+            if len(batch) >= 10_000:
+                PriceHistory.objects.bulk_create(batch)
+                batch = []
+                self.stdout.write(f"  {n + 1}/{count}", ending="\r")
+        if batch:
+            PriceHistory.objects.bulk_create(batch)
+        self.stdout.write("")
+
+    def benchmark_user(self):
+        User = get_user_model()
+        user, created = User.objects.get_or_create(email=EMAIL, defaults={"username": PREFIX})
+        if created:
+            user.set_unusable_password()
+            user.save(update_fields=["password"])
+        return user
+
+    def seed_alerts(self, user, urls, count):
+        self.stdout.write(f"Seeding {count} alerts...")
+        rows = []
+        for _ in range(count):
+            url = random.choice(urls)
+            rows.append(PriceAlert(
+                user=user, product_url=url, product_url_hash=PriceAlert.hash_url(url),
+                target_price=Decimal(random.randint(500, 90_000)), is_triggered=random.random() < 0.7,
+            ))
+        PriceAlert.objects.bulk_create(rows, batch_size=5000)
+
+    def seed_cart(self, cart, urls, count):
+        self.stdout.write(f"Seeding {count} cart items...")
+        now = timezone.now()
+        rows = [
+            CartItem(
+                cart=cart, product_url=random.choice(urls), store_name="Amazon",
+                is_stock_available=random.random() > 0.3,
+                last_synced=now - timedelta(minutes=random.randint(0, 60 * 24 * 30)) if random.random() > 0.05 else None,
+            )
+            for _ in range(count)
+        ]
+        CartItem.objects.bulk_create(rows, batch_size=5000)
+
+    def cleanup(self):
+        User = get_user_model()
+        # Cascades take the listings, history, alerts and cart with them
+        deleted, _ = Product.objects.filter(name__startswith=PREFIX).delete()
+        user_deleted, _ = User.objects.filter(email=EMAIL).delete()
+        self.stdout.write(self.style.SUCCESS(f"Removed {deleted + user_deleted} benchmark rows."))
+
+    # --- Queries ---
+
+    def queries(self):
+        """[(name, queryset factory, legacy queryset factory or None)] mirroring the production call sites."""
+        user = self.benchmark_user()
+        listings = list(StorePrice.objects.filter(product__name__startswith=PREFIX).values_list("pk", "product_url"))
+        sample = random.sample(listings, min(len(listings), 200))
+        sample_ids = [pk for pk, _ in sample]
+        sample_urls = [url for _, url in sample]
+        one_listing = sample_ids[0]
+        now = timezone.now()
+
+        def latest_per_listing():
+            # PriceHistoryManager.previous_prices on a cache miss
+            return (
+                PriceHistory.objects.filter(store_price_id__in=sample_ids)
+                .annotate(rank=Window(RowNumber(), partition_by=F("store_price_id"), order_by=F("recorded_at").desc()))
+                .filter(rank=1).values_list("store_price_id", "price")
+            )
+
+        return [
+            # evaluate_alerts / RefreshScheduler._demand
+            ("alerts_by_url", lambda: PriceAlert.open_for_urls(sample_urls),
+             lambda: PriceAlert.objects.filter(product_url__in=sample_urls, is_triggered=False)),
+            # Dashboard stat card
+            ("open_alerts_for_user", lambda: PriceAlert.objects.filter(user=user, is_triggered=False).values("pk"), None),
+            # Product pages and charts
+            ("history_for_listing", lambda: PriceHistory.objects.filter(store_price_id=one_listing).order_by("-recorded_at")[:90], None),
+            ("latest_price_per_listing", latest_per_listing, None),
+            # RefreshScheduler.claim_due (without the row locks)
+            ("due_listings", lambda: (
+                StorePrice.objects.filter(Q(next_refresh_at__lte=now) | Q(next_refresh_at__isnull=True), is_provisional=False)
+                .order_by(F("next_refresh_at").asc(nulls_first=True)).values_list("pk", "product_url", "store_name")[:500]
+            ), None),
+            ("stale_available_listings", lambda: (
+                StorePrice.objects.filter(is_available=True, last_updated__lt=now - timedelta(hours=24)).values_list("pk")[:500]
+            ), None),
+            # sync_universal_cart_prices
+            ("cart_sync_scan", lambda: (
+                CartItem.objects.filter(is_stock_available=True).order_by(F("last_synced").asc(nulls_first=True)).values_list("pk")[:500]
+            ), None),
+        ]
+
+    @staticmethod
+    def time(build, repeat):
+        timings = []
+        for _ in range(max(1, repeat)):
+            started = time.perf_counter()
+            list(build())
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+
+    def explain(self, queries, title, legacy=False):
+        self.stdout.write(self.style.SUCCESS("\n" + "=" * 72))
+        self.stdout.write(self.style.SUCCESS(f"  EXPLAIN: {title}"))
+        self.stdout.write(self.style.SUCCESS("=" * 72))
+        for name, build, legacy_build in queries:
+            qs = (legacy_build if legacy and legacy_build else build)()
+            self.stdout.write(self.style.HTTP_INFO(f"-- {name}"))
+            try:
+                self.stdout.write(qs.explain())
+            except Exception as e:
+                self.stdout.write(self.style.WARNING(f"   EXPLAIN unavailable: {e}"))
+
+    # --- Index toggling ---
+
+    @contextmanager
+    def indexes_dropped(self):
+        """Drops the BENCHMARK_INDEXES for the duration of the block and recreates them afterwards."""
+        dropped = []
+        with connection.schema_editor() as editor:
+            for model, name in BENCHMARK_INDEXES:
+                index = next((i for i in model._meta.indexes if i.name == name), None)
+                if index is None:
+                    continue
+                try:
+                    editor.remove_index(model, index)
+                    dropped.append((model, index))
+                except Exception as e:
+                    self.stdout.write(self.style.WARNING(f"Could not drop {name}: {e}"))
+        try:
+            yield
+        finally:
+            with connection.schema_editor() as editor:
+                for model, index in dropped:
+                    editor.add_index(model, index)
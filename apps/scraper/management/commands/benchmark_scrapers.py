@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from apps.scraper.services.replay import FixtureCorpus, ReplayBenchmark
+from apps.scraper.services.services import ScraperService
+
+class Command(BaseCommand):
+    help = 'Replays the recorded fixture corpus offline and reports scraper throughput, latency and field accuracy.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--store', choices=['Amazon', 'Flipkart'], help='Limit to one store (default: both)')
+        parser.add_argument('--mode', choices=['parser', 'browser'], default='parser',
+                            help='parser: offline HTML parser per selector set; browser: Selenium against a local replay server')
+        parser.add_argument('--repeat', type=int, default=1, help='Passes over the corpus')
+        parser.add_argument('--dir', default=None, help='Corpus directory (defaults to SCRAPER_FIXTURE_DIR)')
+
+    def handle(self, *args, **options):
+        corpus = FixtureCorpus(options['dir'])
+        benchmark = ReplayBenchmark(corpus)
+        stores = [options['store']] if options['store'] else ['Amazon', 'Flipkart']
+
+        for store_name in stores:
+            if not any(True for _ in corpus.entries(store_name)):
+                self.stdout.write(self.style.WARNING(f"No fixtures for {store_name} in {corpus.root}"))
+                continue
+
+            if options['mode'] == 'browser':
+                scraper_class = ScraperService()._get_scraper_class(store_name)
+                report = benchmark.run_browser(store_name, scraper_class, repeat=options['repeat'])
+            else:
+                report = benchmark.run_parser(store_name, repeat=options['repeat'])
+
+            self.stdout.write(self.style.SUCCESS("\n" + "=" * 72))
+            self.stdout.write(self.style.SUCCESS(f"  {store_name.upper()} ({options['mode']} replay)"))
+            self.stdout.write(self.style.SUCCESS("=" * 72))
+            for set_name, summary in report.items():
+                accuracy = "  ".join(f"{field}={rate:.0%}" for field, rate in summary['accuracy'].items()) or "no labelled fixtures"
+                self.stdout.write(
+                    f" {set_name:<10} pages={summary['pages']:<5} {summary['pages_per_sec']:>8.1f} pages/s"
+                    f"  p50={summary['p50_ms']:.1f}ms  p95={summary['p95_ms']:.1f}ms"
+                )
+                self.stdout.write(f" {'':<10} accuracy ({summary['labelled']} labelled pages): {accuracy}")
+            self.stdout.write("")
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+
+from apps.scraper.async_engine import AsyncBatchScraper
+from apps.scraper.logic.extraction import ExtractionEngine
+from apps.scraper.services.fetch_pipeline import TieredFetchPipeline
+from apps.scraper.services.replay import FixtureCorpus
+from apps.scraper.services.services import ScraperService
+from apps.scraper.rate_limiter import RateLimited
+from apps.scraper.security.handshake import SanitizationHandshake
+from apps.scraper.utils.parsers import parse_product_html
+
+class Command(BaseCommand):
+    help = ('Records live product pages into the offline fixture corpus. With --browser the live DOM\'s '
+            'extract_fields() labels the expected fields; plain HTTP captures are unlabelled (label them by hand).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='+', help='Product URLs to capture')
+        parser.add_argument('--browser', action='store_true', help='Capture the rendered DOM through Selenium instead of plain HTTP')
+        parser.add_argument('--dir', default=None, help='Corpus directory (defaults to SCRAPER_FIXTURE_DIR)')
+
+    def handle(self, *args, **options):
+        corpus = FixtureCorpus(options['dir'])
+        service = ScraperService()
+
+        for url in options['urls']:
+            store_name = AsyncBatchScraper.store_for_url(url)
+            safe_url = SanitizationHandshake.execute_sanitization_handshake(url, user_id="scraper_system")
+
+            expected, labelled = None, None
+            if options['browser']:
+                with service._get_scraper_class(store_name)() as scraper:
+                    scraper.driver.get(safe_url)
+                    html = ExtractionEngine.snapshot(scraper.driver, store_name)
+                    # Labels come from the rendered DOM, not from the offline parser being benchmarked
+                    expected = scraper.extract_fields()
+                if not expected.get("bot_wall"):
+                    labelled = "browser"
+                tier = TieredFetchPipeline.TIER_BROWSER
+            else:
+                try:
+                    response = TieredFetchPipeline._session().fetch_page(safe_url)
+                except RateLimited as e:
+                    self.stdout.write(self.style.WARNING(f" [SKIP] {url}: {e}"))
+                    continue
+                html = response.text if response is not None and response.status_code == 200 else None
+                tier = TieredFetchPipeline.TIER_HTTP
+
+            if not html:
+                self.stdout.write(self.style.ERROR(f" [FAIL] {url}: no page captured"))
+                continue
+
+            path = corpus.capture(url, html, store_name, expected, tier=tier, labelled=labelled)
+            if labelled:
+                status = f"labelled: title={bool(expected['title'])} price={expected['price']}"
+            elif parse_product_html(html, store_name)["bot_wall"]:
+                status = "bot wall, unlabelled"
+            else:
+                status = "unlabelled: fill in `expected` and set \"labelled\": \"manual\" to score it"
+            self.stdout.write(self.style.SUCCESS(f" [OK] {url} -> {path} ({status})"))
@@ -1,5 +1,8 @@
 from django.core.management.base import BaseCommand
-from apps.scraper.services.metrics import AlertMetricsManager, get_failed_analysis
+from apps.scraper.services.metrics import AlertMetricsManager, ScraperMetrics, get_failed_analysis
+from apps.scraper.selectors import SelectorRegistry
+from apps.scraper.circuit_breaker import StoreCircuitBreaker
+from apps.scraper.proxy_pool import ProxyPool
 
 class Command(BaseCommand):
     help = 'Generates a Professional "Mentor-Ready" Alert Performance Report.'
@@ -29,3 +32,57 @@ class Command(BaseCommand):
             self.stdout.write("\n")
         else:
              self.stdout.write(self.style.SUCCESS("No Failures Detected. System Healthy.\n"))
+
+        # Scraper Telemetry (shared across worker processes via cache)
+        telemetry = ScraperMetrics.snapshot()
+        if telemetry:
+            self.stdout.write(self.style.SUCCESS("SCRAPER TELEMETRY:"))
+            for name, bucket in sorted(telemetry.items()):
+                self.stdout.write(
+                    f" {name:<40} n={bucket['count']:<6} avg={bucket['avg']:.3f} max={bucket['max']:.3f}"
+                )
+            self.stdout.write("\n")
+
+        # Selector health: which candidate is winning per store/field
+        selectors = SelectorRegistry.report()
+        if selectors:
+            self.stdout.write(self.style.SUCCESS("SELECTOR HIT RATES:"))
+            for field, entries in sorted(selectors.items()):
+                self.stdout.write(f" {field}")
+                for selector, entry in sorted(entries.items(), key=lambda item: -item[1]['hit_rate']):
+                    median = f"{entry['median_ms']:.0f}ms" if entry['median_ms'] is not None else "-"
+                    self.stdout.write(
+                        f"   {selector:<38} hit={entry['hit_rate']:.0%} median={median:<7} n={entry['tries']}"
+                    )
+            self.stdout.write("\n")
+
+        # Circuit breakers: which stores (or store+proxy pairs) are paused right now
+        breakers = StoreCircuitBreaker.report()
+        if breakers:
+            self.stdout.write(self.style.SUCCESS("CIRCUIT BREAKERS:"))
+            for scope, entry in sorted(breakers.items()):
+                line = (
+                    f" {scope:<30} {entry['state'].upper():<10} trips={entry['trips']:<3}"
+                    f" window_weight={entry['failure_weight']:<4} last={entry['last_reason'] or '-'}"
+                )
+                if entry['state'] == StoreCircuitBreaker.OPEN:
+                    self.stdout.write(self.style.ERROR(f"{line} retry_in={entry['retry_in']:.0f}s"))
+                else:
+                    self.stdout.write(line)
+            self.stdout.write("\n")
+
+        # Proxy pool: per-store health of every egress proxy that has seen traffic
+        proxies = ProxyPool.report()
+        if proxies:
+            self.stdout.write(self.style.SUCCESS("PROXY POOL:"))
+            for name, health in sorted(proxies.items(), key=lambda item: -item[1]['score']):
+                latency = f"{health['latency'] * 1000:.0f}ms" if health['latency'] is not None else "-"
+                line = (
+                    f" {name:<40} score={health['score']:.2f} latency={latency:<7}"
+                    f" uses={health['uses']:<6} bans={health['bans']:<4} strikes={health['strikes']}"
+                )
+                if health['quarantined_for']:
+                    self.stdout.write(self.style.ERROR(f"{line} quarantined={health['quarantined_for']:.0f}s"))
+                else:
+                    self.stdout.write(line)
+            self.stdout.write("\n")
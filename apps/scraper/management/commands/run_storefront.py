@@ -0,0 +1,79 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from apps.scraper.models import Product, StorePrice
+from apps.scraper.services.storefront import FakeStorefront
+
+class Command(BaseCommand):
+    help = ('Runs the local fake Amazon/Flipkart storefront for load tests. '
+            'Point the scrapers at it with SCRAPER_STOREFRONT_URL=http://<host>:<port>.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency', default='0.05-0.3', help='Response latency range in seconds, e.g. 0.05-0.3')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answered 429/503')
+        parser.add_argument('--retry-after', type=int, default=5, help='Retry-After seconds on injected errors')
+        parser.add_argument('--crawl-delay', type=float, default=0.5, help='robots.txt Crawl-delay')
+        parser.add_argument('--price-period', type=int, default=600, help='Seconds between repricing rounds')
+        parser.add_argument('--change-rate', type=float, default=0.1, help='Share of products repriced per round')
+        parser.add_argument('--bot-wall-rate', type=float, default=0.0, help='Share of pages served as a captcha wall')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Create N tracked StorePrice rows (split across stores) pointing at fake products first')
+
+    def handle(self, *args, **options):
+        low, _, high = options['latency'].partition('-')
+        storefront = FakeStorefront(
+            host=options['host'],
+            port=options['port'],
+            latency=(float(low), float(high or low)),
+            error_rate=options['error_rate'],
+            retry_after=options['retry_after'],
+            crawl_delay=options['crawl_delay'],
+            price_period=options['price_period'],
+            change_rate=options['change_rate'],
+            bot_wall_rate=options['bot_wall_rate'],
+        )
+
+        if options['seed']:
+            self.seed(storefront, options['seed'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Fake storefront on http://{options['host']}:{options['port']} "
+            f"(set SCRAPER_STOREFRONT_URL to route scrapes here). Ctrl+C to stop."
+        ))
+        try:
+            storefront.serve_forever()
+        except KeyboardInterrupt:
+            storefront.shutdown()
+            self.stdout.write(f"Served: {storefront.stats}")
+
+    def seed(self, storefront: FakeStorefront, count: int, batch_size: int = 1000):
+        """Bulk-creates products with real-looking store URLs that the router maps onto the fake storefront."""
+        created = 0
+        for start in range(0, count, batch_size):
+            ids = [f"FS{n:08d}" for n in range(start, min(start + batch_size, count))]
+            products = Product.objects.bulk_create(
+                [Product(name=storefront.product("amazon", pid)["title"], brand_name="Storefront") for pid in ids]
+            )
+            # bulk_create does not return PKs on every backend; re-read by name when needed
+            if products and products[0].pk is None:
+                by_name = dict(Product.objects.filter(brand_name="Storefront", name__in=[p.name for p in products])
+                               .values_list("name", "pk"))
+                for product in products:
+                    product.pk = by_name.get(product.name)
+
+            prices = []
+            for index, (pid, product) in enumerate(zip(ids, products)):
+                store = "Amazon" if index % 2 == 0 else "Flipkart"
+                url = f"https://www.amazon.in/dp/{pid}" if store == "Amazon" else f"https://www.flipkart.com/item/p/{pid}"
+                prices.append(StorePrice(
+                    product_id=product.pk,
+                    store_name=store,
+                    current_price=Decimal(storefront.price_for(pid)),
+                    product_url=url,
+                ))
+            StorePrice.objects.bulk_create(prices)
+            created += len(prices)
+        self.stdout.write(self.style.SUCCESS(f"Seeded {created} StorePrice rows."))
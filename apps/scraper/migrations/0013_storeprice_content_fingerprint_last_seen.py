@@ -0,0 +1,23 @@
+# Generated by Django 6.0.2 on 2026-10-17 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0012_pricealert_alert_priority_pricehistory_metadata_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='storeprice',
+            name='content_fingerprint',
+            field=models.CharField(blank=True, help_text='SHA-256 of the extracted page fields; unchanged scrapes only bump last_seen', max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='storeprice',
+            name='last_seen',
+            field=models.DateTimeField(blank=True, help_text='Heartbeat: last scrape that confirmed this listing, changed or not', null=True),
+        ),
+    ]
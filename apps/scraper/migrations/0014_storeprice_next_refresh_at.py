@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-17 10:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0013_storeprice_content_fingerprint_last_seen'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='storeprice',
+            name='next_refresh_at',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='Freshness Scheduler: when this price is next due for a scrape', null=True),
+        ),
+    ]
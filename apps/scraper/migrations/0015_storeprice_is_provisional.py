@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-17 12:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0014_storeprice_next_refresh_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='storeprice',
+            name='is_provisional',
+            field=models.BooleanField(default=False, help_text='Price taken from a search result card; cleared by the first detail scrape'),
+        ),
+    ]
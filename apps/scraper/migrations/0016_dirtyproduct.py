@@ -0,0 +1,22 @@
+# Generated by Django 6.0.2 on 2026-10-17 14:20
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0015_storeprice_is_provisional'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DirtyProduct',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='scraper.product')),
+                ('marked_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 6.0.2 on 2026-10-17 16:10
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def backfill_url_hashes(apps, schema_editor):
+    PriceAlert = apps.get_model('scraper', 'PriceAlert')
+    batch = []
+    for alert in PriceAlert.objects.only('pk', 'product_url').iterator(chunk_size=2000):
+        alert.product_url_hash = hashlib.sha256((alert.product_url or '').encode('utf-8')).hexdigest()
+        batch.append(alert)
+        if len(batch) >= 2000:
+            PriceAlert.objects.bulk_update(batch, ['product_url_hash'])
+            batch = []
+    if batch:
+        PriceAlert.objects.bulk_update(batch, ['product_url_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0017_alter_pricehistory_recorded_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pricealert',
+            name='product_url_hash',
+            field=models.CharField(default='', editable=False, help_text='SHA-256 of product_url; alert lookups match on this instead of the 500-char URL', max_length=64),
+        ),
+        migrations.RunPython(backfill_url_hashes, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='pricealert',
+            index=models.Index(fields=['product_url_hash', 'is_triggered'], name='pricealert_url_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pricealert',
+            index=models.Index(fields=['user', 'is_triggered'], name='pricealert_user_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pricehistory',
+            index=models.Index(fields=['store_price', '-recorded_at'], name='pricehistory_listing_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='storeprice',
+            index=models.Index(fields=['is_provisional', 'next_refresh_at'], name='storeprice_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='storeprice',
+            index=models.Index(fields=['is_available', 'last_updated'], name='storeprice_stale_idx'),
+        ),
+    ]
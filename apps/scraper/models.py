@@ -4,7 +4,7 @@ import pytz
 import re
 import hashlib
 from typing import Optional, List
-from decimal import Decimal
+from decimal import Decimal, ROUND_HALF_UP
 from django.db import models
 from django.conf import settings
 from django.utils.text import slugify
@@ -114,27 +114,30 @@ class Product(models.Model):
         Trend Mapping via 7-day Moving Average.
         Tags products as BULLISH, BEARISH, or FLAT.
         """
-        import numpy as np
-        
         prices_queryset = PriceHistory.objects.filter(
             store_price__product=self
         ).order_by('-recorded_at')[:7]
         
-        if len(prices_queryset) < 3:
-            return
-            
-        prices = [float(p.price) for p in prices_queryset][::-1] # chronological
+        trend = self.trend_from_prices([float(p.price) for p in prices_queryset][::-1]) # chronological
+        if trend:
+            self.trend_indicator = trend
+
+    @staticmethod
+    def trend_from_prices(prices: List[float]) -> Optional[str]:
+        """
+        3-point vs 7-point moving average over chronological prices (newest last).
+        Returns None with fewer than 3 points. Shared with the bulk ingestion writer.
+        """
+        if len(prices) < 3:
+            return None
+        sma_short = sum(prices[-3:]) / 3
+        sma_long = sum(prices) / len(prices)
         
-        if len(prices) >= 2:
-            sma_short = np.mean(prices[-3:])
-            sma_long = np.mean(prices)
-            
-            if sma_short > sma_long * 1.02:
-                self.trend_indicator = 'BULLISH'
-            elif sma_short < sma_long * 0.98:
-                self.trend_indicator = 'BEARISH'
-            else:
-                self.trend_indicator = 'FLAT'
+        if sma_short > sma_long * 1.02:
+            return 'BULLISH'
+        elif sma_short < sma_long * 0.98:
+            return 'BEARISH'
+        return 'FLAT'
 
     def get_price_velocity(self) -> str:
         """
@@ -223,9 +226,26 @@ class StorePrice(models.Model):
     metadata = models.JSONField(default=dict, blank=True)
     last_updated = models.DateTimeField(auto_now=True)
     price_hash = models.CharField(max_length=64, null=True, blank=True, help_text="SHA-256 hash of price+timestamp for integrity")
+    content_fingerprint = models.CharField(max_length=64, null=True, blank=True, help_text="SHA-256 of the extracted page fields; unchanged scrapes only bump last_seen")
+    last_seen = models.DateTimeField(null=True, blank=True, help_text="Heartbeat: last scrape that confirmed this listing, changed or not")
+    next_refresh_at = models.DateTimeField(null=True, blank=True, db_index=True, help_text="Freshness Scheduler: when this price is next due for a scrape")
+    is_provisional = models.BooleanField(default=False, help_text="Price taken from a search result card; cleared by the first detail scrape")
 
     class Meta:
         unique_together = ('product', 'store_name')
+        indexes = [
+            # Freshness Scheduler claim: due, non-provisional rows in next_refresh_at order
+            models.Index(fields=['is_provisional', 'next_refresh_at'], name='storeprice_due_idx'),
+            # Staleness scans: available listings by age
+            models.Index(fields=['is_available', 'last_updated'], name='storeprice_stale_idx'),
+        ]
+
+    @property
+    def last_checked(self):
+        """Most recent confirmation of this price: a full save or an unchanged-scrape heartbeat."""
+        if self.last_seen and (not self.last_updated or self.last_seen > self.last_updated):
+            return self.last_seen
+        return self.last_updated
 
     def integrity_check(self) -> bool:
         """
@@ -265,13 +285,27 @@ class StorePrice(models.Model):
             
         super().save(*args, **kwargs)
         
-        # Self-Performing Update: Force parent product recalculation
-        if self.product:
-            self.product.update_lowest_price()
+        # Deferred Update: the parent product's aggregates are recomputed once per debounce window
+        if self.product_id:
+            from apps.scraper.services.aggregates import ProductAggregates
+            ProductAggregates.mark_dirty([self.product_id])
 
     def __str__(self) -> str:
         return f"{self.product.name} - {self.store_name} - {self.current_price}"
 
+class DirtyProduct(models.Model):
+    """
+    Deferred Aggregate Queue.
+    One row per product whose prices changed since its aggregates (lowest price,
+    trend, search vector) were last recomputed; drained in bulk by
+    recompute_dirty_products.
+    """
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='+')
+    marked_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self) -> str:
+        return f"Dirty: {self.product_id} @ {self.marked_at}"
+
 class PriceHistoryManager(models.Manager):
     def get_biggest_drops(self, limit: int = 5):
         latest_ids = self.filter(
@@ -283,6 +317,80 @@ class PriceHistoryManager(models.Manager):
             change_percentage__lt=0 
         ).select_related('store_price__product', 'store_price__product__category').order_by('change_percentage')[:limit]
 
+    # --- Insert Path ---
+
+    LAST_PRICE_KEY = "price_history:last:{}"
+    LAST_PRICE_TTL = 60 * 60 * 24 * 7
+
+    def previous_prices(self, store_price_ids) -> dict:
+        """
+        Last recorded price per StorePrice: from the cache written on every insert,
+        with one query for the misses. Listings without history map to None.
+        """
+        from django.core.cache import cache
+        from django.db.models import F, Window
+        from django.db.models.functions import RowNumber
+
+        store_price_ids = set(store_price_ids)
+        cached = cache.get_many([self.LAST_PRICE_KEY.format(pk) for pk in store_price_ids])
+        previous = {pk: Decimal(cached[self.LAST_PRICE_KEY.format(pk)]) for pk in store_price_ids
+                    if self.LAST_PRICE_KEY.format(pk) in cached}
+
+        missing = store_price_ids - previous.keys()
+        if missing:
+            previous.update({pk: None for pk in missing})
+            previous.update(
+                self.filter(store_price_id__in=missing)
+                .annotate(rank=Window(RowNumber(), partition_by=F('store_price_id'), order_by=F('recorded_at').desc()))
+                .filter(rank__lte=1)
+                .values_list('store_price_id', 'price')
+            )
+        return previous
+
+    def record(self, store_price, price, previous_price=None, dispatch_alerts: bool = True) -> 'PriceHistory':
+        """Inserts one history row with its analytics in a single write."""
+        previous = {store_price.pk: previous_price} if previous_price is not None else None
+        return self.record_many([(store_price, price)], previous=previous, dispatch_alerts=dispatch_alerts)[0]
+
+    def record_many(self, entries, previous: dict = None, dispatch_alerts: bool = True) -> list:
+        """
+        Bulk insert path for [(store_price, price)]. Change percentage, trend,
+        significant-drop flag and integrity hash are computed in memory against
+        the previous price (`previous` {store_price_id: price or None}, else
+        previous_prices()), so every row is written once. One alert evaluation is
+        queued per batch for the touched products once the rows commit.
+        """
+        from django.core.cache import cache
+        from django.db import transaction
+
+        entries = list(entries)
+        if not entries:
+            return []
+        previous = dict(previous or {})
+        unknown = {sp.pk for sp, _ in entries} - previous.keys()
+        if unknown:
+            previous.update(self.previous_prices(unknown))
+
+        now = timezone.now()
+        rows = []
+        for store_price, price in entries:
+            price = Decimal(str(price))
+            rows.append(self.model.build(store_price, price, previous.get(store_price.pk), now))
+            # A listing recorded twice in one batch compares against its own earlier row
+            previous[store_price.pk] = price
+        self.bulk_create(rows)
+
+        cache.set_many({self.LAST_PRICE_KEY.format(pk): str(price) for pk, price in previous.items() if price is not None},
+                       self.LAST_PRICE_TTL)
+        if dispatch_alerts:
+            product_ids = sorted({sp.product_id for sp, _ in entries})
+
+            def dispatch():
+                from apps.scraper.tasks import check_alerts_batch_task
+                check_alerts_batch_task.delay(product_ids)
+            transaction.on_commit(dispatch)
+        return rows
+
 class PriceHistory(models.Model):
     TREND_CHOICES = [
         ('UP', 'UP'),
@@ -303,20 +411,76 @@ class PriceHistory(models.Model):
     integrity_hash = models.CharField(max_length=64, blank=True, null=True, help_text="SHA-256 integrity signature")
     metadata = models.JSONField(default=dict, blank=True, help_text="Scalability Hook: Storage for anomaly detection flags")
     
-    recorded_at = models.DateTimeField(auto_now_add=True)
+    recorded_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         ordering = ['-recorded_at']
+        indexes = [
+            # Every history read is "this listing's points, newest first"
+            models.Index(fields=['store_price', '-recorded_at'], name='pricehistory_listing_idx'),
+        ]
+
+    @staticmethod
+    def compute_integrity_hash(price, recorded_at) -> str:
+        """SHA-256 over price + recorded_at + SECRET_KEY (re-checked by SecurityEngine.verify_history_integrity)."""
+        secret_key = getattr(settings, 'SECRET_KEY', 'fallback_secret')
+        # Normalised to the stored 2dp form so the hash survives a DB round trip
+        price = Decimal(str(price)).quantize(Decimal('0.01'))
+        payload = f"{price}-{recorded_at.isoformat()}-{secret_key}"
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def analytics(price: Decimal, previous_price: Optional[Decimal]):
+        """(change_percentage, trend, is_significant_drop) of `price` against the previous price."""
+        if not previous_price or previous_price <= 0:
+            return Decimal('0.00'), 'STABLE', False
+        change_pct = ((price - previous_price) / previous_price * 100).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        if change_pct < 0:
+            return change_pct, 'DOWN', change_pct <= -10
+        if change_pct > 0:
+            return change_pct, 'UP', False
+        return change_pct, 'STABLE', False
+
+    @classmethod
+    def build(cls, store_price: 'StorePrice', price: Decimal, previous_price: Optional[Decimal], recorded_at) -> 'PriceHistory':
+        """Unsaved row with its analytics and integrity hash filled in."""
+        change_pct, trend, is_sig_drop = cls.analytics(price, previous_price)
+        return cls(
+            store_price=store_price,
+            price=price,
+            change_percentage=change_pct,
+            trend=trend,
+            is_significant_drop=is_sig_drop,
+            integrity_hash=cls.compute_integrity_hash(price, recorded_at),
+            recorded_at=recorded_at,
+        )
         
     def save(self, *args, **kwargs) -> None:
-        secret_key = getattr(settings, 'SECRET_KEY', 'fallback_secret')
+        """
+        Single-row inserts made with save()/create() get the same in-memory
+        analytics as PriceHistory.objects.record, in the same single write.
+        """
+        adding = self._state.adding
+        if adding and self.change_percentage is None:
+            previous_price = PriceHistory.objects.previous_prices([self.store_price_id]).get(self.store_price_id)
+            price = Decimal(str(self.price))
+            self.change_percentage, self.trend, self.is_significant_drop = self.analytics(price, previous_price)
         if not self.integrity_hash:
-            now_str = timezone.now().isoformat()
-            payload = f"{self.price}-{now_str}-{secret_key}"
-            self.integrity_hash = hashlib.sha256(payload.encode('utf-8')).hexdigest()
+            self.integrity_hash = self.compute_integrity_hash(self.price, self.recorded_at)
             
         super().save(*args, **kwargs)
 
+        if adding:
+            from django.core.cache import cache
+            from django.db import transaction
+            cache.set(PriceHistoryManager.LAST_PRICE_KEY.format(self.store_price_id), str(self.price), PriceHistoryManager.LAST_PRICE_TTL)
+            product_id = self.store_price.product_id
+
+            def dispatch():
+                from apps.scraper.tasks import check_alerts_batch_task
+                check_alerts_batch_task.delay([product_id])
+            transaction.on_commit(dispatch)
+
     @property
     def price_change_percent(self) -> Decimal:
         return self.change_percentage
@@ -380,6 +544,7 @@ class PriceAlert(models.Model):
     uuid = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='alerts')
     product_url = models.URLField(max_length=500)
+    product_url_hash = models.CharField(max_length=64, editable=False, default='', help_text="SHA-256 of product_url; alert lookups match on this instead of the 500-char URL")
     target_price = models.DecimalField(max_digits=10, decimal_places=2)
     current_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     
@@ -391,6 +556,26 @@ class PriceAlert(models.Model):
 
     class Meta:
         app_label = 'scraper'
+        indexes = [
+            models.Index(fields=['product_url_hash', 'is_triggered'], name='pricealert_url_open_idx'),
+            models.Index(fields=['user', 'is_triggered'], name='pricealert_user_open_idx'),
+        ]
+
+    @staticmethod
+    def hash_url(url: str) -> str:
+        return hashlib.sha256((url or '').encode('utf-8')).hexdigest()
+
+    @classmethod
+    def open_for_urls(cls, urls):
+        """Untriggered alerts on any of `urls`, looked up by URL hash (an index seek, not a scan)."""
+        return cls.objects.filter(product_url_hash__in={cls.hash_url(url) for url in urls}, is_triggered=False)
+
+    def save(self, *args, **kwargs) -> None:
+        self.product_url_hash = self.hash_url(self.product_url)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'product_url' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'product_url_hash'}
+        super().save(*args, **kwargs)
 
     def __str__(self) -> str:
         return f"Alert for {self.user} on {self.product_url}"
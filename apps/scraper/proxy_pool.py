@@ -0,0 +1,242 @@
+import hashlib
+import logging
+import os
+import random
+import threading
+import time
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+class ProxyPool:
+    """
+    Health-Scored Egress Pool.
+    Proxies come from SCRAPER_PROXIES / SCRAPER_PROXY_FILE (plus the legacy
+    WebDriverFactory.PROXY_LIST). Each proxy keeps a per-store health record in
+    the shared cache (success EWMA, latency EWMA, ban strikes), and selection is
+    weighted by it. Bans and repeated failures quarantine a proxy for a period
+    that doubles per strike; strikes decay again while the proxy stays clean.
+    Selenium and the requests/aiohttp sessions all draw from this one pool;
+    browsers only get proxies without credentials (Chrome ignores user:pass
+    in --proxy-server and would answer every request with a 407).
+    """
+
+    KEY_PREFIX = "proxy_health"
+    INDEX_KEY = f"{KEY_PREFIX}:index"
+    STATE_TTL = 60 * 60 * 24 * 7
+
+    EWMA_ALPHA = 0.2
+    MIN_SAMPLES = 5
+
+    _proxies: Optional[List[str]] = None
+    _proxies_lock = threading.Lock()
+    _warned_credentials = False
+
+    # --- Configuration ---
+
+    @staticmethod
+    def _settings() -> Dict[str, float]:
+        return {
+            "quarantine": float(getattr(settings, 'SCRAPER_PROXY_QUARANTINE', 300)),
+            "max_quarantine": float(getattr(settings, 'SCRAPER_PROXY_MAX_QUARANTINE', 6 * 60 * 60)),
+            "strike_decay": float(getattr(settings, 'SCRAPER_PROXY_STRIKE_DECAY', 60 * 60)),
+            "min_score": float(getattr(settings, 'SCRAPER_PROXY_MIN_SCORE', 0.5)),
+        }
+
+    @classmethod
+    def proxies(cls) -> List[str]:
+        """Configured proxies, loaded once per process (order kept, duplicates dropped)."""
+        if cls._proxies is None:
+            with cls._proxies_lock:
+                if cls._proxies is None:
+                    from apps.scraper.utils.driver_factory import WebDriverFactory
+
+                    configured = list(getattr(settings, 'SCRAPER_PROXIES', []) or [])
+                    path = getattr(settings, 'SCRAPER_PROXY_FILE', '')
+                    if path and os.path.exists(path):
+                        with open(path, encoding="utf-8") as handle:
+                            configured += [line.strip() for line in handle if line.strip() and not line.startswith("#")]
+                    configured += list(WebDriverFactory.PROXY_LIST)
+                    cls._proxies = list(dict.fromkeys(configured))
+                    if cls._proxies:
+                        logger.info(f"ProxyPool: Loaded {len(cls._proxies)} proxies.")
+        return cls._proxies
+
+    @classmethod
+    def enabled(cls) -> bool:
+        return bool(cls.proxies())
+
+    @staticmethod
+    def label(proxy: str) -> str:
+        """host:port without credentials, for logs, metrics and reports."""
+        parsed = urlparse(proxy if "://" in proxy else f"http://{proxy}")
+        return f"{parsed.hostname}:{parsed.port}" if parsed.port else str(parsed.hostname)
+
+    @staticmethod
+    def host(proxy: str) -> Optional[str]:
+        return urlparse(proxy if "://" in proxy else f"http://{proxy}").hostname
+
+    @staticmethod
+    def has_credentials(proxy: str) -> bool:
+        parsed = urlparse(proxy if "://" in proxy else f"http://{proxy}")
+        return bool(parsed.username or parsed.password)
+
+    @classmethod
+    def _key(cls, proxy: str, store_name: Optional[str]) -> str:
+        digest = hashlib.sha1(proxy.encode("utf-8")).hexdigest()[:16]
+        return f"{cls.KEY_PREFIX}:{digest}:{store_name or '*'}"
+
+    @staticmethod
+    def _fresh() -> Dict[str, Any]:
+        return {"score": 1.0, "latency": None, "uses": 0, "bans": 0, "strikes": 0,
+                "quarantined_until": 0.0, "last_failure": 0.0}
+
+    @classmethod
+    def _decayed(cls, health: Dict[str, Any], now: float) -> Dict[str, Any]:
+        """Drops one strike per clean `strike_decay` period since the last failure."""
+        decay = cls._settings()["strike_decay"]
+        if health["strikes"] and decay and health["last_failure"]:
+            periods = int((now - health["last_failure"]) // decay)
+            if periods:
+                health["strikes"] = max(0, health["strikes"] - periods)
+                health["last_failure"] = now if health["strikes"] else 0.0
+        return health
+
+    @classmethod
+    def health(cls, proxy: str, store_name: Optional[str] = None) -> Dict[str, Any]:
+        return cls._decayed(cache.get(cls._key(proxy, store_name)) or cls._fresh(), time.time())
+
+    @classmethod
+    def _save(cls, proxy: str, store_name: Optional[str], health: Dict[str, Any]) -> None:
+        key = cls._key(proxy, store_name)
+        cache.set(key, health, cls.STATE_TTL)
+        index = cache.get(cls.INDEX_KEY) or {}
+        if key not in index:
+            index[key] = (cls.label(proxy), store_name or "*")
+            cache.set(cls.INDEX_KEY, index, cls.STATE_TTL)
+
+    @staticmethod
+    def _weight(health: Dict[str, Any]) -> float:
+        """Healthy, fast proxies get most of the traffic; a fresh proxy gets a fair share."""
+        latency = health["latency"] if health["latency"] is not None else 1.0
+        return max(health["score"], 0.01) ** 2 / (1.0 + latency)
+
+    # --- Selection ---
+
+    @classmethod
+    def is_usable(cls, proxy: Optional[str], store_name: Optional[str] = None) -> bool:
+        if not proxy:
+            return True
+        return cls.health(proxy, store_name)["quarantined_until"] <= time.time()
+
+    @classmethod
+    def choose(cls, store_name: Optional[str] = None, browser: bool = False) -> Optional[str]:
+        """
+        Health-weighted pick among the proxies not quarantined for this store.
+        Returns None when no proxies are configured. If every proxy is
+        quarantined, the one released soonest is used rather than going direct.
+        `browser=True` leaves out credentialed proxies, which Chrome cannot use.
+        """
+        proxies = cls.proxies()
+        if browser and proxies:
+            usable = [p for p in proxies if not cls.has_credentials(p)]
+            if len(usable) < len(proxies) and not cls._warned_credentials:
+                cls._warned_credentials = True
+                logger.warning(
+                    f"ProxyPool: {len(proxies) - len(usable)} credentialed proxies are HTTP-tier only; "
+                    "Chrome ignores proxy credentials. Use IP-allowlisted proxies for the browser tier."
+                )
+            proxies = usable
+        if not proxies:
+            return None
+
+        now = time.time()
+        try:
+            stored = cache.get_many([cls._key(p, store_name) for p in proxies])
+        except Exception:
+            stored = {}
+        healths = {p: cls._decayed(stored.get(cls._key(p, store_name)) or cls._fresh(), now) for p in proxies}
+
+        available = [p for p in proxies if healths[p]["quarantined_until"] <= now]
+        if not available:
+            proxy = min(proxies, key=lambda p: healths[p]["quarantined_until"])
+            logger.warning(f"ProxyPool: Every proxy quarantined for {store_name or 'any store'}; using {cls.label(proxy)}.")
+            return proxy
+        return random.choices(available, weights=[cls._weight(healths[p]) for p in available])[0]
+
+    @staticmethod
+    def requests_proxies(proxy: Optional[str]) -> Optional[Dict[str, str]]:
+        """`proxies=` mapping for requests (None means a direct connection)."""
+        return {"http": proxy, "https": proxy} if proxy else None
+
+    # --- Feeding ---
+
+    @classmethod
+    def record_success(cls, proxy: Optional[str], store_name: Optional[str] = None, latency: float = None) -> None:
+        if not proxy:
+            return
+        try:
+            health = cls.health(proxy, store_name)
+            alpha = cls.EWMA_ALPHA
+            health["score"] = health["score"] * (1 - alpha) + alpha
+            if latency is not None:
+                health["latency"] = latency if health["latency"] is None else health["latency"] * (1 - alpha) + latency * alpha
+            health["uses"] += 1
+            cls._save(proxy, store_name, health)
+        except Exception as e:
+            logger.debug(f"ProxyPool: Could not record success for {cls.label(proxy)}: {e}")
+
+    @classmethod
+    def record_failure(cls, proxy: Optional[str], store_name: Optional[str] = None, ban: bool = False) -> None:
+        """
+        Lowers the proxy's score. A ban signal (bot wall, 429) quarantines it right
+        away; ordinary failures only once its score sinks below SCRAPER_PROXY_MIN_SCORE.
+        """
+        if not proxy:
+            return
+        config = cls._settings()
+        try:
+            now = time.time()
+            health = cls.health(proxy, store_name)
+            health["score"] *= 1 - cls.EWMA_ALPHA
+            health["uses"] += 1
+            if ban:
+                health["bans"] += 1
+
+            failing = health["uses"] >= cls.MIN_SAMPLES and health["score"] < config["min_score"]
+            if (ban or failing) and health["quarantined_until"] <= now:
+                health["strikes"] += 1
+                period = min(config["quarantine"] * 2 ** (health["strikes"] - 1), config["max_quarantine"])
+                health["quarantined_until"] = now + period
+                # Back in rotation on probation, not at full weight
+                health["score"] = max(health["score"], config["min_score"])
+                logger.warning(
+                    f"ProxyPool: {cls.label(proxy)} quarantined for {store_name or 'all stores'} "
+                    f"{period:.0f}s ({'ban' if ban else 'failures'}, strike {health['strikes']})."
+                )
+                from apps.scraper.services.metrics import ScraperMetrics
+                ScraperMetrics.increment("proxy.quarantined", store_name)
+            health["last_failure"] = now
+            cls._save(proxy, store_name, health)
+        except Exception as e:
+            logger.debug(f"ProxyPool: Could not record failure for {cls.label(proxy)}: {e}")
+
+    # --- Reporting ---
+
+    @classmethod
+    def report(cls) -> Dict[str, Dict[str, Any]]:
+        """{"host:port [store]": health + quarantined_for} for report_stats."""
+        now = time.time()
+        report = {}
+        for key, (label, store_name) in (cache.get(cls.INDEX_KEY) or {}).items():
+            health = cache.get(key)
+            if not health:
+                continue
+            health = cls._decayed(health, now)
+            health["quarantined_for"] = max(0.0, health["quarantined_until"] - now)
+            report[f"{label} [{store_name}]"] = health
+        return report
@@ -0,0 +1,154 @@
+import logging
+import random
+import time
+from typing import Dict, Iterable, Tuple
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+class RateLimited(Exception):
+    """
+    Raised when a domain's next token is further away than the caller is willing
+    to block. Celery tasks turn this into a retry with `countdown=retry_after`.
+    """
+
+    def __init__(self, domain: str, retry_after: float):
+        self.domain = domain
+        self.retry_after = retry_after
+        super().__init__(f"Rate limited on {domain}: next slot in {retry_after:.1f}s")
+
+class DomainRateLimiter:
+    """
+    Cluster-Wide Politeness Engine.
+    A token bucket per domain, stored in the shared Django cache so every worker
+    process draws from the same budget. The refill rate comes from robots.txt
+    crawl-delay (1 token per delay), so the per-domain limit holds no matter how
+    many workers are scraping.
+    """
+
+    KEY_PREFIX = "scraper_bucket"
+    LOCK_TTL = 5
+    STATE_TTL = 60 * 60
+
+    _compliance = None
+
+    # --- Configuration ---
+
+    @staticmethod
+    def domain_for(url: str) -> str:
+        return urlparse(url).netloc.lower()
+
+    @classmethod
+    def _crawl_delay(cls, url: str) -> float:
+        if cls._compliance is None:
+            from apps.scraper.stealth_engine import RobotsComplianceManager
+            cls._compliance = RobotsComplianceManager()
+        return max(cls._compliance.get_crawl_delay(url), 0.1)
+
+    @staticmethod
+    def _burst() -> float:
+        return float(getattr(settings, 'SCRAPER_RATE_BURST', 1))
+
+    # --- Bucket Core ---
+
+    @classmethod
+    def _locked(cls, domain: str):
+        """Best-effort cross-process mutex built on the atomic cache.add()."""
+        lock_key = f"{cls.KEY_PREFIX}:lock:{domain}"
+        for _ in range(100):
+            if cache.add(lock_key, 1, cls.LOCK_TTL):
+                return lock_key
+            time.sleep(0.01)
+        logger.warning(f"RateLimiter: Lock contention on {domain}, proceeding unlocked.")
+        return None
+
+    @classmethod
+    def _take(cls, url: str, max_wait: float = None) -> Tuple[bool, float]:
+        """
+        Takes a token (or reserves the next one) for the URL's domain.
+        Returns (granted, wait_seconds). When the wait would exceed `max_wait`
+        nothing is reserved and granted is False.
+        """
+        domain = cls.domain_for(url)
+        interval = cls._crawl_delay(url)
+        rate = 1.0 / interval
+        capacity = cls._burst()
+        key = f"{cls.KEY_PREFIX}:{domain}"
+
+        lock_key = cls._locked(domain)
+        try:
+            now = time.time()
+            state = cache.get(key) or {"tokens": capacity, "ts": now}
+            tokens = min(capacity, state["tokens"] + (now - state["ts"]) * rate)
+
+            # Negative balance = tokens already promised to earlier reservations
+            tokens -= 1
+            wait = 0.0 if tokens >= 0 else -tokens / rate
+
+            if max_wait is not None and wait > max_wait:
+                return False, wait
+
+            cache.set(key, {"tokens": tokens, "ts": now}, cls.STATE_TTL)
+            return True, wait
+        finally:
+            if lock_key:
+                cache.delete(lock_key)
+
+    # --- Public API ---
+
+    @classmethod
+    def reserve(cls, url: str) -> float:
+        """
+        Commits a reservation and returns the seconds until it may be used.
+        For callers that wait without blocking a thread (asyncio, Celery countdown).
+        """
+        return cls._take(url)[1]
+
+    @classmethod
+    def acquire(cls, url: str, max_wait: float = None) -> float:
+        """
+        Blocks for at most `max_wait` seconds (SCRAPER_RATE_MAX_INLINE_WAIT by default)
+        until a token for the URL's domain is available. Raises RateLimited if the
+        domain is busier than that, so the worker slot is released instead of sleeping.
+        """
+        if max_wait is None:
+            max_wait = float(getattr(settings, 'SCRAPER_RATE_MAX_INLINE_WAIT', 5))
+
+        started = time.monotonic()
+        granted, wait = cls._take(url, max_wait=max_wait)
+        domain = cls.domain_for(url)
+        if not granted:
+            from apps.scraper.services.metrics import ScraperMetrics
+            ScraperMetrics.increment("ratelimit.deferred", domain)
+            raise RateLimited(domain, wait)
+
+        if wait > 0:
+            time.sleep(wait)
+
+        waited = time.monotonic() - started
+        from apps.scraper.services.metrics import ScraperMetrics
+        ScraperMetrics.observe("ratelimit.acquire_latency", waited, domain)
+        return waited
+
+    @classmethod
+    def schedule(cls, urls: Iterable[str]) -> Dict[str, float]:
+        """
+        Dispatch Planner: returns a Celery countdown per URL that spreads each
+        domain's tasks one crawl-delay apart (plus jitter), starting from the
+        bucket's current state. Reserves nothing; the tasks acquire on arrival.
+        """
+        countdowns = {}
+        offsets: Dict[str, float] = {}
+        for url in urls:
+            domain = cls.domain_for(url)
+            interval = cls._crawl_delay(url)
+            if domain not in offsets:
+                state = cache.get(f"{cls.KEY_PREFIX}:{domain}")
+                backlog = max(0.0, -state["tokens"] * interval) if state else 0.0
+                offsets[domain] = backlog
+            countdowns[url] = round(offsets[domain] + random.uniform(0, 1.0), 2)
+            offsets[domain] += interval
+        return countdowns
@@ -12,6 +12,8 @@ from django.apps import apps
 from .stealth_browser import SeleniumStealthDriver, HumanBehavior
 from .stealth_engine import AdvancedScraperSession, ScrapeException
 from .security.handshake import SanitizationHandshake, UnsafeURLError
+from .rate_limiter import DomainRateLimiter
+from .services.storefront import StorefrontRouter
 
 logger = logging.getLogger(__name__)
 
@@ -21,10 +23,12 @@ class ScraperBase(ABC):
     Enforces the Strategy Pattern and provides common utilities.
     Now integrated with Advanced Defensive Engineering.
     """
+
+    STORE_NAME = None
     
     def __init__(self, headless=True):
         self.session_manager = AdvancedScraperSession()
-        self.driver = SeleniumStealthDriver.get_driver(headless=headless)
+        self.driver = SeleniumStealthDriver.get_driver(headless=headless, store_name=self.STORE_NAME)
         
     def __enter__(self):
         return self
@@ -36,17 +40,16 @@ class ScraperBase(ABC):
         """
         The Gatekeeper:
         1. Sanitization Handshake (SSRF + Integrity Check).
-        2. Robots.txt Compliance.
-        3. Jitter & Header Rotation.
+        2. Robots.txt Compliance (cluster-wide token bucket per domain).
+        3. Header Rotation.
         """
         # 1. Security Handshake (Deep-Trace Audit Requirement)
         # This blocks internal IPs, file://, and non-whitelisted domains.
         SanitizationHandshake.execute_sanitization_handshake(url, user_id="scraper_system")
         
-        # 2. Compliance & Jitter (Sleeps here)
-        # We use the session manager to handle the delay logic
-        delay = self.session_manager.compliance_engine.get_crawl_delay(url)
-        HumanBehavior.human_like_delay(min_wait=delay, max_wait=delay+2.0)
+        # 2. Compliance: take a token from the shared per-domain bucket.
+        # Waits only briefly; a busy domain raises RateLimited so the caller can reschedule.
+        DomainRateLimiter.acquire(StorefrontRouter.rewrite(url))
         
         # 3. Log intent
         logger.info(f"Guard: Accessing {url} with stealth protocols.")
@@ -71,6 +74,8 @@ class ScraperBase(ABC):
 
 class AmazonAdapter(ScraperBase):
     """Adapter for Amazon India."""
+
+    STORE_NAME = "Amazon"
     
     def scrape_price(self, url: str) -> Decimal:
         try:
@@ -78,7 +83,7 @@ class AmazonAdapter(ScraperBase):
             self.pre_scrape_guard(url)
             
             # 2. Access URL
-            self.driver.get(url)
+            self.driver.get(StorefrontRouter.rewrite(url))
             HumanBehavior.random_scroll(self.driver)
             
             # Try multiple selectors (fallbacks)
@@ -111,6 +116,8 @@ class AmazonAdapter(ScraperBase):
 
 class FlipkartAdapter(ScraperBase):
     """Adapter for Flipkart."""
+
+    STORE_NAME = "Flipkart"
     
     def scrape_price(self, url: str) -> Decimal:
         try:
@@ -118,7 +125,7 @@ class FlipkartAdapter(ScraperBase):
             self.pre_scrape_guard(url)
             
             # 2. Access URL
-            self.driver.get(url)
+            self.driver.get(StorefrontRouter.rewrite(url))
             HumanBehavior.random_scroll(self.driver)
             
             # Flipkart usually puts price in div.Nx9bqj.CxhGGd (class names change frequently)
@@ -211,7 +218,7 @@ class ScraperEngine:
             store_price.last_updated = timezone.now()
             store_price.save()
             
-            # Create History (Signal will handle trends/hashing)
+            # Create History (PriceHistory.save computes trend/hash in the same write)
             PriceHistory.objects.create(
                 store_price=store_price,
                 price=price
@@ -1,7 +1,105 @@
 import urllib.parse
 import ipaddress
 import socket
-from typing import Tuple, Optional
+import threading
+import time
+from collections import OrderedDict
+from typing import Tuple, Optional, FrozenSet, Dict
+
+# The IP set always comes from getaddrinfo, the same resolver requests, aiohttp and
+# Chrome connect through (/etc/hosts, nsswitch). dnspython, when installed, only
+# supplies the record TTL; without it entries live for DEFAULT_TTL.
+try:
+    import dns.resolver
+except ImportError:
+    dns = None
+
+class DNSVerdictCache:
+    """
+    Bounded LRU of DNS resolutions and their SSRF verdicts, per domain.
+    An entry lives for the record's TTL (clamped). On expiry the domain is
+    re-resolved, but the private-range check only re-runs when the resolved
+    IP set actually changed. Thread-safe; counters are exposed via stats().
+    """
+
+    DEFAULT_TTL = 60
+    MIN_TTL = 5
+    MAX_TTL = 300
+    NEGATIVE_TTL = 10
+    TTL_LOOKUP_TIMEOUT = 2.0
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.rechecks = 0
+
+    @classmethod
+    def _resolve(cls, domain: str) -> Tuple[FrozenSet[str], int]:
+        """Returns (ip_set, ttl_seconds). Raises socket.gaierror when the name does not resolve."""
+        ips = frozenset(item[4][0] for item in socket.getaddrinfo(domain, None))
+        return ips, cls._ttl(domain)
+
+    @classmethod
+    def _ttl(cls, domain: str) -> int:
+        """Shortest A/AAAA record TTL for `domain`, or DEFAULT_TTL when it can't be read."""
+        if dns is None:
+            return cls.DEFAULT_TTL
+        ttls = []
+        for rdtype in ("A", "AAAA"):
+            try:
+                ttls.append(dns.resolver.resolve(domain, rdtype, lifetime=cls.TTL_LOOKUP_TIMEOUT).rrset.ttl)
+            except Exception:
+                continue
+        return min(ttls) if ttls else cls.DEFAULT_TTL
+
+    def verdict(self, domain: str, checker) -> Optional[str]:
+        """
+        Returns the cached error code for `domain` (None = safe), resolving and
+        running `checker(ip_set) -> Optional[str]` only when needed.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(domain)
+            if entry and entry["expires"] > now:
+                self._entries.move_to_end(domain)
+                self.hits += 1
+                return entry["verdict"]
+            self.misses += 1
+
+        try:
+            ips, ttl = self._resolve(domain)
+        except socket.gaierror:
+            self._store(domain, None, "DNS_RESOLUTION_FAILED", self.NEGATIVE_TTL)
+            return "DNS_RESOLUTION_FAILED"
+
+        if entry and entry["ips"] == ips:
+            # Same answer as last time: the previous range verdict still holds
+            verdict = entry["verdict"]
+        else:
+            with self._lock:
+                self.rechecks += 1
+            verdict = checker(ips)
+
+        self._store(domain, ips, verdict, min(max(ttl, self.MIN_TTL), self.MAX_TTL))
+        return verdict
+
+    def _store(self, domain: str, ips, verdict: Optional[str], ttl: float) -> None:
+        with self._lock:
+            self._entries[domain] = {"ips": ips, "verdict": verdict, "expires": time.monotonic() + ttl}
+            self._entries.move_to_end(domain)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "rechecks": self.rechecks, "size": len(self._entries)}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
 
 class SSRFShield:
     """
@@ -30,6 +128,19 @@ class SSRFShield:
         ipaddress.ip_network('169.254.0.0/16'),   # Link-Local / Cloud Metadata
     ]
 
+    # Process-wide resolution cache: a sweep over a handful of domains resolves each one per TTL, not per URL
+    dns_cache = DNSVerdictCache()
+
+    @staticmethod
+    def _check_ips(ips) -> Optional[str]:
+        """Returns an error code if any resolved address falls in a blacklisted range."""
+        for ip_addr in ips:
+            ip_obj = ipaddress.ip_address(ip_addr)
+            for private_range in SSRFShield.PRIVATE_RANGES:
+                if ip_obj in private_range:
+                    return "INTERNAL_IP_DETECTED"
+        return None
+
     @staticmethod
     def is_url_safe_for_scraping(user_url: str) -> Tuple[bool, str, Optional[str]]:
         """
@@ -61,21 +172,14 @@ class SSRFShield:
                     return False, user_url, "DOMAIN_NOT_ALLOWED"
 
             # 4. Infrastructure & Metadata Defense (DNS Resolution Check)
-            # Resolve the domain to IP to prevent DNS Rebinding or internal routing
-            try:
-                # Get all IPs for the domain
-                ips = socket.getaddrinfo(domain, None)
-                for item in ips:
-                    ip_addr = item[4][0]
-                    ip_obj = ipaddress.ip_address(ip_addr)
-                    
-                    # Check against Blacklisted Ranges
-                    for private_range in SSRFShield.PRIVATE_RANGES:
-                        if ip_obj in private_range:
-                            return False, user_url, "INTERNAL_IP_DETECTED"
-                            
-            except socket.gaierror:
-                return False, user_url, "DNS_RESOLUTION_FAILED"
+            # Resolve the domain to IP to prevent DNS Rebinding or internal routing.
+            # Resolutions are cached for their TTL and re-checked only when the IP set changes.
+            # Only a DEBUG load test against the fake storefront skips it (warned at startup).
+            from apps.scraper.services.storefront import StorefrontRouter
+            if not StorefrontRouter.skips_dns_check():
+                dns_error = SSRFShield.dns_cache.verdict(domain, SSRFShield._check_ips)
+                if dns_error:
+                    return False, user_url, dns_error
 
             # Reconstruct the URL to ensure no hidden parts remain
             # We strictly rebuild it from the validated components
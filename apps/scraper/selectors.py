@@ -1,7 +1,238 @@
+import statistics
+import threading
+import time
 from decimal import Decimal
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from datetime import datetime
-from .normalization import DataCleaningPipeline
+from .normalization import CleanDataService
+
+class StoreSelector:
+    """
+    Single source of truth for store DOM selectors.
+    `AMAZON`/`FLIPKART` hold the primary selector per field; `FALLBACKS` lists the
+    alternates tried (in order) when a layout change breaks the primary one.
+    """
+
+    AMAZON = {
+        "title": "#productTitle",
+        "price": ".a-price .a-offscreen",  # Amazon often has multiple price elements, this is a common one
+        "image": "#landingImage",
+        "availability": "#availability",
+    }
+
+    FLIPKART = {
+        "title": ".B_NuCI",
+        "price": "._30jeq3._16Jk6d",
+        "image": "._396cs4._2amPTt._3qGmMb",
+        "availability": "._16FRp0",
+    }
+
+    FALLBACKS = {
+        "Amazon": {
+            "title": ["#title span", "h1#title"],
+            "price": ["#priceblock_dealprice", "#priceblock_ourprice", "span.a-price-whole"],
+            "image": ["#imgTagWrapperId img"],
+            "availability": ["#outOfStock"],
+        },
+        "Flipkart": {
+            "title": ["h1.B_NuCI", "h1._2NKhZn", "span.VU-ZEz"],
+            "price": ["div._30jeq3", "div.Nx9bqj"],
+            "image": ["img._396cs4", "img.DByuf4"],
+            "availability": ["div.Z8JjpR"],
+        },
+    }
+
+    # Search result cards: one container per result, then per-field candidates inside it
+    SEARCH_CARDS = {
+        "Amazon": {
+            "card": "div[data-component-type='s-search-result']",
+            "link": ["h2 a.a-link-normal", "a.a-link-normal.s-no-outline", "h2 a"],
+            "title": ["h2 a span", "h2 a", "h2"],
+            "price": ["span.a-price span.a-offscreen", "span.a-price-whole"],
+            "image": ["img.s-image", "img"],
+            "availability": ["span.a-color-price", "span.a-size-base.a-color-secondary"],
+        },
+        "Flipkart": {
+            "card": "div._1AtVbE, div._13oc-S > div, div.tUxRFH",
+            "link": ["a._1fQZEK", "a.s1Q9rs", "a.CGtC98", "a[href*='/p/']"],
+            "title": ["div._4rR01T", "a.s1Q9rs", "div.KzDlHZ"],
+            "price": ["div._30jeq3", "div.Nx9bqj"],
+            "image": ["img._396cs4", "img.DByuf4", "img"],
+            "availability": ["div._192laR", "span._192laR", "div._16FRp0"],
+        },
+    }
+
+    # Card text that marks a result as not purchasable right now
+    UNAVAILABLE_MARKERS = ("currently unavailable", "out of stock", "sold out", "coming soon", "temporarily unavailable")
+
+    # Text fragments that only appear on captcha / bot-wall interstitials
+    BOT_WALL_MARKERS = {
+        "Amazon": [
+            "api-services-support@amazon.com",
+            "/errors/validateCaptcha",
+            "Type the characters you see in this image",
+        ],
+        "Flipkart": [
+            "Are you a human?",
+            "/captcha/",
+        ],
+    }
+
+    FIELDS = ("title", "price", "image", "availability")
+
+    @staticmethod
+    def primary(store_name: str) -> Dict[str, str]:
+        return StoreSelector.AMAZON if store_name.lower() == "amazon" else StoreSelector.FLIPKART
+
+    @staticmethod
+    def candidates(store_name: str, field: str) -> List[str]:
+        """Primary selector first, then the store's fallbacks for that field."""
+        store_key = "Amazon" if store_name.lower() == "amazon" else "Flipkart"
+        primary = StoreSelector.primary(store_name).get(field)
+        fallbacks = StoreSelector.FALLBACKS[store_key].get(field, [])
+        return ([primary] if primary else []) + [sel for sel in fallbacks if sel != primary]
+
+    @staticmethod
+    def search_spec(store_name: str) -> Dict[str, Any]:
+        store_key = "Amazon" if store_name.lower() == "amazon" else "Flipkart"
+        return StoreSelector.SEARCH_CARDS[store_key]
+
+    @staticmethod
+    def is_available(text: Optional[str]) -> bool:
+        """False when the availability (or card) text carries an UNAVAILABLE_MARKERS phrase."""
+        text = (text or "").lower()
+        return not any(marker in text for marker in StoreSelector.UNAVAILABLE_MARKERS)
+
+    @staticmethod
+    def bot_wall_markers(store_name: str) -> List[str]:
+        store_key = "Amazon" if store_name.lower() == "amazon" else "Flipkart"
+        return StoreSelector.BOT_WALL_MARKERS[store_key]
+
+class SelectorRegistry:
+    """
+    Adaptive Selector Ordering.
+    Tracks, per store and field, how often each candidate selector wins and how
+    long it took to find, and serves StoreSelector's candidates reordered so the
+    current winner is tried first. Counters are buffered per process and flushed
+    to the shared cache, so every worker learns from every other worker.
+    """
+
+    KEY_PREFIX = "selector_stats"
+    TTL = 60 * 60 * 24 * 7
+    FLUSH_EVERY = 20          # observations buffered before a cache write
+    ORDER_REFRESH = 60        # seconds an ordering is reused before re-reading stats
+    MAX_LATENCIES = 50        # samples kept per selector for the median
+
+    _lock = threading.Lock()
+    _pending: Dict[tuple, Dict[str, Dict[str, Any]]] = {}
+    _pending_count = 0
+    _orders: Dict[tuple, tuple] = {}
+
+    @staticmethod
+    def _store_key(store_name: str) -> str:
+        return "Amazon" if store_name.lower() == "amazon" else "Flipkart"
+
+    @classmethod
+    def _key(cls, store_key: str, field: str) -> str:
+        return f"{cls.KEY_PREFIX}:{store_key}:{field}"
+
+    @classmethod
+    def stats(cls, store_name: str, field: str) -> Dict[str, Dict[str, Any]]:
+        """{selector: {"hits", "tries", "latencies"}} from the shared cache."""
+        from django.core.cache import cache
+        try:
+            return cache.get(cls._key(cls._store_key(store_name), field)) or {}
+        except Exception:
+            return {}
+
+    @classmethod
+    def ordered(cls, store_name: str, field: str) -> List[str]:
+        """StoreSelector candidates, best hit rate first, then fastest median find."""
+        store_key = cls._store_key(store_name)
+        cached = cls._orders.get((store_key, field))
+        if cached and time.monotonic() - cached[0] < cls.ORDER_REFRESH:
+            return list(cached[1])
+
+        candidates = StoreSelector.candidates(store_name, field)
+        stats = cls.stats(store_name, field)
+
+        def rank(indexed):
+            position, selector = indexed
+            entry = stats.get(selector, {})
+            # Laplace smoothing: untried selectors sit at 0.5 instead of jumping ahead
+            hit_rate = (entry.get("hits", 0) + 1) / (entry.get("tries", 0) + 2)
+            latencies = entry.get("latencies") or [float("inf")]
+            return (-hit_rate, statistics.median(latencies), position)
+
+        order = [selector for _, selector in sorted(enumerate(candidates), key=rank)]
+        cls._orders[(store_key, field)] = (time.monotonic(), order)
+        return list(order)
+
+    @classmethod
+    def record(cls, store_name: str, field: str, tried: List[str], winner: Optional[str], latency: float = None) -> None:
+        """
+        Records one lookup: every selector in `tried` counts a try, `winner` (if any)
+        a hit with its find latency in seconds. All candidates failing raises the
+        `selectors.all_failed` metric.
+        """
+        store_key = cls._store_key(store_name)
+        with cls._lock:
+            bucket = cls._pending.setdefault((store_key, field), {})
+            for selector in tried:
+                entry = bucket.setdefault(selector, {"hits": 0, "tries": 0, "latencies": []})
+                entry["tries"] += 1
+                if selector == winner:
+                    entry["hits"] += 1
+                    if latency is not None:
+                        entry["latencies"].append(round(latency, 4))
+            cls._pending_count += 1
+            flush = cls._pending_count >= cls.FLUSH_EVERY
+
+        if winner is None:
+            from apps.scraper.services.metrics import ScraperMetrics
+            ScraperMetrics.increment("selectors.all_failed", f"{store_key}:{field}")
+        if flush:
+            cls.flush()
+
+    @classmethod
+    def flush(cls) -> None:
+        """Merges buffered counters into the shared cache."""
+        from django.core.cache import cache
+        with cls._lock:
+            pending, cls._pending, cls._pending_count = cls._pending, {}, 0
+
+        for (store_key, field), bucket in pending.items():
+            key = cls._key(store_key, field)
+            try:
+                stats = cache.get(key) or {}
+                for selector, delta in bucket.items():
+                    entry = stats.setdefault(selector, {"hits": 0, "tries": 0, "latencies": []})
+                    entry["hits"] += delta["hits"]
+                    entry["tries"] += delta["tries"]
+                    entry["latencies"] = (entry["latencies"] + delta["latencies"])[-cls.MAX_LATENCIES:]
+                cache.set(key, stats, cls.TTL)
+            except Exception:
+                pass
+            cls._orders.pop((store_key, field), None)
+
+    @classmethod
+    def report(cls) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """{"Store:field": {selector: {hit_rate, median_ms, tries}}} for every tracked field."""
+        report = {}
+        for store_key in StoreSelector.FALLBACKS:
+            for field in StoreSelector.FIELDS:
+                stats = cls.stats(store_key, field)
+                if not stats:
+                    continue
+                report[f"{store_key}:{field}"] = {
+                    selector: {
+                        "hit_rate": entry["hits"] / entry["tries"] if entry["tries"] else 0.0,
+                        "median_ms": statistics.median(entry["latencies"]) * 1000 if entry["latencies"] else None,
+                        "tries": entry["tries"],
+                    }
+                    for selector, entry in stats.items()
+                }
+        return report
 
 class UnifiedDataMapper:
     """
@@ -12,9 +243,9 @@ class UnifiedDataMapper:
     def to_standard_units(value: Any, unit_type: str) -> Any:
         # Cross-Store Normalization
         if unit_type == 'price':
-            return DataCleaningPipeline.clean_price(str(value))
+            return CleanDataService.to_decimal(value)
         elif unit_type == 'rating':
-            return DataCleaningPipeline.clean_rating(str(value))
+            return CleanDataService.to_float(value)
         elif unit_type == 'date':
             # Handling relative delivery text
             return str(value)
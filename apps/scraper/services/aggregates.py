@@ -0,0 +1,117 @@
+import logging
+from typing import Dict, Iterable, List
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F, Min, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from apps.scraper.models import DirtyProduct, PriceHistory, Product, StorePrice
+
+logger = logging.getLogger(__name__)
+
+class ProductAggregates:
+    """
+    Debounced Product Aggregate Recompute.
+    Price writes only upsert the product into the DirtyProduct table. After the
+    write commits, a recompute task is scheduled at most once per debounce
+    window; it drains the dirty rows (SKIP LOCKED, so concurrent workers split
+    the set) and recomputes lowest price, velocity, trend and search vector for
+    the whole batch in three queries. Work scales with changed products, not
+    with price writes.
+    """
+
+    SCHEDULE_KEY = "product_aggregates:scheduled"
+
+    @staticmethod
+    def _settings() -> Dict[str, float]:
+        return {
+            "window": float(getattr(settings, 'SCRAPER_AGGREGATE_DEBOUNCE', 30)),
+            "batch_size": int(getattr(settings, 'SCRAPER_AGGREGATE_BATCH_SIZE', 500)),
+        }
+
+    # --- Marking ---
+
+    @classmethod
+    def mark_dirty(cls, product_ids: Iterable[int]) -> None:
+        """Flags products for the next recompute. Re-marking refreshes marked_at, so a drain in progress keeps the row."""
+        product_ids = {pk for pk in product_ids if pk}
+        if not product_ids:
+            return
+        now = timezone.now()
+        rows = [DirtyProduct(product_id=pk, marked_at=now) for pk in product_ids]
+        unique_fields = ["product"] if connection.features.supports_update_conflicts_with_target else None
+        DirtyProduct.objects.bulk_create(rows, update_conflicts=True, update_fields=["marked_at"], unique_fields=unique_fields)
+        transaction.on_commit(cls.schedule)
+
+    @classmethod
+    def schedule(cls) -> None:
+        """Queues one recompute per debounce window, however many writes land inside it."""
+        window = cls._settings()["window"]
+        try:
+            if not cache.add(cls.SCHEDULE_KEY, 1, window):
+                return
+            from apps.scraper.tasks import recompute_dirty_products
+            recompute_dirty_products.apply_async(countdown=window)
+        except Exception as e:
+            # The Beat safety net drains the table anyway
+            logger.warning(f"Aggregates: Could not schedule a recompute: {e}")
+
+    # --- Draining ---
+
+    @classmethod
+    def drain(cls, batch_size: int = None) -> int:
+        """
+        Claims up to `batch_size` dirty products, recomputes them and clears their
+        marks, all in one transaction. Products re-marked meanwhile stay dirty.
+        Returns the number of products recomputed.
+        """
+        batch_size = batch_size or cls._settings()["batch_size"]
+        with transaction.atomic():
+            claimed = list(
+                DirtyProduct.objects.select_for_update(skip_locked=True)
+                .order_by("marked_at")
+                .values_list("product_id", "marked_at")[:batch_size]
+            )
+            if not claimed:
+                return 0
+            started = timezone.now()
+            cls.recompute([pk for pk, _ in claimed])
+            DirtyProduct.objects.filter(product_id__in=[pk for pk, _ in claimed], marked_at__lte=started).delete()
+        logger.info(f"Aggregates: Recomputed {len(claimed)} products.")
+        return len(claimed)
+
+    @staticmethod
+    def recompute(product_ids: List[int]) -> None:
+        """
+        Product.update_lowest_price for many products in three queries: lowest
+        available price, the last 7 history points per product, one bulk_update.
+        """
+        if not product_ids:
+            return
+        lowest = dict(
+            StorePrice.objects.filter(product_id__in=product_ids, is_available=True)
+            .values_list("product_id").annotate(low=Min("current_price"))
+        )
+        recent: Dict[int, List[float]] = {}
+        history = (
+            PriceHistory.objects.filter(store_price__product_id__in=lowest.keys())
+            .annotate(rank=Window(RowNumber(), partition_by=F("store_price__product_id"), order_by=F("recorded_at").desc()))
+            .filter(rank__lte=7)
+            .order_by("store_price__product_id", "-recorded_at")
+            .values_list("store_price__product_id", "price")
+        )
+        for product_id, price in history:
+            recent.setdefault(product_id, []).append(float(price))
+
+        products = list(Product.objects.filter(pk__in=lowest.keys()).select_related("category"))
+        for product in products:
+            product.current_lowest_price = lowest[product.pk]
+            product.get_price_velocity()
+            product.generate_search_vector()
+            trend = Product.trend_from_prices(recent.get(product.pk, [])[::-1])
+            if trend:
+                product.trend_indicator = trend
+        Product.objects.bulk_update(products, ["current_lowest_price", "trend_indicator", "search_vector"])
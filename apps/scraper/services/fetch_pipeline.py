@@ -0,0 +1,129 @@
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+from django.core.cache import cache
+
+from apps.scraper.stealth_engine import AdvancedScraperSession
+from apps.scraper.security.handshake import SanitizationHandshake, UnsafeURLError
+from apps.scraper.utils.parsers import parse_product_html
+from apps.scraper.services.replay import FixtureCorpus
+from apps.scraper.circuit_breaker import StoreCircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+class TieredFetchPipeline:
+    """
+    HTTP-First Fetch Pipeline.
+    Tier 1 is a plain GET through the stealth requests session plus offline HTML
+    parsing; Tier 2 is the full Selenium StealthScraper. A URL is escalated only
+    when Tier 1 hits a bot wall or the page needs JS to render price/title, and
+    the tier that finally served it is remembered so the next fetch skips straight there.
+    """
+
+    TIER_HTTP = "http"
+    TIER_BROWSER = "browser"
+
+    # How long a tier decision is trusted before HTTP gets another chance
+    TIER_MEMORY_TTL = 60 * 60 * 24 * 7
+
+    _local = threading.local()
+
+    @staticmethod
+    def _tier_key(url: str) -> str:
+        return f"scraper_tier:{hashlib.sha1(url.encode('utf-8')).hexdigest()}"
+
+    @staticmethod
+    def preferred_tier(url: str) -> Optional[str]:
+        return cache.get(TieredFetchPipeline._tier_key(url))
+
+    @staticmethod
+    def remember_tier(url: str, tier: str) -> None:
+        cache.set(TieredFetchPipeline._tier_key(url), tier, TieredFetchPipeline.TIER_MEMORY_TTL)
+
+    @classmethod
+    def _session(cls) -> AdvancedScraperSession:
+        """One keep-alive session per thread, so connections to a store are reused."""
+        if not hasattr(cls._local, "session"):
+            cls._local.session = AdvancedScraperSession()
+        return cls._local.session
+
+    # --- Tier 1: HTTP ---
+
+    @classmethod
+    def fetch_http(cls, url: str, store_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns a scrape result dict, or None if the page must be escalated to the browser.
+        """
+        try:
+            safe_url = SanitizationHandshake.execute_sanitization_handshake(url, user_id="scraper_system")
+        except UnsafeURLError as e:
+            logger.warning(f"HTTP Tier: Handshake rejected {url}: {e}")
+            return {"url": url, "status": "failed", "error": str(e), "timestamp": datetime.now().isoformat()}
+
+        response = cls._session().fetch_page(safe_url)
+        if response is None or response.status_code != 200:
+            status = getattr(response, "status_code", "no response")
+            logger.info(f"HTTP Tier: {url} returned {status}. Escalating.")
+            return None
+
+        parsed = parse_product_html(response.text, store_name)
+        FixtureCorpus().capture_safely(url, response.text, store_name, tier=cls.TIER_HTTP)
+        # HTTP-tier bot walls are routine (no JS, no cookies) and are not breaker
+        # signals; the browser tier reports the walls that mean a real block.
+        if parsed["bot_wall"]:
+            logger.info(f"HTTP Tier: Bot wall on {url}. Escalating.")
+            return None
+        if not parsed["title"] or not parsed["price"]:
+            logger.info(f"HTTP Tier: {url} needs JS rendering (title/price missing). Escalating.")
+            return None
+
+        StoreCircuitBreaker.record_success(store_name)
+
+        return {
+            "url": url,
+            "title": parsed["title"],
+            "price": parsed["price"],
+            "image_url": parsed["image_url"] or "",
+            "availability": parsed["availability"],
+            "timestamp": datetime.now().isoformat(),
+            "status": "success",
+        }
+
+    # --- Tier 2: Browser ---
+
+    @staticmethod
+    def fetch_browser(url: str, scraper_class) -> Dict[str, Any]:
+        with scraper_class() as scraper:
+            return scraper.scrape(url)
+
+    # --- Orchestration ---
+
+    @classmethod
+    def fetch(cls, url: str, store_name: str, scraper_class) -> Dict[str, Any]:
+        """
+        Runs the tiers in order (skipping HTTP for URLs known to need the browser)
+        and tags the result with the tier that produced it. Raises CircuitOpen
+        while the store is paused; both tiers share a half-open probe slot.
+        """
+        StoreCircuitBreaker.guard(store_name)
+        try:
+            preferred = cls.preferred_tier(url)
+
+            if preferred != cls.TIER_BROWSER:
+                data = cls.fetch_http(url, store_name)
+                if data is not None:
+                    if data.get("status") == "success":
+                        cls.remember_tier(url, cls.TIER_HTTP)
+                    data["tier"] = cls.TIER_HTTP
+                    return data
+
+            data = cls.fetch_browser(url, scraper_class)
+            if data.get("status") == "success":
+                cls.remember_tier(url, cls.TIER_BROWSER)
+            data["tier"] = cls.TIER_BROWSER
+            return data
+        finally:
+            StoreCircuitBreaker.release_probe(store_name)
@@ -0,0 +1,379 @@
+import hashlib
+import logging
+import uuid
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from apps.scraper.models import PriceHistory, Product, StorePrice
+from apps.scraper.selectors import StoreSelector
+from apps.scraper.services.scheduler import RefreshScheduler
+from apps.scraper.services.aggregates import ProductAggregates
+
+logger = logging.getLogger(__name__)
+
+class IngestionWriter:
+    """
+    Bulk Ingestion Writer.
+    Buffers scraped results and applies them in chunks with a fixed number of
+    queries per chunk instead of ~10 per result: one lookup of the existing
+    listings, bulk_create for new products / listings / history rows,
+    bulk_update for changed listings, change percentages computed in memory
+    from the previous price, one dirty-mark for every touched product (see
+    ProductAggregates) and one alert-evaluation message per chunk. Unchanged pages (same content
+    fingerprint) only get the last_seen heartbeat. Partial pages (a "success"
+    without a title or a positive price) are skipped, never written as 0.00.
+    Listings are matched on (product name, store); a detail scrape confirming a
+    provisional search-card price is matched on the listing's pk (the
+    "store_price_id" key) or URL instead, since the two titles rarely agree.
+    Search-card prices themselves go through write_cards (provisional mode).
+
+    Usage:
+        with IngestionWriter() as writer:
+            for data in results:
+                writer.add(data)
+    """
+
+    UPDATE_FIELDS = [
+        "current_price", "product_url", "image_url", "is_available", "price_hash",
+        "content_fingerprint", "last_seen", "last_updated", "is_provisional",
+    ]
+
+    def __init__(self, chunk_size: int = None):
+        self.chunk_size = max(1, int(chunk_size or getattr(settings, 'SCRAPER_INGEST_CHUNK_SIZE', 500)))
+        self.buffer: List[Dict[str, Any]] = []
+        self.stats = {"created": 0, "changed": 0, "unchanged": 0, "partial": 0, "skipped": 0}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.flush()
+
+    # --- Buffering ---
+
+    def add(self, data: Dict[str, Any]) -> None:
+        """Queues one scrape result; a full buffer is written straight away."""
+        self.buffer.append(data)
+        if len(self.buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> List[Tuple[Optional[Product], bool]]:
+        pending, self.buffer = self.buffer, []
+        return self.write(pending)
+
+    @property
+    def saved(self) -> int:
+        return self.stats["created"] + self.stats["changed"] + self.stats["unchanged"]
+
+    # --- Writing ---
+
+    def write(self, batch: List[Dict[str, Any]]) -> List[Tuple[Optional[Product], bool]]:
+        """
+        Applies `batch` in chunks. Returns (product, changed) per input row in
+        order; product is None for failed scrapes and rows that could not be written.
+        """
+        outcomes: List[Tuple[Optional[Product], bool]] = []
+        for start in range(0, len(batch), self.chunk_size):
+            chunk = batch[start:start + self.chunk_size]
+            try:
+                outcomes.extend(self._write_chunk(chunk))
+            except Exception as e:
+                logger.error(f"Ingestion: Failed to write a chunk of {len(chunk)} results: {e}")
+                self.stats["skipped"] += len(chunk)
+                outcomes.extend([(None, False)] * len(chunk))
+        return outcomes
+
+    def write_cards(self, cards: List[Dict[str, Any]]) -> List[Optional[Product]]:
+        """
+        Provisional Search-Card Writes.
+        Persists prices read off search result cards without a detail scrape:
+        products come from the same bulk path as scrapes, new listings are
+        inserted with is_provisional=True and provisional listings refreshed.
+        Listings confirmed by a detail scrape are never overwritten, and card
+        data writes no PriceHistory and evaluates no alerts. Returns the product
+        per input card (None for cards without a name, URL or price).
+        """
+        products: List[Optional[Product]] = []
+        for start in range(0, len(cards), self.chunk_size):
+            chunk = cards[start:start + self.chunk_size]
+            try:
+                products.extend(self._write_cards_chunk(chunk))
+            except Exception as e:
+                logger.error(f"Ingestion: Failed to write {len(chunk)} search cards: {e}")
+                products.extend([None] * len(chunk))
+        return products
+
+    def _write_cards_chunk(self, chunk: List[Dict[str, Any]]) -> List[Optional[Product]]:
+        # First card wins when a listing shows up twice on the result page
+        latest: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for card in chunk:
+            if self._is_card(card):
+                latest.setdefault(self._key(card), card)
+        if not latest:
+            return [None] * len(chunk)
+
+        now = timezone.now()
+        with transaction.atomic():
+            existing = {
+                (sp.product.name, sp.store_name): sp
+                for sp in StorePrice.objects.select_related("product")
+                .filter(product__name__in={name for name, _ in latest}, store_name__in={store for _, store in latest})
+            }
+            # A listing already on file under its detail-page title keeps that product
+            by_url = {(card["url"], key[1]): key for key, card in latest.items() if key not in existing}
+            if by_url:
+                for sp in StorePrice.objects.select_related("product").filter(
+                    product_url__in={url for url, _ in by_url}, store_name__in={store for _, store in by_url},
+                ):
+                    key = by_url.get((sp.product_url, sp.store_name))
+                    if key is not None:
+                        existing.setdefault(key, sp)
+            products = self._products(latest, existing)
+
+            to_create, to_update = [], []
+            for key, card in latest.items():
+                store_price = existing.get(key)
+                if store_price is None:
+                    store_price = StorePrice(product=products[key[0]], store_name=key[1], is_provisional=True)
+                    to_create.append(store_price)
+                elif store_price.is_provisional:
+                    to_update.append(store_price)
+                else:
+                    continue
+                store_price.current_price = self._price(card)
+                store_price.product_url = card["url"]
+                store_price.image_url = card.get("image_url") or None
+                store_price.is_available = card.get("is_available", True)
+                store_price.last_seen = now
+
+            if to_create:
+                StorePrice.objects.bulk_create(to_create, ignore_conflicts=True)
+            if to_update:
+                StorePrice.objects.bulk_update(to_update, ["current_price", "product_url", "image_url", "is_available", "last_seen"])
+            ProductAggregates.mark_dirty({sp.product_id for sp in to_create + to_update})
+
+        logger.info(f"Ingestion: {len(to_create)} provisional listings created, {len(to_update)} refreshed from search cards.")
+        return [products[card["name"]] if self._is_card(card) else None for card in chunk]
+
+    @staticmethod
+    def _key(data: Dict[str, Any]) -> Tuple[str, str]:
+        return (data["name"], data["store"])
+
+    @staticmethod
+    def _price(data: Dict[str, Any]) -> Optional[Decimal]:
+        """
+        The scraped price as a positive 2dp Decimal, or None when the page had none.
+        Quantized up front so the signed value is the one the database returns.
+        """
+        try:
+            price = Decimal(str(data.get("price")))
+        except (InvalidOperation, TypeError, ValueError):
+            return None
+        if not price.is_finite() or price <= 0:
+            return None
+        return price.quantize(Decimal("0.01"))
+
+    @classmethod
+    def _writable(cls, data: Dict[str, Any]) -> bool:
+        """A successful scrape with both a title and a price; anything less must not touch the listing."""
+        return bool(data.get("success") and data.get("name") and cls._price(data) is not None)
+
+    @classmethod
+    def _is_card(cls, card: Dict[str, Any]) -> bool:
+        """A search card with the name, URL and price a provisional listing needs."""
+        return bool(card.get("name") and card.get("url") and cls._price(card) is not None)
+
+    def _write_chunk(self, chunk: List[Dict[str, Any]]) -> List[Tuple[Optional[Product], bool]]:
+        from apps.scraper.services.services import ScraperService
+
+        # Last result wins when one listing appears twice in a chunk
+        latest: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        partial, failed = [], 0
+        for data in chunk:
+            if self._writable(data):
+                latest[self._key(data)] = data
+            elif data.get("success"):
+                partial.append(data.get("url"))
+            else:
+                failed += 1
+        if partial:
+            # A page without a title or price confirms nothing: no 0.00 price, no history row, no alerts
+            logger.warning(f"Ingestion: Skipping {len(partial)} partial scrapes: {partial[:5]}")
+        self.stats["partial"] += len(partial)
+        self.stats["skipped"] += failed
+        if not latest:
+            return [(None, False)] * len(chunk)
+
+        fingerprints = {key: ScraperService.content_fingerprint(data) for key, data in latest.items()}
+        now = timezone.now()
+        changed: Dict[Tuple[str, str], bool] = {}
+
+        with transaction.atomic():
+            existing = {
+                (sp.product.name, sp.store_name): sp
+                for sp in StorePrice.objects.select_related("product")
+                .filter(product__name__in={name for name, _ in latest}, store_name__in={store for _, store in latest})
+            }
+            self._claim_provisional(latest, existing)
+            products = self._products(latest, existing)
+
+            unchanged_pks, to_update, to_create, previous = [], [], [], {}
+            for key, data in latest.items():
+                store_price = existing.get(key)
+                if (store_price is not None and not store_price.is_provisional
+                        and store_price.content_fingerprint == fingerprints[key]):
+                    unchanged_pks.append(store_price.pk)
+                    changed[key] = False
+                    continue
+
+                changed[key] = True
+                if store_price is None:
+                    store_price = StorePrice(product=products[key[0]], store_name=key[1])
+                    to_create.append(store_price)
+                else:
+                    previous[store_price.pk] = store_price.current_price
+                    to_update.append(store_price)
+                self._apply(store_price, data, fingerprints[key], now)
+
+            if unchanged_pks:
+                StorePrice.objects.filter(pk__in=unchanged_pks).update(last_seen=now)
+
+            conflicts = 0
+            if to_create:
+                StorePrice.objects.bulk_create(to_create, ignore_conflicts=True)
+                # PKs are not returned on every backend (and not for ignored conflicts): re-read them
+                created = {
+                    (sp.product_id, sp.store_name): sp
+                    for sp in StorePrice.objects.filter(
+                        product_id__in={sp.product_id for sp in to_create},
+                        store_name__in={sp.store_name for sp in to_create},
+                    )
+                }
+                for store_price in to_create:
+                    stored = created[(store_price.product_id, store_price.store_name)]
+                    store_price.pk = stored.pk
+                    if stored.content_fingerprint != store_price.content_fingerprint:
+                        # A concurrent writer inserted the listing first: update it instead. bulk_create's
+                        # auto_now moved last_updated on our copy, so sign again with the value we write
+                        previous[stored.pk] = stored.current_price
+                        conflicts += 1
+                        self._sign(store_price, now)
+                    else:
+                        # auto_now replaced last_updated on insert; re-hash so integrity_check holds
+                        self._sign(store_price, stored.last_updated)
+                    to_update.append(store_price)
+
+            if to_update:
+                StorePrice.objects.bulk_update(to_update, self.UPDATE_FIELDS)
+
+            written = list({sp.pk: sp for sp in to_create + to_update}.values())
+            # Previous prices are already known here, so the history insert needs no lookups;
+            # alerts go out once per chunk below
+            PriceHistory.objects.record_many(
+                [(sp, sp.current_price) for sp in written],
+                previous={sp.pk: previous.get(sp.pk) for sp in written},
+                dispatch_alerts=False,
+            )
+            # Lowest price / trend / search vector: once per product per debounce window
+            ProductAggregates.mark_dirty({sp.product_id for sp in written})
+
+        touched = unchanged_pks + [sp.pk for sp in written]
+        if touched:
+            RefreshScheduler.reschedule(touched)
+
+        changed_products = sorted({products[name].pk for (name, _), is_changed in changed.items() if is_changed})
+        if changed_products:
+            # One alert-evaluation message per chunk instead of one per history row
+            from apps.scraper.tasks import check_alerts_batch_task
+            check_alerts_batch_task.delay(changed_products)
+
+        n_changed = sum(changed.values())
+        n_created = len(to_create) - conflicts
+        self.stats["created"] += n_created
+        self.stats["changed"] += n_changed - n_created
+        self.stats["unchanged"] += len(unchanged_pks)
+        logger.info(f"Ingestion: {n_changed} written ({n_created} new), {len(unchanged_pks)} heartbeat only, chunk of {len(chunk)}.")
+
+        return [
+            (products[self._key(data)[0]], changed[self._key(data)]) if self._writable(data) else (None, False)
+            for data in chunk
+        ]
+
+    # --- Steps ---
+
+    @staticmethod
+    def _apply(store_price: StorePrice, data: Dict[str, Any], fingerprint: str, now) -> None:
+        """Copies a scrape onto the listing."""
+        store_price.current_price = IngestionWriter._price(data)
+        store_price.product_url = data["url"]
+        store_price.image_url = data.get("image_url") or None
+        # Same rule as the search cards, so a confirming detail scrape keeps an out-of-stock listing out of stock
+        store_price.is_available = StoreSelector.is_available(data.get("availability"))
+        store_price.content_fingerprint = fingerprint
+        store_price.last_seen = now
+        store_price.is_provisional = False
+        IngestionWriter._sign(store_price, now)
+
+    @staticmethod
+    def _sign(store_price: StorePrice, last_updated) -> None:
+        """StorePrice.integrity_check's hash, computed against the last_updated the row is stored with."""
+        store_price.last_updated = last_updated
+        raw_string = f"{store_price.current_price}-{store_price.store_name}-{last_updated.isoformat()}-{settings.SECRET_KEY}"
+        store_price.price_hash = hashlib.sha256(raw_string.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _claim_provisional(latest: Dict[Tuple[str, str], Dict[str, Any]], existing: Dict[Tuple[str, str], StorePrice]) -> None:
+        """
+        Points detail scrapes at the listing they confirm: by "store_price_id" when
+        the scrape was queued for a provisional listing, otherwise by a provisional
+        listing with the same URL and store. Without this a detail title that differs
+        from the card title creates a second product and the card price never clears.
+        """
+        pinned = {data["store_price_id"]: key for key, data in latest.items() if data.get("store_price_id")}
+        if pinned:
+            for sp in StorePrice.objects.select_related("product").filter(pk__in=list(pinned)):
+                if sp.store_name == pinned[sp.pk][1]:
+                    existing[pinned[sp.pk]] = sp
+
+        by_url = {(data["url"], key[1]): key for key, data in latest.items() if key not in existing}
+        if by_url:
+            for sp in StorePrice.objects.select_related("product").filter(
+                is_provisional=True,
+                product_url__in={url for url, _ in by_url},
+                store_name__in={store for _, store in by_url},
+            ):
+                key = by_url.get((sp.product_url, sp.store_name))
+                if key is not None:
+                    existing.setdefault(key, sp)
+
+    @staticmethod
+    def _products(latest: Dict[Tuple[str, str], Dict[str, Any]], existing: Dict[Tuple[str, str], StorePrice]) -> Dict[str, Product]:
+        """Product per name: from the listing lookup, one query for the rest, bulk_create for new names."""
+        products = {name: sp.product for (name, _), sp in existing.items()}
+        missing = {name for name, _ in latest} - products.keys()
+        if missing:
+            for product in Product.objects.filter(name__in=missing).order_by("pk"):
+                products.setdefault(product.name, product)
+            missing -= products.keys()
+        if not missing:
+            return products
+
+        # Product.save() probes slug candidates one query at a time; here one query covers the chunk
+        bases = {name: slugify(name)[:280] or "product" for name in missing}
+        taken = set(Product.objects.filter(slug__in=set(bases.values())).values_list("slug", flat=True))
+        new_products = []
+        for name, base in bases.items():
+            slug = base if base not in taken else f"{base}-{uuid.uuid4().hex[:8]}"
+            taken.add(slug)
+            new_products.append(Product(name=name, slug=slug, sku=str(uuid.uuid4())[:8].upper()))
+        Product.objects.bulk_create(new_products)
+
+        by_slug = {p.slug: p for p in Product.objects.filter(slug__in=[p.slug for p in new_products])}
+        for product in new_products:
+            products[product.name] = by_slug.get(product.slug, product)
+        return products
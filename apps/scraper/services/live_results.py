@@ -0,0 +1,211 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis
+    import redis.asyncio as aioredis
+except ImportError:  # pragma: no cover - the cache-polling fallback covers this
+    redis = None
+    aioredis = None
+
+class SearchStream:
+    """
+    Live Search Result Channel.
+    One stream per dashboard search. The search and extraction tasks publish
+    per-store events into an ordered log in the shared cache, and the SSE view
+    reads that log from where the browser left off (Last-Event-ID). When Redis
+    is configured, a pub/sub message wakes the reader as soon as an event lands;
+    otherwise it polls the cache, which still keeps the load off the database.
+    Under WSGI (no long-lived streams) the view answers with one `listen(wait=0)`
+    pass per request and EventSource reconnects with Last-Event-ID.
+    """
+
+    KEY_PREFIX = "search_stream"
+    POLL_INTERVAL = 0.5
+    HEARTBEAT = 15.0
+
+    _publisher = None
+
+    # --- Configuration ---
+
+    @staticmethod
+    def _settings() -> Dict[str, Any]:
+        return {
+            "ttl": int(getattr(settings, 'SCRAPER_STREAM_TTL', 600)),
+            "timeout": float(getattr(settings, 'SCRAPER_STREAM_TIMEOUT', 120)),
+            "redis_url": getattr(settings, 'SCRAPER_STREAM_REDIS_URL', None),
+        }
+
+    @classmethod
+    def _key(cls, stream_id: str, suffix: str) -> str:
+        return f"{cls.KEY_PREFIX}:{stream_id}:{suffix}"
+
+    @classmethod
+    def channel(cls, stream_id: str) -> str:
+        return f"{cls.KEY_PREFIX}:{stream_id}"
+
+    @classmethod
+    def _redis(cls):
+        url = cls._settings()["redis_url"]
+        if not url or redis is None:
+            return None
+        if cls._publisher is None:
+            cls._publisher = redis.Redis.from_url(url)
+        return cls._publisher
+
+    # --- Publishing (Celery side) ---
+
+    @classmethod
+    def open(cls, query: str, stores: List[str], user_id: Optional[int] = None) -> str:
+        """Registers a new stream and returns its id (handed to the search task and the browser)."""
+        stream_id = uuid.uuid4().hex
+        ttl = cls._settings()["ttl"]
+        meta = {"query": query, "stores": list(stores), "user_id": user_id, "viewers": [user_id], "opened_at": time.time()}
+        cache.set(cls._key(stream_id, "meta"), meta, ttl)
+        cache.set(cls._key(stream_id, "seq"), 0, ttl)
+        return stream_id
+
+    @classmethod
+    def meta(cls, stream_id: str) -> Optional[Dict[str, Any]]:
+        return cache.get(cls._key(stream_id, "meta"))
+
+    @classmethod
+    def share(cls, stream_id: str, user_id: Optional[int]) -> bool:
+        """Lets another user follow a live search already running for the same query. False if it expired."""
+        meta = cls.meta(stream_id)
+        if meta is None:
+            return False
+        viewers = meta.setdefault("viewers", [meta.get("user_id")])
+        if user_id not in viewers:
+            viewers.append(user_id)
+            cache.set(cls._key(stream_id, "meta"), meta, cls._settings()["ttl"])
+        return True
+
+    @staticmethod
+    def can_view(meta: Dict[str, Any], user_id: Optional[int]) -> bool:
+        return user_id in meta.get("viewers", [meta.get("user_id")])
+
+    @classmethod
+    def publish(cls, stream_id: Optional[str], event: str, data: Dict[str, Any]) -> None:
+        """
+        Appends an event to the stream's log and wakes its readers.
+        A no-op without a stream id; never raises, so a closed browser tab
+        cannot fail a scrape.
+        """
+        if not stream_id:
+            return
+        ttl = cls._settings()["ttl"]
+        try:
+            seq = cache.incr(cls._key(stream_id, "seq"))
+        except ValueError:
+            # Stream expired or never opened: nobody is listening
+            return
+        try:
+            cache.set(cls._key(stream_id, seq), {"seq": seq, "event": event, "data": data}, ttl)
+            client = cls._redis()
+            if client is not None:
+                client.publish(cls.channel(stream_id), seq)
+        except Exception as e:
+            logger.debug(f"SearchStream: Could not publish {event} to {stream_id}: {e}")
+
+    # --- Reading (view side) ---
+
+    @classmethod
+    async def read(cls, stream_id: str, after: int) -> List[Dict[str, Any]]:
+        """Events with seq > after, in order."""
+        latest = await cache.aget(cls._key(stream_id, "seq"))
+        if not latest or latest <= after:
+            return []
+        keys = [cls._key(stream_id, seq) for seq in range(after + 1, latest + 1)]
+        found = await cache.aget_many(keys)
+        # A slot can be missing for a moment between incr and set; stop there and pick it up next round
+        events = []
+        for key in keys:
+            if key not in found:
+                break
+            events.append(found[key])
+        return events
+
+    @classmethod
+    async def listen(cls, stream_id: str, resume_after: int = 0, wait: float = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yields events as they arrive, plus a heartbeat when idle, and a final
+        `done` once every store reported and its extractions settled (or on timeout).
+        On reconnect, events up to `resume_after` are replayed into the
+        bookkeeping but not sent again. With `wait`, gives up (without `done`)
+        after that many seconds; `wait=0` is a single read pass.
+        """
+        meta = await cache.aget(cls._key(stream_id, "meta")) or {}
+        stores_left = set(meta.get("stores", []))
+        pending = 0
+        after = 0
+        # Counted from when the search started, so reconnects do not extend it
+        deadline = meta.get("opened_at", time.time()) + cls._settings()["timeout"]
+        last_sent = time.monotonic()
+        poll_until = time.monotonic() + wait if wait is not None else None
+
+        client = pubsub = None
+        url = cls._settings()["redis_url"]
+        if url and aioredis is not None and poll_until is None:
+            try:
+                client = aioredis.Redis.from_url(url)
+                pubsub = client.pubsub()
+                await pubsub.subscribe(cls.channel(stream_id))
+            except Exception as e:
+                logger.debug(f"SearchStream: Redis pub/sub unavailable ({e}); polling the cache.")
+                pubsub = None
+
+        try:
+            while True:
+                for event in await cls.read(stream_id, after):
+                    after = event["seq"]
+                    data = event["data"]
+                    if event["event"] == "store" and data.get("final", True):
+                        stores_left.discard(data.get("store"))
+                    pending += int(data.get("extractions", 0)) - int(data.get("settled", 0))
+                    if after > resume_after:
+                        last_sent = time.monotonic()
+                        yield event
+
+                if not stores_left and pending <= 0:
+                    yield {"seq": after, "event": "done", "data": {"timed_out": False}}
+                    return
+                if time.time() > deadline:
+                    yield {"seq": after, "event": "done", "data": {"timed_out": True, "stores_pending": sorted(stores_left)}}
+                    return
+                if poll_until is not None and time.monotonic() >= poll_until:
+                    return
+                if time.monotonic() - last_sent > cls.HEARTBEAT:
+                    last_sent = time.monotonic()
+                    yield {"seq": after, "event": "heartbeat", "data": {}}
+
+                if pubsub is not None:
+                    await pubsub.get_message(ignore_subscribe_messages=True, timeout=cls.POLL_INTERVAL * 4)
+                else:
+                    await asyncio.sleep(cls.POLL_INTERVAL)
+        finally:
+            if client is not None:
+                try:
+                    if pubsub is not None:
+                        await pubsub.unsubscribe(cls.channel(stream_id))
+                        await pubsub.aclose()
+                    await client.aclose()
+                except Exception:
+                    pass
+
+    @staticmethod
+    def format_sse(event: Dict[str, Any]) -> str:
+        """One Server-Sent Events frame; heartbeats are comments so clients ignore them."""
+        if event["event"] == "heartbeat":
+            return ": heartbeat\n\n"
+        payload = json.dumps(event["data"], default=str)
+        return f"id: {event['seq']}\nevent: {event['event']}\ndata: {payload}\n\n"
@@ -42,12 +42,13 @@ def get_coordinated_data(search_query: str) -> List[Dict[str, Any]]:
                 "url": price.product_url,
                 "image": price.image_url,
                 "available": price.is_available,
-                "last_updated": price.last_updated
+                "last_updated": price.last_checked
             })
             
             # 2. Check Staleness
             # Logic: If data is older than 6 hours, re-scrape.
-            if price.last_updated < six_hours_ago:
+            # Unchanged scrapes only bump last_seen, so use whichever is newer
+            if price.last_checked < six_hours_ago:
                 # 3. Trigger Background Scrape
                 # We use threading to not block the user response.
                 run_scraper_async(price.product_url, price.store_name)
@@ -148,3 +148,67 @@ class MarketStabilityEngine:
             return "Normal market fluctuations observed."
         return "Price is stable."
 
+
+class ScraperMetrics:
+    """
+    Lightweight Scraper Telemetry.
+    Aggregates count/total/max per metric and label in the shared Django cache,
+    so every worker process reports into the same numbers.
+    """
+
+    KEY_PREFIX = "scraper_metrics"
+    INDEX_KEY = f"{KEY_PREFIX}:index"
+    TTL = 60 * 60 * 24
+
+    @staticmethod
+    def _key(metric: str, label: str = None) -> str:
+        return f"{ScraperMetrics.KEY_PREFIX}:{metric}:{label or '_'}"
+
+    @staticmethod
+    def observe(metric: str, value: float, label: str = None) -> None:
+        """
+        Records one observation (e.g. a latency in seconds).
+        Telemetry must never break a scrape, so cache errors are swallowed.
+        """
+        from django.core.cache import cache
+
+        key = ScraperMetrics._key(metric, label)
+        try:
+            bucket = cache.get(key) or {"count": 0, "total": 0.0, "max": 0.0, "last": 0.0}
+            bucket["count"] += 1
+            bucket["total"] += float(value)
+            bucket["max"] = max(bucket["max"], float(value))
+            bucket["last"] = float(value)
+            cache.set(key, bucket, ScraperMetrics.TTL)
+
+            index = cache.get(ScraperMetrics.INDEX_KEY) or []
+            if key not in index:
+                index.append(key)
+                cache.set(ScraperMetrics.INDEX_KEY, index, ScraperMetrics.TTL)
+        except Exception:
+            pass
+
+    @staticmethod
+    def increment(metric: str, label: str = None) -> None:
+        """Counter shorthand: an observation of value 1."""
+        ScraperMetrics.observe(metric, 1, label)
+
+    @staticmethod
+    def snapshot(prefix: str = "") -> Dict[str, Dict[str, float]]:
+        """
+        Returns {"metric:label": {count, total, max, last, avg}} for every
+        recorded metric whose name starts with `prefix`.
+        """
+        from django.core.cache import cache
+
+        report = {}
+        for key in cache.get(ScraperMetrics.INDEX_KEY) or []:
+            name = key[len(ScraperMetrics.KEY_PREFIX) + 1:]
+            if not name.startswith(prefix):
+                continue
+            bucket = cache.get(key)
+            if not bucket:
+                continue
+            bucket["avg"] = bucket["total"] / bucket["count"] if bucket["count"] else 0.0
+            report[name] = bucket
+        return report
@@ -0,0 +1,260 @@
+import gzip
+import hashlib
+import json
+import logging
+import statistics
+import threading
+import time
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+class FixtureCorpus:
+    """
+    Recorded-HTML Fixture Corpus.
+    Stores gzip-compressed page snapshots under `<root>/<store>/<sha1>.html.gz`
+    with a JSON sidecar holding the URL, capture time and the expected fields.
+    Expected values only count as an accuracy baseline when they come from a
+    source independent of the parser under test: `labelled` is "browser" (the
+    live DOM's extract_fields at capture) or "manual" (filled in by hand).
+    Passive captures from live scrapes are unlabelled and only timed in replays.
+    """
+
+    FIELDS = ("title", "price", "image_url", "availability")
+    LABEL_SOURCES = ("browser", "manual")
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = Path(root or getattr(settings, 'SCRAPER_FIXTURE_DIR', 'fixtures/pages'))
+
+    @staticmethod
+    def capture_enabled() -> bool:
+        return bool(getattr(settings, 'SCRAPER_CAPTURE_FIXTURES', False))
+
+    @staticmethod
+    def fixture_id(url: str) -> str:
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+    # --- Capture ---
+
+    @classmethod
+    def is_labelled(cls, entry: Dict[str, Any]) -> bool:
+        return entry.get("labelled") in cls.LABEL_SOURCES
+
+    def _meta_path(self, url: str, store_name: str) -> Path:
+        return self.root / store_name / f"{self.fixture_id(url)}.json"
+
+    def capture(self, url: str, html: str, store_name: str, expected: Optional[Dict[str, Any]] = None,
+                tier: str = None, labelled: Optional[str] = None) -> Path:
+        """
+        Writes (or overwrites) the snapshot for `url` and returns the HTML path.
+        `expected` is stored as the baseline only with a `labelled` source.
+        """
+        fixture_id = self.fixture_id(url)
+        directory = self.root / store_name
+        directory.mkdir(parents=True, exist_ok=True)
+        if labelled not in self.LABEL_SOURCES:
+            expected, labelled = None, None
+
+        html_path = directory / f"{fixture_id}.html.gz"
+        with gzip.open(html_path, "wt", encoding="utf-8") as fh:
+            fh.write(html)
+
+        expected = expected or {}
+        meta = {
+            "id": fixture_id,
+            "url": url,
+            "store": store_name,
+            "tier": tier,
+            "captured_at": datetime.now().isoformat(),
+            "bytes": len(html.encode("utf-8")),
+            "labelled": labelled,
+            "expected": {field: self._serialize(expected.get(field)) for field in self.FIELDS},
+        }
+        (directory / f"{fixture_id}.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+        logger.info(f"FixtureCorpus: Captured {url} -> {html_path}")
+        return html_path
+
+    def capture_safely(self, url: str, html: str, store_name: str, tier: str = None) -> None:
+        """
+        Passive capture hook for live scrapes: a full disk must never fail a scrape.
+        Captures are unlabelled, and a labelled fixture is never overwritten.
+        """
+        if not html or not self.capture_enabled():
+            return
+        try:
+            meta_path = self._meta_path(url, store_name)
+            if meta_path.exists() and self.is_labelled(json.loads(meta_path.read_text(encoding="utf-8"))):
+                return
+            self.capture(url, html, store_name, tier=tier)
+        except Exception as e:
+            logger.warning(f"FixtureCorpus: Capture failed for {url}: {e}")
+
+    @staticmethod
+    def _serialize(value: Any) -> Any:
+        return str(value) if isinstance(value, Decimal) else value
+
+    # --- Replay ---
+
+    def entries(self, store_name: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        if not self.root.exists():
+            return
+        for meta_path in sorted(self.root.glob("*/*.json")):
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            if store_name and meta.get("store", "").lower() != store_name.lower():
+                continue
+            meta["html_path"] = str(meta_path.with_name(f"{meta['id']}.html.gz"))
+            yield meta
+
+    @staticmethod
+    def load_html(entry: Dict[str, Any]) -> str:
+        with gzip.open(entry["html_path"], "rt", encoding="utf-8") as fh:
+            return fh.read()
+
+class ReplayServer:
+    """
+    Local HTTP stand-in that serves corpus snapshots to a real browser, so the
+    Selenium extraction path can be benchmarked without touching live stores.
+    `with ReplayServer(corpus) as server: driver.get(server.url_for(entry))`
+    """
+
+    def __init__(self, corpus: FixtureCorpus, host: str = "127.0.0.1", port: int = 0):
+        self.corpus = corpus
+        self.host = host
+        self.port = port
+        self._pages: Dict[str, str] = {}
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def url_for(self, entry: Dict[str, Any]) -> str:
+        return f"http://{self.host}:{self.port}/replay/{entry['store']}/{entry['id']}"
+
+    def __enter__(self):
+        for entry in self.corpus.entries():
+            self._pages[f"/replay/{entry['store']}/{entry['id']}"] = entry["html_path"]
+
+        pages = self._pages
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = pages.get(self.path.split("?")[0])
+                if path is None:
+                    self.send_error(404)
+                    return
+                with gzip.open(path, "rb") as fh:
+                    body = fh.read()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, name="replay-server", daemon=True).start()
+        logger.info(f"ReplayServer: Serving {len(self._pages)} fixtures on {self.host}:{self.port}")
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+class ReplayBenchmark:
+    """
+    Offline Extraction Benchmark.
+    Replays the corpus through the offline parser (per selector set) or a real
+    browser, and reports pages/sec, p50/p95 extraction latency and per-field
+    accuracy against the labelled fixtures. Unlabelled fixtures are timed but
+    never scored: their values came from the parser being measured.
+    """
+
+    def __init__(self, corpus: FixtureCorpus):
+        self.corpus = corpus
+
+    # --- Selector sets ---
+
+    @staticmethod
+    def selector_sets(store_name: str) -> Dict[str, Dict[str, List[str]]]:
+        from apps.scraper.selectors import StoreSelector, SelectorRegistry
+        primary = StoreSelector.primary(store_name)
+        return {
+            "primary": {field: [primary[field]] for field in StoreSelector.FIELDS if primary.get(field)},
+            "fallbacks": {field: StoreSelector.candidates(store_name, field) for field in StoreSelector.FIELDS},
+            "adaptive": {field: SelectorRegistry.ordered(store_name, field) for field in StoreSelector.FIELDS},
+        }
+
+    # --- Scoring ---
+
+    @staticmethod
+    def _matches(field: str, got: Any, expected: Any) -> bool:
+        if field == "price":
+            try:
+                return Decimal(str(got)) == Decimal(str(expected))
+            except (InvalidOperation, TypeError):
+                return False
+        return (got or None) == (expected or None)
+
+    @staticmethod
+    def _baseline(entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Expected fields of a labelled fixture; {} keeps an unlabelled one out of the accuracy."""
+        return entry["expected"] if FixtureCorpus.is_labelled(entry) else {}
+
+    def _summarize(self, samples: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+        latencies = sorted(sample["latency"] for sample in samples)
+        labelled = [s for s in samples if s["expected"]]
+        accuracy = {}
+        for field in FixtureCorpus.FIELDS:
+            scored = [s for s in labelled if s["expected"].get(field) is not None]
+            if scored:
+                hits = sum(self._matches(field, s["fields"].get(field), s["expected"][field]) for s in scored)
+                accuracy[field] = hits / len(scored)
+        return {
+            "pages": len(samples),
+            "labelled": len(labelled),
+            "pages_per_sec": len(samples) / elapsed if elapsed else 0.0,
+            "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+            "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000 if latencies else 0.0,
+            "accuracy": accuracy,
+        }
+
+    # --- Runners ---
+
+    def run_parser(self, store_name: str, repeat: int = 1) -> Dict[str, Dict[str, Any]]:
+        """Offline parser, once per selector set. Returns {selector_set: summary}."""
+        from apps.scraper.utils.parsers import parse_product_html
+
+        entries = [(entry, self.corpus.load_html(entry)) for entry in self.corpus.entries(store_name)]
+        report = {}
+        for set_name, selectors in self.selector_sets(store_name).items():
+            samples = []
+            started = time.perf_counter()
+            for _ in range(repeat):
+                for entry, html in entries:
+                    t0 = time.perf_counter()
+                    parsed = parse_product_html(html, store_name, selectors=selectors)
+                    samples.append({"latency": time.perf_counter() - t0, "fields": parsed, "expected": self._baseline(entry)})
+            report[set_name] = self._summarize(samples, time.perf_counter() - started)
+        return report
+
+    def run_browser(self, store_name: str, scraper_class, repeat: int = 1) -> Dict[str, Dict[str, Any]]:
+        """Real browser against the ReplayServer, through the scraper's extract_fields()."""
+        entries = list(self.corpus.entries(store_name))
+        samples = []
+        with ReplayServer(self.corpus) as server, scraper_class() as scraper:
+            started = time.perf_counter()
+            for _ in range(repeat):
+                for entry in entries:
+                    t0 = time.perf_counter()
+                    scraper.driver.get(server.url_for(entry))
+                    fields = scraper.extract_fields()
+                    samples.append({"latency": time.perf_counter() - t0, "fields": fields, "expected": self._baseline(entry)})
+            elapsed = time.perf_counter() - started
+        return {"browser": self._summarize(samples, elapsed)}
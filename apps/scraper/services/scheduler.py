@@ -0,0 +1,134 @@
+import logging
+import math
+from datetime import timedelta
+from typing import Dict, Iterable, List, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from apps.scraper.models import PriceAlert, StorePrice, Watchlist
+
+logger = logging.getLogger(__name__)
+
+class RefreshScheduler:
+    """
+    Due-Time Freshness Scheduler.
+    Every StorePrice carries an indexed `next_refresh_at`. The interval shrinks
+    for volatile products (Product.metadata['volatility_index']), products with
+    many watchers/alerts and products a premium user follows, so scrape capacity
+    goes to the prices that move or matter. A Beat task claims due rows with
+    SELECT ... FOR UPDATE SKIP LOCKED, so concurrent dispatchers never double-claim.
+    """
+
+    # While a claimed row is being scraped it is not due again for this long
+    CLAIM_LEASE = timedelta(minutes=15)
+
+    @staticmethod
+    def _bounds() -> Tuple[float, float, float]:
+        """(base, min, max) refresh intervals in minutes."""
+        return (
+            float(getattr(settings, 'SCRAPER_REFRESH_BASE_MINUTES', 120)),
+            float(getattr(settings, 'SCRAPER_REFRESH_MIN_MINUTES', 10)),
+            float(getattr(settings, 'SCRAPER_REFRESH_MAX_MINUTES', 24 * 60)),
+        )
+
+    # --- Interval Model ---
+
+    @classmethod
+    def compute_interval(cls, volatility: float, watchers: int, alerts: int, premium: bool, available: bool = True) -> timedelta:
+        """
+        base / (1 + volatility/10) / (1 + log2(1 + watchers + alerts)) / (2 if premium),
+        clamped to [min, max]. Unavailable listings are checked at the max interval.
+        """
+        base, minimum, maximum = cls._bounds()
+        if not available:
+            return timedelta(minutes=maximum)
+
+        minutes = base
+        minutes /= 1 + max(float(volatility or 0), 0) / 10
+        minutes /= 1 + math.log2(1 + watchers + alerts)
+        if premium:
+            minutes /= 2
+        return timedelta(minutes=min(max(minutes, minimum), maximum))
+
+    @staticmethod
+    def _demand(store_prices: List[StorePrice]) -> Dict[int, Dict[str, int]]:
+        """Watcher, alert and premium counts per StorePrice, in three aggregate queries."""
+        product_ids = {sp.product_id for sp in store_prices}
+        urls = {sp.product_url for sp in store_prices}
+
+        watchers = dict(
+            Watchlist.objects.filter(product_id__in=product_ids)
+            .values_list("product_id").annotate(n=Count("id"))
+        )
+        premium_products = set(
+            Watchlist.objects.filter(product_id__in=product_ids, user__is_premium=True)
+            .values_list("product_id", flat=True)
+        )
+        alert_rows = (
+            PriceAlert.open_for_urls(urls)
+            .values("product_url")
+            .annotate(n=Count("id"), premium=Count("id", filter=Q(user__is_premium=True)))
+        )
+        alerts = {row["product_url"]: row for row in alert_rows}
+
+        demand = {}
+        for sp in store_prices:
+            alert = alerts.get(sp.product_url, {})
+            demand[sp.pk] = {
+                "watchers": watchers.get(sp.product_id, 0),
+                "alerts": alert.get("n", 0),
+                "premium": sp.product_id in premium_products or alert.get("premium", 0) > 0,
+            }
+        return demand
+
+    # --- Scheduling ---
+
+    @classmethod
+    def reschedule(cls, store_price_ids: Iterable[int]) -> int:
+        """Recomputes next_refresh_at for the given rows (after a scrape lands)."""
+        store_prices = list(
+            StorePrice.objects.filter(pk__in=list(store_price_ids))
+            .select_related("product")
+            .only("pk", "product_id", "product_url", "is_available", "product__metadata")
+        )
+        if not store_prices:
+            return 0
+
+        demand = cls._demand(store_prices)
+        now = timezone.now()
+        for sp in store_prices:
+            metadata = sp.product.metadata if isinstance(sp.product.metadata, dict) else {}
+            signals = demand[sp.pk]
+            sp.next_refresh_at = now + cls.compute_interval(
+                metadata.get("volatility_index", 0),
+                signals["watchers"],
+                signals["alerts"],
+                signals["premium"],
+                sp.is_available,
+            )
+        StorePrice.objects.bulk_update(store_prices, ["next_refresh_at"])
+        return len(store_prices)
+
+    @classmethod
+    def claim_due(cls, batch_size: int = 500) -> List[Tuple[int, str, str]]:
+        """
+        Claims up to `batch_size` due rows and leases them for CLAIM_LEASE.
+        Rows locked by a concurrent claimer are skipped, not waited on.
+        Provisional search-card prices are left alone until a user opens or watches them.
+        Returns [(store_price_id, product_url, store_name)].
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            due = list(
+                StorePrice.objects.select_for_update(skip_locked=True)
+                .filter(Q(next_refresh_at__lte=now) | Q(next_refresh_at__isnull=True), is_provisional=False)
+                .order_by(F("next_refresh_at").asc(nulls_first=True))
+                .values_list("pk", "product_url", "store_name")[:batch_size]
+            )
+            if due:
+                StorePrice.objects.filter(pk__in=[row[0] for row in due]).update(next_refresh_at=now + cls.CLAIM_LEASE)
+        logger.info(f"Freshness Scheduler: Claimed {len(due)} due prices.")
+        return due
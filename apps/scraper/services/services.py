@@ -1,12 +1,17 @@
 import logging
 import hashlib
-from typing import Dict, Optional, Any
+import json
+from typing import Dict, List, Optional, Any, Tuple
 from decimal import Decimal
-from datetime import datetime
 
 from apps.scraper.logic.amazon import AmazonScraper
 from apps.scraper.logic.flipkart import FlipkartScraper
 from apps.scraper.models import Product, StorePrice
+from apps.scraper.services.fetch_pipeline import TieredFetchPipeline
+from apps.scraper.services.single_flight import SingleFlight
+from apps.scraper.services.ingestion import IngestionWriter
+from apps.scraper.rate_limiter import RateLimited
+from apps.scraper.circuit_breaker import CircuitOpen, StoreCircuitBreaker
 
 logger = logging.getLogger(__name__)
 
@@ -34,9 +39,11 @@ class ScraperService:
         try:
             ScraperClass = self._get_scraper_class(store_name)
             
-            # Use Context Manager to ensure driver is handled correctly
-            with ScraperClass() as scraper:
-                data = scraper.scrape(url)
+            # HTTP-first: the browser (ScraperClass) is only used when the page needs it.
+            # Concurrent requests for the same product share one in-flight scrape.
+            data = SingleFlight.run(url, lambda: TieredFetchPipeline.fetch(url, store_name, ScraperClass))
+            logger.info(f"Scrape for {url} served by '{data.get('tier')}' tier"
+                        f"{' (coalesced)' if data.get('coalesced') else ''}.")
                 
             # Normalize keys if necessary (BaseScraper returns 'title', 'price', 'status')
             data["store"] = store_name
@@ -47,6 +54,9 @@ class ScraperService:
             
             return data
 
+        except (RateLimited, CircuitOpen):
+            # Domain budget exhausted or store paused: the calling task reschedules itself
+            raise
         except Exception as e:
             logger.exception(f"Error during scraping execution: {e}")
             return {
@@ -56,73 +66,114 @@ class ScraperService:
                 "error": str(e)
             }
 
+    def fetch_product_batch(self, urls: List[str], store_name: str) -> List[Dict[str, Any]]:
+        """
+        Batch counterpart of fetch_product_data for one store.
+        URLs not known to need the browser get the HTTP tier first; the rest share a
+        single leased browser through `scrape_many`. Returns one result per URL in
+        input order, each tagged like fetch_product_data (store/success/name/tier).
+        Raises CircuitOpen up front if the store is paused.
+        """
+        StoreCircuitBreaker.guard(store_name)
+        ScraperClass = self._get_scraper_class(store_name)
+        results: Dict[str, Dict[str, Any]] = {}
+        browser_urls = []
+
+        try:
+            for url in urls:
+                if TieredFetchPipeline.preferred_tier(url) == TieredFetchPipeline.TIER_BROWSER:
+                    browser_urls.append(url)
+                    continue
+                try:
+                    data = TieredFetchPipeline.fetch_http(url, store_name)
+                except RateLimited as e:
+                    data = {"url": url, "status": "deferred", "error": str(e), "retry_after": e.retry_after}
+                if data is None:
+                    browser_urls.append(url)
+                    continue
+                if data.get("status") == "success":
+                    TieredFetchPipeline.remember_tier(url, TieredFetchPipeline.TIER_HTTP)
+                results[url] = dict(data, tier=TieredFetchPipeline.TIER_HTTP)
+
+            if browser_urls:
+                try:
+                    with ScraperClass() as scraper:
+                        for data in scraper.scrape_many(browser_urls):
+                            if data.get("status") == "success":
+                                TieredFetchPipeline.remember_tier(data["url"], TieredFetchPipeline.TIER_BROWSER)
+                            results[data["url"]] = dict(data, tier=TieredFetchPipeline.TIER_BROWSER)
+                except (RateLimited, CircuitOpen) as e:
+                    # Raised by the per-URL scrape() fallback: the rest waits, the HTTP results stand
+                    for url in browser_urls:
+                        results.setdefault(url, {"url": url, "status": "deferred", "error": str(e), "retry_after": e.retry_after})
+                except Exception as e:
+                    # No tab, a driver that would not boot, a crash mid-batch: only the browser URLs
+                    # fail (and go through the per-URL retry), never the pages already fetched
+                    logger.error(f"Batch browser phase failed for {len(browser_urls)} {store_name} URLs: {e}")
+                    for url in browser_urls:
+                        results.setdefault(url, {"url": url, "status": "failed", "error": f"Browser phase failed: {e}"})
+        finally:
+            StoreCircuitBreaker.release_probe(store_name)
+
+        batch = []
+        for url in urls:
+            data = results[url]
+            data["store"] = store_name
+            data["success"] = data.get("status") == "success"
+            data["name"] = data.get("title")
+            batch.append(data)
+        logger.info(f"Batch scrape of {len(urls)} {store_name} URLs: "
+                    f"{sum(d['success'] for d in batch)} ok, {len(browser_urls)} via browser.")
+        return batch
+
+    @staticmethod
+    def content_fingerprint(data: Dict[str, Any]) -> str:
+        """
+        SHA-256 over the extracted fields that end up in the database.
+        Prices are normalised through Decimal so '1299' and '1299.00' match.
+        """
+        price = data.get("price")
+        try:
+            price = str(Decimal(str(price)).quantize(Decimal("0.01"))) if price is not None else None
+        except Exception:
+            price = str(price)
+        payload = {
+            "title": data.get("name") or data.get("title"),
+            "price": price,
+            "image_url": data.get("image_url") or "",
+            "availability": data.get("availability"),
+            "url": data.get("url"),
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
     def save_product(self, data: Dict[str, Any]) -> Optional[Product]:
         """
-        Saves the scraped data to the database using the new normalized schema.
+        Saves one scrape result through the bulk IngestionWriter (a chunk of one).
+        Scrapes whose content fingerprint matches the stored one only bump `last_seen`.
         """
         if not data.get("success"):
             logger.warning(f"Skipping save for failed scrape: {data.get('url')}")
             return None
-        
-        try:
-            # 1. Update/Create Product (Meta)
-            product, created = Product.objects.get_or_create(
-                name=data.get("name") or "Unknown Product",
-                defaults={
-                    "brand": "Unknown", # Needs logic or parsing
-                    "category": "Uncategorized"
-                }
-            )
-            
-            # 2. Update/Create StorePrice
-            # Ensure price is a Decimal
-            price_val = data.get("price")
-            if price_val is None:
-                 price_val = Decimal("0.00")
-
-            # Data Integrity Hash
-            # Hash = SHA256(price_str + timestamp_str + secret_salt)
-            timestamp = datetime.now().isoformat()
-            raw_data = f"{price_val}{timestamp}{'SUPER_SECRET_SALT'}"
-            price_hash = hashlib.sha256(raw_data.encode()).hexdigest()
-
-            price_obj, price_created = StorePrice.objects.update_or_create(
-                product=product,
-                store_name=data["store"],
-                defaults={
-                    "current_price": price_val,
-                    "product_url": data["url"],
-                    "image_url": data.get("image_url", ""), # BaseScraper might not extract image yet, handled in cleanup
-                    "is_available": True,
-                    "price_hash": price_hash
-                }
-            )
-            # 3. Create PriceHistory with Signature
-            # Import strictly here or top level
-            from apps.scraper.models import PriceHistory
-            from apps.scraper.security_utils import generate_signature
-            from django.conf import settings
-            
-            # Data to sign (Deterministic for verification)
-            history_data = {
-                'price': str(price_val),
-                'currency': 'INR'
-            }
-            signature = generate_signature(settings.SECRET_KEY, history_data)
-            
-            PriceHistory.objects.create(
-                store_price=price_obj,
-                price=price_val,
-                currency='INR',
-                data_signature=signature
-            )
-
+        product, _ = IngestionWriter().write([data])[0]
+        if product is not None:
             logger.info(f"Product saved successfully: {product.name}")
-            return product
-            
-        except Exception as e:
-            logger.error(f"Failed to save product data: {e}")
-            return None
+        return product
+
+    def save_products(self, batch: List[Dict[str, Any]]) -> List[Tuple[Optional[Product], bool]]:
+        """
+        Bulk save for batch scrapes via the IngestionWriter: a fixed number of
+        queries per chunk, unchanged pages settled with one heartbeat UPDATE.
+        Returns (product, changed) per input row; product is None for failures.
+        """
+        return IngestionWriter().write(batch)
+
+    def save_search_results(self, items: List[Dict[str, Any]]) -> List[Optional[Product]]:
+        """
+        Provisional search-card writes via IngestionWriter.write_cards: no detail
+        scrape, no PriceHistory, no alerts. Returns the product per input card
+        (None for cards without a name, URL or price).
+        """
+        return IngestionWriter().write_cards(items)
 
     def search_products(self, query: str, store_name: str) -> list[Dict[str, Any]]:
         """
@@ -131,6 +182,7 @@ class ScraperService:
         logger.info(f"Searching for '{query}' on {store_name}")
         
         try:
+            StoreCircuitBreaker.guard(store_name)
             ScraperClass = self._get_scraper_class(store_name)
             
             with ScraperClass() as scraper:
@@ -143,6 +195,8 @@ class ScraperService:
             
             return results
 
+        except (RateLimited, CircuitOpen):
+            raise
         except Exception as e:
             logger.exception(f"Error during search execution on {store_name}: {e}")
             return []
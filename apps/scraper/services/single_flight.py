@@ -0,0 +1,105 @@
+import hashlib
+import logging
+import time
+import uuid
+from typing import Callable, Dict, Any, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    """
+    Single-Flight Scrape Coalescing.
+    Concurrent scrapes of the same product (keyed by `normalize_product_url`)
+    elect one leader through an atomic cache.add lock; everyone else waits for
+    the leader's result instead of loading the page again. Successful results
+    stay in a short-TTL cache so requests arriving right after are absorbed too.
+    """
+
+    KEY_PREFIX = "singleflight"
+    POLL_INTERVAL = 0.25
+    FAILURE_TTL = 5  # failed results are shared only long enough to release the waiters
+
+    @staticmethod
+    def _settings() -> Dict[str, float]:
+        return {
+            "result_ttl": float(getattr(settings, 'SCRAPER_SINGLEFLIGHT_RESULT_TTL', 60)),
+            "lock_ttl": float(getattr(settings, 'SCRAPER_SINGLEFLIGHT_LOCK_TTL', 180)),
+            "wait": float(getattr(settings, 'SCRAPER_SINGLEFLIGHT_WAIT', 90)),
+        }
+
+    @classmethod
+    def key(cls, url: str) -> str:
+        from apps.dashboard.utils import normalize_product_url
+        return hashlib.sha1(normalize_product_url(url).encode("utf-8")).hexdigest()
+
+    @classmethod
+    def _keys(cls, url: str):
+        key = cls.key(url)
+        return f"{cls.KEY_PREFIX}:lock:{key}", f"{cls.KEY_PREFIX}:result:{key}", f"{cls.KEY_PREFIX}:dispatch:{key}"
+
+    @staticmethod
+    def _metric(name: str) -> None:
+        from apps.scraper.services.metrics import ScraperMetrics
+        ScraperMetrics.increment(f"singleflight.{name}")
+
+    # --- Public API ---
+
+    @classmethod
+    def recent_result(cls, url: str) -> Optional[Dict[str, Any]]:
+        return cache.get(cls._keys(url)[1])
+
+    @classmethod
+    def in_flight(cls, url: str) -> bool:
+        return cache.get(cls._keys(url)[0]) is not None
+
+    @classmethod
+    def claim_dispatch(cls, url: str, ttl: float = None) -> bool:
+        """
+        Dispatch dedupe: True for the first caller per URL within `ttl` (defaults to
+        the lock TTL), False if a scrape is already queued, running or just finished.
+        """
+        lock_key, result_key, dispatch_key = cls._keys(url)
+        if cache.get(result_key) is not None or cache.get(lock_key) is not None:
+            return False
+        return cache.add(dispatch_key, 1, ttl or cls._settings()["lock_ttl"])
+
+    @classmethod
+    def run(cls, url: str, fn: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Returns fn()'s result, executing it at most once across the cluster for
+        concurrent callers of the same product. Exceptions raised by the leader
+        propagate to the leader only; waiters then retry the election.
+        """
+        config = cls._settings()
+        lock_key, result_key, dispatch_key = cls._keys(url)
+        deadline = time.monotonic() + config["wait"]
+
+        while True:
+            cached = cache.get(result_key)
+            if cached is not None:
+                cls._metric("coalesced")
+                return dict(cached, coalesced=True)
+
+            token = uuid.uuid4().hex
+            if cache.add(lock_key, token, config["lock_ttl"]):
+                cls._metric("leader")
+                try:
+                    result = fn()
+                    ttl = config["result_ttl"] if result.get("status") == "success" else cls.FAILURE_TTL
+                    cache.set(result_key, result, ttl)
+                    return result
+                finally:
+                    if cache.get(lock_key) == token:
+                        cache.delete(lock_key)
+                    cache.delete(dispatch_key)
+
+            # Follower: wait for the leader's result, or for its lock to lapse
+            while cache.get(lock_key) is not None and cache.get(result_key) is None:
+                if time.monotonic() > deadline:
+                    logger.warning(f"SingleFlight: Gave up waiting on in-flight scrape of {url}; scraping directly.")
+                    cls._metric("wait_timeout")
+                    return fn()
+                time.sleep(cls.POLL_INTERVAL)
@@ -0,0 +1,234 @@
+import hashlib
+import html
+import logging
+import random
+import threading
+import time
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+class StorefrontRouter:
+    """
+    Points the scrape pipeline at the fake storefront.
+    When SCRAPER_STOREFRONT_URL is set, real Amazon/Flipkart URLs are rewritten
+    to it right before the network call (after the security handshake), so the
+    database keeps real URLs while every fetch hits the local server. The SSRF
+    DNS check is only skipped for it when DEBUG is on.
+    """
+
+    @staticmethod
+    def base_url() -> str:
+        return (getattr(settings, 'SCRAPER_STOREFRONT_URL', '') or '').rstrip('/')
+
+    @classmethod
+    def skips_dns_check(cls) -> bool:
+        """True for a DEBUG load test, where the real store hosts are never contacted."""
+        return bool(cls.base_url()) and bool(getattr(settings, 'DEBUG', False))
+
+    @classmethod
+    def warn_if_enabled(cls) -> None:
+        """Startup warning: a storefront URL outside a load test is a misconfiguration."""
+        if not cls.base_url():
+            return
+        if cls.skips_dns_check():
+            logger.warning(f"StorefrontRouter: Scrapes go to {cls.base_url()} and the SSRF DNS check is OFF (DEBUG load test).")
+        else:
+            logger.warning(f"StorefrontRouter: Scrapes go to {cls.base_url()}; the SSRF DNS check stays on because DEBUG is off.")
+
+    @classmethod
+    def rewrite(cls, url: str) -> str:
+        base = cls.base_url()
+        if not base or not url or url.startswith(base):
+            return url
+        parsed = urlparse(url)
+        host = parsed.netloc.lower()
+        if "amazon" in host:
+            prefix = "/amazon"
+        elif "flipkart" in host:
+            prefix = "/flipkart"
+        else:
+            return url
+        query = f"?{parsed.query}" if parsed.query else ""
+        return f"{base}{prefix}{parsed.path}{query}"
+
+class FakeStorefront:
+    """
+    Local Fake Storefront for load tests.
+    Serves Amazon/Flipkart-style product and search pages with the markup
+    StoreSelector expects, plus robots.txt with a crawl-delay. Latency, 429/503
+    injection (with Retry-After) and price drift over time are configurable, so
+    the tasks can be driven end to end at 10k-100k URLs without touching real stores.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765,
+                 latency: Tuple[float, float] = (0.05, 0.3), error_rate: float = 0.0,
+                 retry_after: int = 5, crawl_delay: float = 0.5,
+                 price_period: int = 600, change_rate: float = 0.1,
+                 bot_wall_rate: float = 0.0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.crawl_delay = crawl_delay
+        self.price_period = price_period
+        self.change_rate = change_rate
+        self.bot_wall_rate = bot_wall_rate
+        self.stats: Dict[str, int] = {"requests": 0, "products": 0, "searches": 0, "errors": 0, "bot_walls": 0}
+        self._stats_lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    # --- Catalogue (deterministic per product id) ---
+
+    @staticmethod
+    def _rand(*parts) -> random.Random:
+        seed = hashlib.sha1(":".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+        return random.Random(int(seed[:16], 16))
+
+    def price_for(self, product_id: str, now: float = None) -> Decimal:
+        """Base price from the id; every `price_period` a `change_rate` share of products reprice."""
+        base = self._rand(product_id, "base").randint(499, 149999)
+        epoch = int((now or time.time()) // self.price_period)
+        for back in range(0, 50):
+            if self._rand(product_id, epoch - back, "change").random() < self.change_rate:
+                factor = 0.8 + 0.4 * self._rand(product_id, epoch - back, "factor").random()
+                return Decimal(int(base * factor))
+        return Decimal(base)
+
+    def product(self, store: str, product_id: str) -> Dict[str, Any]:
+        rng = self._rand(product_id, "meta")
+        brand = rng.choice(["Acme", "Zenith", "Nova", "Orbit", "Pulse"])
+        kind = rng.choice(["Phone", "Headphones", "Laptop", "Watch", "Speaker"])
+        return {
+            "id": product_id,
+            "title": f"{brand} {kind} {product_id}",
+            "price": self.price_for(product_id),
+            "available": rng.random() > 0.05,
+            "image": f"/static/fake/{product_id}.jpg",
+        }
+
+    # --- Markup ---
+
+    @staticmethod
+    def _format_price(price: Decimal) -> str:
+        return f"₹{int(price):,}"
+
+    def render_product(self, store: str, product_id: str) -> str:
+        p = self.product(store, product_id)
+        title, price = html.escape(p["title"]), self._format_price(p["price"])
+        if store == "amazon":
+            availability = "In stock" if p["available"] else "Currently unavailable."
+            body = (
+                f'<span id="productTitle">{title}</span>'
+                f'<div class="a-price"><span class="a-offscreen">{price}</span></div>'
+                f'<div id="imgTagWrapperId"><img id="landingImage" src="{p["image"]}" data-old-hires="{p["image"]}"></div>'
+                f'<div id="availability"><span>{availability}</span></div>'
+            )
+        else:
+            availability = "" if p["available"] else '<div class="_16FRp0">Sold Out</div>'
+            body = (
+                f'<h1><span class="B_NuCI">{title}</span></h1>'
+                f'<div class="_30jeq3 _16Jk6d">{price}</div>'
+                f'<img class="_396cs4 _2amPTt _3qGmMb" src="{p["image"]}">'
+                f'{availability}'
+            )
+        return f"<!DOCTYPE html><html><head><title>{title}</title></head><body>{body}</body></html>"
+
+    def render_search(self, store: str, query: str) -> str:
+        rng = self._rand(store, query, "search")
+        cards = []
+        for _ in range(10):
+            product_id = f"FS{rng.randint(0, 10 ** 8):08d}"
+            p = self.product(store, product_id)
+            title = html.escape(p["title"])
+            if store == "amazon":
+                cards.append(
+                    f'<div data-component-type="s-search-result"><h2>'
+                    f'<a class="a-link-normal" href="https://www.amazon.in/dp/{product_id}">{title}</a></h2>'
+                    f'<span class="a-price"><span class="a-offscreen">{self._format_price(p["price"])}</span></span></div>'
+                )
+            else:
+                cards.append(
+                    f'<div class="_1AtVbE"><a class="_1fQZEK" href="https://www.flipkart.com/item/p/{product_id}">'
+                    f'<div class="_4rR01T">{title}</div><div class="_30jeq3">{self._format_price(p["price"])}</div></a></div>'
+                )
+        return f"<!DOCTYPE html><html><body>{''.join(cards)}</body></html>"
+
+    def render_bot_wall(self, store: str) -> str:
+        from apps.scraper.selectors import StoreSelector
+        marker = html.escape(StoreSelector.bot_wall_markers(store)[0])
+        return f"<!DOCTYPE html><html><body><p>{marker}</p></body></html>"
+
+    # --- Server ---
+
+    def _count(self, key: str) -> None:
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def route(self, path: str) -> Tuple[int, Dict[str, str], str]:
+        """Returns (status, headers, body) for a request path, including injected faults."""
+        self._count("requests")
+        parsed = urlparse(path)
+
+        if parsed.path == "/robots.txt":
+            return 200, {"Content-Type": "text/plain"}, f"User-agent: *\nCrawl-delay: {self.crawl_delay}\nDisallow: /checkout\n"
+
+        time.sleep(random.uniform(*self.latency))
+        if self.error_rate and random.random() < self.error_rate:
+            self._count("errors")
+            status = random.choice([429, 503])
+            return status, {"Retry-After": str(self.retry_after), "Content-Type": "text/plain"}, "Slow down"
+
+        parts = [segment for segment in parsed.path.split("/") if segment]
+        if not parts or parts[0] not in ("amazon", "flipkart"):
+            return 404, {"Content-Type": "text/plain"}, "Not found"
+        store = parts[0]
+
+        if self.bot_wall_rate and random.random() < self.bot_wall_rate:
+            self._count("bot_walls")
+            return 200, {"Content-Type": "text/html; charset=utf-8"}, self.render_bot_wall(store)
+
+        if parts[1:2] in (["s"], ["search"]):
+            self._count("searches")
+            params = parse_qs(parsed.query)
+            query = (params.get("k") or params.get("q") or [""])[0]
+            return 200, {"Content-Type": "text/html; charset=utf-8"}, self.render_search(store, query)
+        if ("dp" in parts or "p" in parts) and len(parts) >= 3:
+            self._count("products")
+            return 200, {"Content-Type": "text/html; charset=utf-8"}, self.render_product(store, parts[-1])
+        return 404, {"Content-Type": "text/plain"}, "Not found"
+
+    def serve_forever(self) -> None:
+        storefront = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                status, headers, body = storefront.route(self.path)
+                payload = body.encode("utf-8")
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        logger.info(f"FakeStorefront: Serving on http://{self.host}:{self.port}")
+        self._server.serve_forever()
+
+    def shutdown(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
@@ -7,6 +7,8 @@ from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.by import By
 from fake_useragent import UserAgent
 
+from .utils.resource_policy import ResourcePolicy
+
 # Attempt to import webdriver_manager, but don't crash if missing (assuming local driver or managed env)
 try:
     from webdriver_manager.chrome import ChromeDriverManager
@@ -68,9 +70,10 @@ class SeleniumStealthDriver:
     """
 
     @staticmethod
-    def get_driver(headless=True):
+    def get_driver(headless=True, store_name=None):
         """
         Returns a configured Chrome WebDriver with Stealth settings.
+        `store_name` selects the resource blocklist installed on the new browser.
         """
         options = Options()
         ua = UserAgent()
@@ -101,6 +104,15 @@ class SeleniumStealthDriver:
         options.add_argument("--disable-webgl")
         options.add_argument("--disable-webrtc")
 
+        # Egress from the shared, health-scored proxy pool (credential-free proxies only)
+        from apps.scraper.proxy_pool import ProxyPool
+        proxy = ProxyPool.choose(store_name, browser=True)
+        if proxy:
+            options.add_argument(f"--proxy-server={proxy}")
+
+        # Skip images, fonts, media and third-party trackers (see ResourcePolicy)
+        ResourcePolicy.configure_options(options, proxy=proxy)
+
         try:
             if ChromeDriverManager:
                 service = Service(ChromeDriverManager().install())
@@ -118,6 +130,7 @@ class SeleniumStealthDriver:
                     });
                 """
             })
+            ResourcePolicy.apply(driver, store_name)
             
             return driver
             
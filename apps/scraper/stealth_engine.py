@@ -1,13 +1,20 @@
 import random
+import threading
 import time
 import requests
 import logging
 import urllib.robotparser
 from urllib.parse import urlparse
 from fake_useragent import UserAgent
+from django.conf import settings
+from django.core.cache import cache
 
 logger = logging.getLogger(__name__)
 
+class ScrapeException(Exception):
+    """Raised when a page was fetched but the expected product data could not be extracted."""
+    pass
+
 class HumanBehavior:
     """
     Simulates human-like interactions to evade detection.
@@ -99,40 +106,119 @@ class RobotsComplianceManager:
     """
     The "Robots.txt" Compliance Guardian.
     Ensures ethical crawling by respecting site-specific rules.
+
+    Parsed rules are shared process-wide and persisted in the Django cache, so
+    robots.txt is fetched once per domain per TTL across every worker rather
+    than once per scrape. Entries past their TTL are still served while a
+    single background refresh revalidates them (stale-while-revalidate).
     """
-    
-    def __init__(self):
-        self.parser = urllib.robotparser.RobotFileParser()
-        self.domain_cache = {} # Cache delay per domain
 
-    def get_crawl_delay(self, url: str) -> float:
+    DEFAULT_DELAY = 2.0 # Default Safe Buffer ("Professional Ethics")
+    FRESH_TTL = 60 * 60 * 6
+    STALE_TTL = 60 * 60 * 24 * 7
+    CACHE_PREFIX = "robots"
+
+    # base_url -> {"parser", "delay", "fetched_at"}; shared by every instance in the process
+    _rules = {}
+    _rules_lock = threading.Lock()
+
+    # --- Fetch & Parse ---
+
+    @classmethod
+    def _download(cls, base_url: str) -> dict:
         """
-        Fetches robots.txt and extracts Crawl-delay.
-        Defaults to safe 2-second buffer ("Professional Ethics").
+        Fetches robots.txt and returns a cacheable entry (raw lines, not the parser object).
+        Mirrors urllib.robotparser semantics: 401/403 disallow everything, other 4xx allow everything.
         """
-        parsed_url = urlparse(url)
-        base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
         robots_url = f"{base_url}/robots.txt"
-        
-        if base_url in self.domain_cache:
-            return self.domain_cache[base_url]
-            
+        entry = {"lines": [], "disallow_all": False, "fetched_at": time.time()}
         try:
             logger.info(f"Checking robots.txt for {base_url}")
-            self.parser.set_url(robots_url)
-            self.parser.read()
-            
-            delay = self.parser.crawl_delay("*")
-            if not delay:
-                delay = 2.0 # Default Safe Buffer
-                
-            logger.info(f"Compliance: Crawl-delay for {parsed_url.netloc} is {delay}s")
-            self.domain_cache[base_url] = float(delay)
-            return float(delay)
-            
+            response = requests.get(robots_url, timeout=10, headers={"User-Agent": StealthHeaderEngine.USER_AGENT_POOL[0]})
+            if response.status_code in (401, 403):
+                entry["disallow_all"] = True
+            elif response.status_code == 200:
+                entry["lines"] = response.text.splitlines()
         except Exception as e:
-            logger.warning(f"Robots.txt check failed for {base_url}: {e}. Defaulting to 2s.")
-            return 2.0
+            logger.warning(f"Robots.txt check failed for {base_url}: {e}. Defaulting to {cls.DEFAULT_DELAY}s.")
+        return entry
+
+    @classmethod
+    def _compile(cls, entry: dict) -> dict:
+        parser = urllib.robotparser.RobotFileParser()
+        if entry["disallow_all"]:
+            parser.disallow_all = True
+        else:
+            parser.parse(entry["lines"])
+        delay = parser.crawl_delay("*") or cls.DEFAULT_DELAY
+        return {"parser": parser, "delay": float(delay), "fetched_at": entry["fetched_at"]}
+
+    @classmethod
+    def _refresh(cls, base_url: str) -> dict:
+        entry = cls._download(base_url)
+        cache.set(f"{cls.CACHE_PREFIX}:{base_url}", entry, cls.STALE_TTL)
+        compiled = cls._compile(entry)
+        with cls._rules_lock:
+            cls._rules[base_url] = compiled
+        logger.info(f"Compliance: Crawl-delay for {base_url} is {compiled['delay']}s")
+        return compiled
+
+    @classmethod
+    def _revalidate_async(cls, base_url: str) -> None:
+        # One refresher per domain across the cluster
+        if not cache.add(f"{cls.CACHE_PREFIX}:refreshing:{base_url}", 1, 60):
+            return
+        threading.Thread(target=cls._refresh, args=(base_url,), daemon=True).start()
+
+    @classmethod
+    def _rules_for(cls, url: str) -> dict:
+        parsed_url = urlparse(url)
+        base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
+        now = time.time()
+
+        # 1. Process-local fast path
+        rules = cls._rules.get(base_url)
+
+        # 2. Shared cache (another worker may already have fetched it)
+        if rules is None or now - rules["fetched_at"] > cls.FRESH_TTL:
+            entry = cache.get(f"{cls.CACHE_PREFIX}:{base_url}")
+            if entry and (rules is None or entry["fetched_at"] > rules["fetched_at"]):
+                rules = cls._compile(entry)
+                with cls._rules_lock:
+                    cls._rules[base_url] = rules
+
+        # 3. Nothing usable anywhere: fetch synchronously (first scrape of a domain only)
+        if rules is None:
+            return cls._refresh(base_url)
+
+        # 4. Stale: serve it now, revalidate in the background
+        if now - rules["fetched_at"] > cls.FRESH_TTL:
+            cls._revalidate_async(base_url)
+        return rules
+
+    # --- Public API ---
+
+    def get_crawl_delay(self, url: str) -> float:
+        """
+        Returns the robots.txt Crawl-delay for the URL's domain.
+        Defaults to safe 2-second buffer ("Professional Ethics").
+        """
+        try:
+            return self._rules_for(url)["delay"]
+        except Exception as e:
+            logger.warning(f"Robots.txt lookup failed for {url}: {e}. Defaulting to {self.DEFAULT_DELAY}s.")
+            return self.DEFAULT_DELAY
+
+    def can_fetch(self, url: str, user_agent: str = "*") -> bool:
+        """
+        Fast-path robots.txt permission check against the shared parsed rules.
+        Fails open on lookup errors, matching the crawl-delay fallback.
+        """
+        try:
+            return self._rules_for(url)["parser"].can_fetch(user_agent, url)
+        except Exception as e:
+            logger.warning(f"Robots.txt permission check failed for {url}: {e}.")
+            return True
 
 class AdvancedScraperSession:
     """
@@ -140,58 +226,88 @@ class AdvancedScraperSession:
     Bundles Headers, Jitter, and Backoff into a single 'Antigravity' unit.
     """
     
+    # Resilience policy (shared with the asyncio batch engine)
+    MAX_RETRIES = 3
+    BACKOFF_FACTOR = 2
+    RETRY_STATUSES = (429, 503)
+
     def __init__(self):
         self.header_engine = StealthHeaderEngine()
         self.compliance_engine = RobotsComplianceManager()
         self.session = requests.Session()
+
+    @classmethod
+    def backoff_seconds(cls, attempt: int, retry_after: str = None) -> float:
+        """
+        Honours the server's Retry-After header when present,
+        otherwise exponential backoff: 5, 10, 20s. Capped at SCRAPER_MAX_RETRY_AFTER.
+        """
+        cap = float(getattr(settings, 'SCRAPER_MAX_RETRY_AFTER', 600))
+        if retry_after:
+            try:
+                return min(float(int(retry_after)), cap)
+            except ValueError:
+                pass
+        return min(cls.BACKOFF_FACTOR ** attempt * 5, cap)
         
     def fetch_page(self, url: str):
         """
         Self-Aware Fetcher with Exponential Backoff.
+        A 429/503 raises RateLimited with the (capped) Retry-After instead of
+        sleeping in the worker; the task layer reschedules with that countdown.
         """
-        # 1. Apply Compliance Delay
-        required_delay = self.compliance_engine.get_crawl_delay(url)
-        
-        # 2. Add Entropy (Jitter)
-        # We add jitter ON TOP of the required delay for max stealth
-        jitter = random.uniform(0.5, 2.0)
-        total_wait = required_delay + jitter
+        # 0. Load-test hook: route to the fake storefront when SCRAPER_STOREFRONT_URL is set
+        from apps.scraper.services.storefront import StorefrontRouter
+        url = StorefrontRouter.rewrite(url)
+
+        # 1. Apply Compliance: cluster-wide token bucket keyed by domain
+        # (replaces the per-task crawl-delay + jitter sleep; raises RateLimited if the domain is busy)
+        from apps.scraper.rate_limiter import DomainRateLimiter, RateLimited
+        DomainRateLimiter.acquire(url)
         
-        logger.info(f"Sleeping {total_wait:.2f}s (Compliance={required_delay} + Entropy={jitter:.2f})")
-        time.sleep(total_wait)
+        # 2. Entropy now lives in dispatch countdowns rather than in-task sleeps
         
         # 3. Rotate/Set Headers
         headers = self.header_engine.get_random_headers()
         self.session.headers.update(headers)
         
-        # 4. Resilience Loop (Exponential Backoff)
-        max_retries = 3
-        backoff_factor = 2
+        # Throttling and timeouts feed the store's circuit breaker and the proxy's health
+        from apps.scraper.circuit_breaker import StoreCircuitBreaker
+        from apps.scraper.proxy_pool import ProxyPool
+        store_name = StoreCircuitBreaker.store_for_url(url)
         
-        for attempt in range(max_retries):
+        # 4. Resilience Loop (Exponential Backoff); every attempt draws a fresh proxy
+        for attempt in range(self.MAX_RETRIES):
+            proxy = ProxyPool.choose(store_name)
             try:
-                response = self.session.get(url, timeout=15)
+                response = self.session.get(url, timeout=15, proxies=ProxyPool.requests_proxies(proxy))
                 
                 # Check 429 (Too Many Requests) or 503 (Service Unavailable)
-                if response.status_code in [429, 503]:
-                    retry_after = response.headers.get("Retry-After")
-                    if retry_after:
-                        wait_time = int(retry_after)
-                    else:
-                        wait_time = backoff_factor ** attempt * 5 # 5, 10, 20s
+                if response.status_code in self.RETRY_STATUSES:
+                    ProxyPool.record_failure(proxy, store_name, ban=response.status_code == 429)
+                    state = StoreCircuitBreaker.record_failure(store_name, f"http_{response.status_code}")
+                    if state == StoreCircuitBreaker.OPEN:
+                        logger.warning(f"Hit {response.status_code}; {store_name} circuit opened. Giving up on {url}.")
+                        return response
+                    wait_time = self.backoff_seconds(attempt, response.headers.get("Retry-After"))
                         
-                    logger.warning(f"Hit {response.status_code}. Backing off for {wait_time}s...")
-                    time.sleep(wait_time)
-                    
-                    # Refresh Identity ("New User" simulation)
+                    logger.warning(f"Hit {response.status_code}. Rescheduling in {wait_time}s.")
+                    # Refresh Identity ("New User" simulation) for the retry
                     self.header_engine.current_identity = None 
                     self.session.headers.update(self.header_engine.get_random_headers())
-                    continue
+                    raise RateLimited(DomainRateLimiter.domain_for(url), wait_time)
                     
+                ProxyPool.record_success(proxy, store_name, response.elapsed.total_seconds())
                 return response
                 
+            except RateLimited:
+                raise
             except Exception as e:
                 logger.error(f"Request failed: {e}")
-                time.sleep(backoff_factor ** attempt)
+                if isinstance(e, (requests.Timeout, requests.exceptions.ProxyError)):
+                    ProxyPool.record_failure(proxy, store_name)
+                if isinstance(e, requests.Timeout):
+                    StoreCircuitBreaker.record_failure(store_name, "timeout")
+                time.sleep(self.BACKOFF_FACTOR ** attempt)
                 
         return None
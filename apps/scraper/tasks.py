@@ -1,15 +1,30 @@
 import logging
 import time
 from celery import shared_task, group
+from celery.signals import worker_process_shutdown
 from django.contrib.auth import get_user_model
 from django.conf import settings
 from apps.scraper.services.services import ScraperService
+from apps.scraper.services.fetch_pipeline import TieredFetchPipeline
+from apps.scraper.rate_limiter import DomainRateLimiter, RateLimited
+from apps.scraper.circuit_breaker import StoreCircuitBreaker, CircuitOpen
+from apps.scraper.services.single_flight import SingleFlight
+from apps.scraper.services.live_results import SearchStream
+from apps.scraper.services.ingestion import IngestionWriter
 from apps.scraper.models import Product, PriceAlert
 from apps.scraper.services.smtp_handler import send_monitored_email
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
+@worker_process_shutdown.connect
+def shutdown_driver_pool(**kwargs):
+    """Quit this worker process's pooled Chrome instances (and parse pool) instead of orphaning them."""
+    from apps.scraper.utils.driver_factory import WebDriverFactory
+    from apps.scraper.utils.parsers import ParsePool
+    WebDriverFactory.shutdown_pool()
+    ParsePool.shutdown()
+
 # --- BACK-ROOM WORKER LOGIC ---
 
 @shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=60, retry_kwargs={'max_retries': 5})
@@ -59,10 +74,13 @@ def send_price_alert_email(self, user_id: int, subject: str, message: str, produ
         raise e
 
 @shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True, max_retries=3)
-def scrape_product_task(self, url: str, store_name: str, user_id: int = None):
+def scrape_product_task(self, url: str, store_name: str, user_id: int = None, stream_id: str = None,
+                        store_price_id: int = None):
     """
     Background Scraper Worker.
-    Fetches product data without blocking the HTTP request.
+    Fetches product data without blocking the HTTP request. `store_price_id`
+    names the provisional listing the scrape confirms (see
+    queue_provisional_confirmations), whatever title the detail page carries.
     """
     logger.info(f"Scraper Worker: Processing {url} for {store_name}")
     service = ScraperService()
@@ -70,36 +88,174 @@ def scrape_product_task(self, url: str, store_name: str, user_id: int = None):
     try:
         data = service.fetch_product_data(url, store_name)
         if data.get('success'):
+            if store_price_id:
+                data['store_price_id'] = store_price_id
             product_obj = service.save_product(data)
             logger.info(f"Scrape Success: {data.get('name')}")
             
             # Post-Scrape Handshake: Authenticity & Intelligence 
-            if hasattr(product_obj, 'uuid'):
-                # We need the most recent StorePrice to run Authenticity
-                store_price = product_obj.prices.filter(store_name=store_name).first()
-                if store_price:
-                    from celery import chain
-                    # [FORCE LOGIC] Linear Execution Chain: Scrape -> AuthenticityCheck -> PredictiveInference -> MetadataWrite
-                    try:
-                        pipeline_chain = chain(
-                            run_authenticity_check.si(store_price.id),
-                            update_product_intelligence.si(str(product_obj.uuid)),
-                            predict_future_price.si(str(product_obj.uuid))
-                        )
-                        pipeline_chain.apply_async()
-                        logger.info(f"Pipeline Orchestration Triggered for {product_obj.uuid}")
-                    except Exception as ai_err:
-                        # Error Resilience: Fallback to raw price display without crashing
-                        logger.warning(f"AI Pipeline Deployment Failed: {ai_err}. Fallback to Raw Price Display Active.")
+            trigger_post_scrape_pipeline(product_obj, store_name)
+            SearchStream.publish(stream_id, 'extracted', {
+                'store': store_name,
+                'results': [stream_card(data, product_obj)] if product_obj else [],
+                'settled': 1,
+            })
                         
             return f"Scraped {data.get('name')}"
+        elif data.get('status') == 'blocked':
+            # The bot wall was fed to the breaker; an instant autoretry would only hit it again
+            cooldown = StoreCircuitBreaker.retry_after(store_name)
+            if cooldown:
+                logger.info(f"Scraper Worker: {store_name} is blocked. Retrying after the {cooldown:.0f}s cooldown.")
+                raise self.retry(countdown=cooldown)
+            SearchStream.publish(stream_id, 'extracted', {'store': store_name, 'results': [], 'settled': 1})
+            return f"Blocked: {url}"
         else:
             raise Exception(f"Scrape Logic Failed: {data.get('error')}")
             
+    except RateLimited as e:
+        # Domain budget is spent: free the worker slot and come back when a token is due
+        logger.info(f"Scraper Worker: {e}. Rescheduling.")
+        raise self.retry(countdown=e.retry_after, max_retries=None)
+    except CircuitOpen as e:
+        # Store is paused: nothing was fetched, so this does not use up a retry
+        logger.info(f"Scraper Worker: {e}. Deferring.")
+        raise self.retry(countdown=e.retry_after, max_retries=None)
     except Exception as e:
         logger.error(f"Scraper Worker Error: {e}")
         raise e
 
+def trigger_post_scrape_pipeline(product_obj, store_name: str) -> None:
+    """Queues the Authenticity -> Intelligence -> Prediction chain for a freshly saved product."""
+    if not hasattr(product_obj, 'uuid'):
+        return
+    # We need the most recent StorePrice to run Authenticity
+    store_price = product_obj.prices.filter(store_name=store_name).first()
+    if store_price:
+        from celery import chain
+        # [FORCE LOGIC] Linear Execution Chain: Scrape -> AuthenticityCheck -> PredictiveInference -> MetadataWrite
+        try:
+            pipeline_chain = chain(
+                run_authenticity_check.si(store_price.id),
+                update_product_intelligence.si(str(product_obj.uuid)),
+                predict_future_price.si(str(product_obj.uuid))
+            )
+            pipeline_chain.apply_async()
+            logger.info(f"Pipeline Orchestration Triggered for {product_obj.uuid}")
+        except Exception as ai_err:
+            # Error Resilience: Fallback to raw price display without crashing
+            logger.warning(f"AI Pipeline Deployment Failed: {ai_err}. Fallback to Raw Price Display Active.")
+
+@shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True, max_retries=3)
+def scrape_batch_task(self, urls: list, store_name: str, user_id: int = None, attempts: dict = None, stream_id: str = None):
+    """
+    Batch Scraper Worker.
+    Scrapes a chunk of one store's URLs with a single leased browser (HTTP tier
+    first where possible) and saves them in bulk. Failures are retried per URL:
+    they are re-queued as a smaller batch with backoff, and `attempts` carries
+    each URL's retry count so one bad page never re-runs the whole chunk.
+    Browser-phase errors come back as failed URLs; anything else unexpected
+    retries the whole task (autoretry) instead of losing the chunk.
+    """
+    attempts = dict(attempts or {})
+    max_retries = getattr(settings, 'SCRAPER_BATCH_MAX_RETRIES', 2)
+    service = ScraperService()
+    
+    try:
+        batch = service.fetch_product_batch(urls, store_name)
+    except CircuitOpen as e:
+        # Store is paused: nothing was fetched, so the whole chunk waits without using a retry
+        logger.info(f"Batch Worker: {e}. Deferring {len(urls)} URLs.")
+        raise self.retry(countdown=e.retry_after, max_retries=None)
+    
+    saved = 0
+    extracted = []
+    for data, (product_obj, changed) in zip(batch, service.save_products(batch)):
+        if product_obj is not None:
+            saved += 1
+            extracted.append(stream_card(data, product_obj))
+            if changed:
+                trigger_post_scrape_pipeline(product_obj, store_name)
+    
+    # Per-URL retry bookkeeping
+    deferred, retry, dropped = [], [], []
+    retry_after = 0.0
+    for data in batch:
+        if data['success']:
+            continue
+        url = data['url']
+        if data.get('status') == 'deferred':
+            # Rate limit or open circuit: not the page's fault, no retry used
+            deferred.append(url)
+            retry_after = max(retry_after, float(data.get('retry_after') or 0))
+        elif data.get('status') == 'blocked' and not StoreCircuitBreaker.retry_after(store_name):
+            dropped.append(url)
+        elif attempts.get(url, 0) < max_retries:
+            attempts[url] = attempts.get(url, 0) + 1
+            retry.append(url)
+        else:
+            dropped.append(url)
+    
+    if deferred:
+        scrape_batch_task.apply_async(
+            args=[deferred, store_name, user_id, {u: attempts.get(u, 0) for u in deferred}],
+            kwargs={'stream_id': stream_id},
+            countdown=retry_after or StoreCircuitBreaker.retry_after(store_name) or 5,
+        )
+    if retry:
+        # Blocked pages wait for the breaker's cooldown; plain failures back off per attempt
+        backoff = max(StoreCircuitBreaker.retry_after(store_name), 30 * 2 ** max(attempts[u] for u in retry))
+        scrape_batch_task.apply_async(
+            args=[retry, store_name, user_id, {u: attempts[u] for u in retry}],
+            kwargs={'stream_id': stream_id},
+            countdown=backoff,
+        )
+    if dropped:
+        from apps.scraper.services.metrics import ScraperMetrics
+        for _ in dropped:
+            ScraperMetrics.increment("batch.dropped", store_name)
+        logger.warning(f"Batch Worker: Giving up on {len(dropped)} {store_name} URLs: {dropped[:5]}")
+    
+    # URLs that are neither retried nor deferred are settled for the live stream
+    SearchStream.publish(stream_id, 'extracted', {
+        'store': store_name,
+        'results': extracted,
+        'settled': len(urls) - len(retry) - len(deferred),
+    })
+    
+    summary = f"Batch {store_name}: {saved} saved, {len(retry)} retrying, {len(deferred)} deferred, {len(dropped)} dropped of {len(urls)}."
+    logger.info(summary)
+    return summary
+
+def batch_signatures(url_store_pairs: list, user_id: int = None, stream_id: str = None) -> list:
+    """
+    Groups (url, store) pairs into per-store scrape_batch_task chunks of
+    SCRAPER_BATCH_SIZE, spaced per domain like single-URL tasks.
+    A batch size of 1 keeps the old one-task-per-URL dispatch.
+    `stream_id` forwards extracted products to a live search stream.
+    """
+    batch_size = max(1, int(getattr(settings, 'SCRAPER_BATCH_SIZE', 25)))
+    countdowns = DomainRateLimiter.schedule(url for url, _ in url_store_pairs)
+    if batch_size == 1:
+        return [
+            scrape_product_task.s(url, store_name, user_id, stream_id=stream_id).set(countdown=countdowns[url])
+            for url, store_name in url_store_pairs
+        ]
+    
+    by_store = {}
+    for url, store_name in url_store_pairs:
+        by_store.setdefault(store_name, []).append(url)
+    
+    signatures = []
+    for store_name, urls in by_store.items():
+        for start in range(0, len(urls), batch_size):
+            chunk = urls[start:start + batch_size]
+            # Each batch paces itself through the domain bucket; the countdown only staggers the start
+            signatures.append(
+                scrape_batch_task.s(chunk, store_name, user_id, stream_id=stream_id).set(countdown=countdowns[chunk[0]])
+            )
+    return signatures
+
 @shared_task(bind=True)
 def check_prices_task(self):
     """
@@ -123,14 +279,61 @@ def check_prices_task(self):
     
     # Simplified Parallelism: One task per unique URL
     unique_urls = set()
-    job_signatures = []
+    targets = []
     
     for alert in alerts:
-        if alert.product_url not in unique_urls:
-            unique_urls.add(alert.product_url)
+        # Dedupe on the normalized product (tracking params and URL variants collapse)
+        product_key = SingleFlight.key(alert.product_url)
+        if product_key not in unique_urls:
+            unique_urls.add(product_key)
             store_name = "Amazon" if "amazon" in alert.product_url.lower() else "Flipkart"
-            # We use .s() to create a signature
-            job_signatures.append(scrape_product_task.s(alert.product_url, store_name))
+            targets.append((alert.product_url, store_name))
+    
+    dispatched = dispatch_scrape_jobs(targets)
+    return f"Dispatched {dispatched} scrape jobs."
+
+def dispatch_scrape_jobs(targets: list) -> int:
+    """
+    Shared Scatter Step for the sweep tasks.
+    Batches HTTP-tier URLs into async sweeps and browser-tier URLs into per-store
+    scrape_batch_task chunks, spaced per domain. `targets` is [(url, store_name)].
+    Returns the number of Celery jobs dispatched.
+    """
+    browser_urls = []
+    job_signatures = []
+    http_urls = []
+    use_async_sweep = getattr(settings, 'SCRAPER_ASYNC_SWEEP', False)
+    
+    # Open circuits get no jobs; a store whose cooldown has elapsed gets a single probe
+    budgets = {}
+    paused = 0
+    for url, store_name in targets:
+        if store_name not in budgets:
+            budgets[store_name] = StoreCircuitBreaker.dispatch_budget(store_name)
+        if budgets[store_name] is not None:
+            if budgets[store_name] <= 0:
+                paused += 1
+                continue
+            budgets[store_name] -= 1
+            browser_urls.append((url, store_name))
+            continue
+        
+        # URLs known to need the browser keep their own task; the rest are batched
+        if use_async_sweep and TieredFetchPipeline.preferred_tier(url) != TieredFetchPipeline.TIER_BROWSER:
+            http_urls.append(url)
+            continue
+        browser_urls.append((url, store_name))
+    
+    # Browser-tier URLs go out as per-store batches sharing one browser each
+    job_signatures.extend(batch_signatures(browser_urls))
+    
+    # HTTP-tier URLs: a few async batches instead of one task per URL
+    batch_size = getattr(settings, 'SCRAPER_ASYNC_BATCH_SIZE', 2000)
+    for start in range(0, len(http_urls), batch_size):
+        job_signatures.append(async_price_sweep_task.s(http_urls[start:start + batch_size]))
+    
+    if paused:
+        logger.info(f"Circuit breaker: held back {paused} URLs for paused stores.")
     
     # 3. Execution: Fire the group
     if job_signatures:
@@ -138,89 +341,208 @@ def check_prices_task(self):
         job_group = group(job_signatures)
         job_group.apply_async()
         
-    return f"Dispatched {len(job_signatures)} scrape jobs."
+    return len(job_signatures)
+
+@shared_task(bind=True)
+def async_price_sweep_task(self, urls: list):
+    """
+    asyncio Sweep Worker.
+    Keeps hundreds of HTTP fetches in flight from one worker slot and buffers each
+    result into the bulk IngestionWriter as it lands, so the sweep is written in
+    chunks. Pages that need JS or hit a bot wall are handed to the Selenium tier.
+    """
+    from apps.scraper.async_engine import AsyncBatchScraper
+    
+    escalated, deferred, failed = 0, 0, 0
+    escalations, throttled = [], []
+    retry_after = 0.0
+    
+    with IngestionWriter() as writer:
+        for data in AsyncBatchScraper().stream(urls):
+            if data.get('success'):
+                TieredFetchPipeline.remember_tier(data['url'], TieredFetchPipeline.TIER_HTTP)
+                writer.add(data)
+            elif data.get('status') == 'escalate':
+                TieredFetchPipeline.remember_tier(data['url'], TieredFetchPipeline.TIER_BROWSER)
+                escalations.append((data['url'], data['store']))
+                escalated += 1
+            elif data.get('status') == 'deferred':
+                # Open circuit: the next sweep retries it. Throttled (429/503): rescheduled below
+                deferred += 1
+                if data.get('retry_after'):
+                    throttled.append(data['url'])
+                    retry_after = max(retry_after, float(data['retry_after']))
+            else:
+                failed += 1
+                logger.warning(f"Async Sweep: {data['url']} failed: {data.get('error')}")
+    saved = writer.saved
+    
+    # Throttled URLs come back after the server's Retry-After instead of a worker sleeping on it
+    if throttled:
+        async_price_sweep_task.apply_async(args=[throttled], countdown=retry_after)
+
+    # Escalated pages share browsers in batches rather than one task each
+    if escalations:
+        group(batch_signatures(escalations)).apply_async()
+            
+    logger.info(f"Async Sweep: {saved} saved, {escalated} escalated, {deferred} deferred, {failed} failed of {len(urls)}.")
+    return f"Async sweep: {saved} saved, {escalated} escalated, {deferred} deferred, {failed} failed."
 
 @shared_task(bind=True)
-def search_and_scrape_task(self, query: str, user_id: int = None):
+def search_and_scrape_task(self, query: str, user_id: int = None, stores: list = None, stream_id: str = None):
     """
     Parallel Search Orchestrator.
+    Result cards that carry a price are saved as provisional listings; detail
+    scrapes are queued only for cards without one, and for the rest once a user
+    opens or watches the product (see queue_provisional_confirmations).
+    With a `stream_id`, each store's cards are pushed to the dashboard's live
+    stream as soon as that store is done.
     """
     logger.info(f"Search Worker: Searching for {query}")
     service = ScraperService()
     results = []
     
-    stores = ['Amazon', 'Flipkart']
-    scrape_jobs = []
+    stores = stores or ['Amazon', 'Flipkart']
+    scrape_targets = []
     
-    for store in stores:
+    for index, store in enumerate(stores):
         try:
-            items = service.search_products(query, store)
-            for item in items:
-                if item.get('url'):
-                    # Queue extraction for each result found
-                    scrape_jobs.append(scrape_product_task.s(item['url'], store, user_id))
-                    results.append(item)
+            items = [item for item in service.search_products(query, store) if item.get('url')]
+            products = service.save_search_results(items)
+            # Cards without a readable price still need the product page
+            unpriced = [(item['url'], store) for item in items if not item.get('price')]
+            scrape_targets.extend(unpriced)
+            results.extend(items)
+            SearchStream.publish(stream_id, 'store', {
+                'store': store,
+                'results': [stream_card(item, product) for item, product in zip(items, products)],
+                'extractions': len(unpriced),
+            })
+        except RateLimited as e:
+            # Retry only the stores not searched yet, once the domain has a token
+            search_and_scrape_task.apply_async(
+                kwargs={'query': query, 'user_id': user_id, 'stores': stores[index:], 'stream_id': stream_id},
+                countdown=e.retry_after
+            )
+            for deferred_store in stores[index:]:
+                SearchStream.publish(stream_id, 'store', {'store': deferred_store, 'final': False, 'retry_after': e.retry_after})
+            logger.info(f"Search Worker: {e}. Deferred {stores[index:]}.")
+            break
+        except CircuitOpen as e:
+            # Paused store: search the others now, this one once its cooldown ends
+            search_and_scrape_task.apply_async(
+                kwargs={'query': query, 'user_id': user_id, 'stores': [store], 'stream_id': stream_id},
+                countdown=e.retry_after
+            )
+            SearchStream.publish(stream_id, 'store', {'store': store, 'final': False, 'retry_after': e.retry_after})
+            logger.info(f"Search Worker: {e}. Deferred {store}.")
         except Exception as e:
             logger.error(f"Search failed for {store}: {e}")
+            SearchStream.publish(stream_id, 'store', {'store': store, 'results': [], 'error': 'Search failed'})
             
-    # Fire all extraction jobs in parallel
-    if scrape_jobs:
-        group(scrape_jobs).apply_async()
+    # Fire the extraction jobs as per-store batches, spaced per domain
+    if scrape_targets:
+        group(batch_signatures(scrape_targets, user_id, stream_id)).apply_async()
         
-    return f"Found {len(results)} items, triggered extraction."
+    return f"Found {len(results)} items, saved {len(results) - len(scrape_targets)} from cards, triggered {len(scrape_targets)} extractions."
+
+def stream_card(item: dict, product=None) -> dict:
+    """JSON-ready result card for the live search stream."""
+    return {
+        'store': item.get('store'),
+        'name': item.get('name') or item.get('title'),
+        'url': item.get('url'),
+        'price': str(item['price']) if item.get('price') is not None else None,
+        'image': item.get('image_url'),
+        'available': item.get('is_available', True),
+        'product_id': product.pk if product is not None else None,
+        'product_uuid': str(product.uuid) if product is not None else None,
+    }
+
+def queue_provisional_confirmations(product_id: int, user_id: int = None) -> int:
+    """
+    On-Demand Detail Scrape.
+    Queues a scrape_product_task for each of the product's provisional (search-card)
+    prices, once per URL while a scrape is pending. Called when a user opens or
+    watches the product. Returns the number of scrapes queued.
+    """
+    from apps.scraper.models import StorePrice
+
+    queued = 0
+    pending = StorePrice.objects.filter(product_id=product_id, is_provisional=True).values_list('pk', 'product_url', 'store_name')
+    for pk, url, store_name in pending:
+        if SingleFlight.claim_dispatch(url):
+            # Confirmed by pk: the detail page's title rarely matches the card's
+            scrape_product_task.delay(url, store_name, user_id, store_price_id=pk)
+            queued += 1
+    if queued:
+        logger.info(f"Queued {queued} detail scrapes to confirm provisional prices of Product {product_id}.")
+    return queued
 
 @shared_task(bind=True)
 def check_alerts_task(self, product_id: int):
     """
     Event-Driven Alert Evaluator.
-    Triggered via Signal when PriceHistory is created.
+    Single-product entry point; the evaluation is shared with check_alerts_batch_task.
     """
     logger.info(f"Evaluating alerts for Product ID {product_id}")
+    if not Product.objects.filter(pk=product_id).exists():
+        logger.error(f"Product {product_id} not found during alert check.")
+        return
+    evaluate_alerts([product_id])
+
+@shared_task(bind=True)
+def check_alerts_batch_task(self, product_ids: list):
+    """
+    Batched Alert Evaluator.
+    One message per ingestion chunk: all touched products' listings and their
+    open alerts are loaded in two queries and triggered alerts marked in one UPDATE.
+    """
+    logger.info(f"Evaluating alerts for {len(product_ids)} products")
+    return f"Triggered {evaluate_alerts(product_ids)} alerts."
+
+def evaluate_alerts(product_ids: list) -> int:
+    """Fires the drop email for every open PriceAlert whose listing is at or below target. Returns the count."""
+    from apps.scraper.models import StorePrice
+
     try:
-        product = Product.objects.get(pk=product_id)
-        # Fetch active alerts for this product
-        # Check alerts based on Product Link or generic Product FK if we had it
-        # Our PriceAlert model uses product_url.
-        # We need to find alerts searching for this URL.
-        # This is a bit inefficient if we don't have FK.
-        # But we can query: PriceAlert.objects.filter(product_url=...)
-        # We need product.prices (StorePrice) to get valid URLs.
+        # [FORCE LOGIC] Set-based evaluation: Listings -> Alerts by URL -> Async Emails
+        listings = {}
+        for sp in StorePrice.objects.filter(product_id__in=product_ids).select_related('product'):
+            listings.setdefault(sp.product_url, sp)
+        if not listings:
+            return 0
         
-        store_prices = product.prices.all()
-        for sp in store_prices:
-            # Optimize: filter alerts for this specific URL and use iterator for memory efficiency
-            # The "Force" Logic: Signals -> Iterator -> Async Task
-            alerts = PriceAlert.objects.filter(product_url=sp.product_url, is_triggered=False).iterator()
+        triggered = []
+        for alert in PriceAlert.open_for_urls(listings.keys()).iterator():
+            sp = listings[alert.product_url]
             current_val = sp.current_price
+            if current_val > alert.target_price:
+                continue
             
-            for alert in alerts:
-                if current_val <= alert.target_price:
-                    # Target Met! Fire Email Task
-                    logger.info(f"Target met for Alert {alert.id}")
-                    
-                    # Prepare Context
-                    subject = f"Price Drop Alert: {product.name[:30]}..."
-                    message = f"Price Drop! {product.name} is now {current_val}. Buy here: {sp.product_url}"
-                    
-                    # Fire Email
-                    send_price_alert_email.delay(
-                        user_id=alert.user.id,
-                        subject=subject,
-                        message=message,
-                        product_id=product.id,
-                        current_price=str(current_val),
-                        alert_type='Drop'
-                    )
-                    
-                    # Mark Triggered (Atomic)
-                    alert.is_triggered = True
-                    alert.current_price = current_val
-                    alert.save()
-                    
-    except Product.DoesNotExist:
-        logger.error(f"Product {product_id} not found during alert check.")
+            # Target Met! Fire Email Task
+            logger.info(f"Target met for Alert {alert.id}")
+            product = sp.product
+            send_price_alert_email.delay(
+                user_id=alert.user_id,
+                subject=f"Price Drop Alert: {product.name[:30]}...",
+                message=f"Price Drop! {product.name} is now {current_val}. Buy here: {sp.product_url}",
+                product_id=product.id,
+                current_price=str(current_val),
+                alert_type='Drop'
+            )
+            triggered.append((alert.pk, current_val))
+        
+        # Mark Triggered (one UPDATE per distinct price rather than one save per alert)
+        by_price = {}
+        for alert_id, price in triggered:
+            by_price.setdefault(price, []).append(alert_id)
+        for price, alert_ids in by_price.items():
+            PriceAlert.objects.filter(pk__in=alert_ids).update(is_triggered=True, current_price=price)
+        return len(triggered)
     except Exception as e:
         logger.error(f"Alert Check Failed: {e}")
+        return 0
 
 # --- UNIVERSAL CART FRESHNESS SYNC ---
 
@@ -232,6 +554,7 @@ def sync_universal_cart_prices(self, item_uuid: str = None):
     if item_uuid is passed, otherwise iterates through all items.
     """
     from apps.dashboard.models import CartItem, PriceHistoryLog
+    from django.db.models import F
     from django.utils import timezone
     from decimal import Decimal
     
@@ -241,15 +564,20 @@ def sync_universal_cart_prices(self, item_uuid: str = None):
     if item_uuid:
         items = CartItem.objects.filter(uuid=item_uuid, is_stock_available=True)
     else:
-        # Fetch all active items. To scale, this could be scattered.
-        items = CartItem.objects.filter(is_stock_available=True)
+        # Fetch all active items, stalest first. To scale, this could be scattered.
+        items = CartItem.objects.filter(is_stock_available=True).order_by(F('last_synced').asc(nulls_first=True))
         
     service = ScraperService()
     
     for item in items:
         try:
             logger.info(f"Syncing item {item.uuid} - {item.product_url}")
-            data = service.fetch_product_data(item.product_url, item.store_name)
+            try:
+                data = service.fetch_product_data(item.product_url, item.store_name)
+            except (RateLimited, CircuitOpen) as e:
+                # Hand this item to its own task, due when the domain has a token / store reopens
+                sync_universal_cart_prices.apply_async(kwargs={'item_uuid': str(item.uuid)}, countdown=e.retry_after)
+                continue
             
             if not data.get('success'):
                 # 404 or Out of Stock logic
@@ -389,29 +717,53 @@ def process_product_image_ocr(self, image_id: int):
         logger.error(f"OCR Worker Failed: {e}")
         raise e
 
+@shared_task(bind=True)
+def dispatch_due_refreshes(self, batch_size: int = None):
+    """
+    Freshness Scheduler Beat Task.
+    Claims StorePrice rows whose next_refresh_at is due (FOR UPDATE SKIP LOCKED,
+    so overlapping Beat runs never double-claim) and dispatches them to the scrape
+    pipeline. Each landed scrape reschedules its row from volatility and demand.
+    """
+    from apps.scraper.services.scheduler import RefreshScheduler
+    
+    batch_size = batch_size or getattr(settings, 'SCRAPER_REFRESH_BATCH_SIZE', 500)
+    due = RefreshScheduler.claim_due(batch_size)
+    if not due:
+        return "No prices due."
+    
+    dispatched = dispatch_scrape_jobs([(url, store_name) for _, url, store_name in due])
+    return f"Claimed {len(due)} due prices, dispatched {dispatched} scrape jobs."
+
 @shared_task
 def auto_refresh_stale_prices():
     """
     Freshness Engine (Auto-Sync Data Integrity Guard).
-    Checks last_scraped_at. If delta > 60 mins, trigger background refresh.
+    Kept for existing Beat entries: delegates to the due-time scheduler, which
+    sends StorePrice refreshes to the scrape pipeline (not the cart sync).
     """
-    from datetime import timedelta
-    from django.utils import timezone
-    from apps.scraper.models import StorePrice
-    
-    sixty_mins_ago = timezone.now() - timedelta(minutes=60)
-    
-    # Identify Stale Data
-    stale_prices = StorePrice.objects.filter(
-        is_available=True,
-        last_updated__lt=sixty_mins_ago
-    )
+    return dispatch_due_refreshes()
+
+@shared_task(bind=True)
+def recompute_dirty_products(self, max_batches: int = 20):
+    """
+    Debounced Aggregate Worker.
+    Scheduled once per SCRAPER_AGGREGATE_DEBOUNCE window after price writes (and
+    by Beat as a safety net); drains the DirtyProduct table in bulk batches.
+    """
+    from django.core.cache import cache
+    from apps.scraper.services.aggregates import ProductAggregates
     
-    for stale in stale_prices[:50]: # Throttle batch size to avoid overwhelming queues
-        # Idempotent Background Syncing Trigger
-        sync_universal_cart_prices.delay(item_uuid=str(stale.id))
-        
-    return f"Triggered refresh for {stale_prices.count()} stale prices"
+    # Writes landing from here on schedule the next window's run
+    cache.delete(ProductAggregates.SCHEDULE_KEY)
+    batch_size = getattr(settings, 'SCRAPER_AGGREGATE_BATCH_SIZE', 500)
+    total = 0
+    for _ in range(max_batches):
+        drained = ProductAggregates.drain(batch_size)
+        total += drained
+        if drained < batch_size:
+            break
+    return f"Recomputed aggregates for {total} products."
 
 # --- "ANTIGRAVITY" PREDICTIVE & AUTHENTICITY PIPELINES ---
 
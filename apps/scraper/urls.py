@@ -1,12 +1,13 @@
 from django.urls import path
 from django.urls import path
-from .views import ProductSearchView, TaskStatusView, WatchlistView, ToggleWatchlistView, PriceHistoryAPIView
+from .views import ProductSearchView, TaskStatusView, WatchlistView, ToggleWatchlistView, PriceHistoryAPIView, SearchStreamView
 
 app_name = 'scraper'
 
 urlpatterns = [
     path('search/', ProductSearchView.as_view(), name='product_search'),
     path('task_status/<str:task_id>/', TaskStatusView.as_view(), name='task_status'),
+    path('search/stream/<str:stream_id>/', SearchStreamView.as_view(), name='search_stream'),
     path('watchlist/', WatchlistView.as_view(), name='watchlist'),
     path('watchlist/toggle/', ToggleWatchlistView.as_view(), name='toggle_watchlist'),
     path('api/history/<int:product_id>/', PriceHistoryAPIView.as_view(), name='price_history_api'),
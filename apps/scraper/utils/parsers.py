@@ -1,5 +1,20 @@
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from decimal import Decimal
+from typing import Dict, Any, List, Optional
+from urllib.parse import urljoin
+import os
 import re
+import threading
+import time
+
+from bs4 import BeautifulSoup
+
+# lxml is several times faster than the stdlib parser; fall back when it is not installed.
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
 
 def clean_price_string(price_str: str) -> Decimal:
     """
@@ -16,3 +31,154 @@ def clean_price_string(price_str: str) -> Decimal:
         return Decimal(clean_str)
     except Exception:
         return Decimal("0.00")
+
+def _first_match(soup: BeautifulSoup, selectors: list, store_name: str = None, field: str = None) -> Optional[Any]:
+    """
+    Returns the first element matched by `selectors` (tried in order). With a
+    store/field the outcome is reported to SelectorRegistry.
+    """
+    started = time.perf_counter()
+    for index, selector in enumerate(selectors):
+        element = soup.select_one(selector)
+        if element is not None:
+            if field:
+                from apps.scraper.selectors import SelectorRegistry
+                SelectorRegistry.record(store_name, field, selectors[:index + 1], selector, time.perf_counter() - started)
+            return element
+    if field:
+        from apps.scraper.selectors import SelectorRegistry
+        SelectorRegistry.record(store_name, field, selectors, None)
+    return None
+
+def parse_product_html(html: str, store_name: str, selectors: Optional[Dict[str, list]] = None) -> Dict[str, Any]:
+    """
+    Offline Product Parser.
+    Extracts the same fields as the Selenium scrapers from raw HTML, using the
+    StoreSelector primary + fallback selectors in SelectorRegistry order. Never
+    touches a browser. An explicit `selectors` map ({field: [css, ...]}) is used
+    as-is and not reported to the registry (benchmarks compare selector sets this way).
+    """
+    from apps.scraper.selectors import StoreSelector, SelectorRegistry
+
+    result = {"title": None, "price": None, "image_url": None, "availability": None, "bot_wall": False}
+    if not html:
+        return result
+
+    if any(marker in html for marker in StoreSelector.bot_wall_markers(store_name)):
+        result["bot_wall"] = True
+        return result
+
+    soup = BeautifulSoup(html, HTML_PARSER)
+
+    def match(field):
+        if selectors is not None:
+            return _first_match(soup, selectors.get(field, []))
+        return _first_match(soup, SelectorRegistry.ordered(store_name, field), store_name, field)
+
+    title = match("title")
+    if title is not None:
+        result["title"] = title.get_text(strip=True) or None
+
+    price = match("price")
+    if price is not None:
+        price_val = clean_price_string(price.get_text(strip=True))
+        result["price"] = price_val if price_val > 0 else None
+
+    image = match("image")
+    if image is not None:
+        result["image_url"] = image.get("data-old-hires") or image.get("src")
+
+    availability = match("availability")
+    if availability is not None:
+        result["availability"] = availability.get_text(" ", strip=True)
+
+    return result
+
+def parse_search_html(html: str, store_name: str, base_url: str = "", limit: int = 10) -> List[Dict[str, Any]]:
+    """
+    Offline Search-Card Parser.
+    Pulls name, URL, price, image and availability from every result card on a
+    search page, so a search yields usable prices without a detail page load per
+    result. Cards without a product link or title are skipped.
+    """
+    from apps.scraper.selectors import StoreSelector
+
+    if not html or any(marker in html for marker in StoreSelector.bot_wall_markers(store_name)):
+        return []
+
+    spec = StoreSelector.search_spec(store_name)
+    soup = BeautifulSoup(html, HTML_PARSER)
+    results, seen = [], set()
+
+    for card in soup.select(spec["card"]):
+        link = _first_match(card, spec["link"])
+        href = link.get("href") if link is not None else None
+        if not href or (store_name.lower() == "flipkart" and "/p/" not in href):
+            continue
+        url = urljoin(base_url, href)
+        if url in seen:
+            continue
+
+        title = _first_match(card, spec["title"])
+        name = (title.get_text(" ", strip=True) if title is not None else "") or (link.get("title") or "").strip()
+        if not name:
+            continue
+
+        price = _first_match(card, spec["price"])
+        price_val = clean_price_string(price.get_text(strip=True)) if price is not None else None
+        image = _first_match(card, spec["image"])
+        availability = _first_match(card, spec["availability"])
+        availability_text = availability.get_text(" ", strip=True) if availability is not None else None
+        card_text = card.get_text(" ", strip=True)
+
+        seen.add(url)
+        results.append({
+            "store": "Amazon" if store_name.lower() == "amazon" else "Flipkart",
+            "name": name,
+            "url": url,
+            "price": price_val if price_val else None,
+            "image_url": (image.get("src") or image.get("data-src")) if image is not None else None,
+            "availability": availability_text,
+            "is_available": price_val is not None and price_val > 0 and StoreSelector.is_available(card_text),
+        })
+        if len(results) >= limit:
+            break
+    return results
+
+class ParsePool:
+    """
+    Offline Parse Pool.
+    Parses rendered page_source off the browser's critical path, so a driver can
+    navigate to the next URL while the previous page is still being parsed.
+    Threads by default (Celery prefork children are daemonic and cannot fork a
+    process pool); SCRAPER_PARSE_POOL=process switches to processes elsewhere.
+    """
+
+    _executor = None
+    _executor_pid: Optional[int] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def executor(cls):
+        pid = os.getpid()
+        if cls._executor is None or cls._executor_pid != pid:
+            with cls._lock:
+                if cls._executor is None or cls._executor_pid != pid:
+                    workers = int(os.getenv('SCRAPER_PARSE_WORKERS', 4))
+                    if os.getenv('SCRAPER_PARSE_POOL', 'thread') == 'process':
+                        cls._executor = ProcessPoolExecutor(max_workers=workers)
+                    else:
+                        cls._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="parse-pool")
+                    cls._executor_pid = pid
+        return cls._executor
+
+    @classmethod
+    def submit(cls, html: str, store_name: str) -> Future:
+        """Schedules parse_product_html; the Future resolves to its result dict."""
+        return cls.executor().submit(parse_product_html, html, store_name)
+
+    @classmethod
+    def shutdown(cls):
+        if cls._executor is not None and cls._executor_pid == os.getpid():
+            cls._executor.shutdown(wait=True)
+            cls._executor = None
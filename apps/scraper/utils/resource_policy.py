@@ -0,0 +1,166 @@
+import json
+import logging
+import os
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class ResourcePolicy:
+    """
+    Browser Resource Policy.
+    Keeps scraping browsers from downloading what price/title extraction never
+    needs. Two layers, selected by SCRAPER_RESOURCE_POLICY:
+
+    - 'assets': CDP Network.setBlockedURLs drops images, fonts, media and
+      known third-party trackers/ad scripts.
+    - 'strict' (default): 'assets' plus a host allowlist enforced at the
+      resolver, so only each store's own document and script hosts can load.
+    - 'off': no blocking.
+
+    Bytes actually transferred and the estimated bytes saved per page are read
+    from Chrome's performance log and reported through ScraperMetrics.
+    """
+
+    BLOCKED_ASSET_PATTERNS = [
+        "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+        "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+        "*.mp4", "*.webm", "*.m3u8", "*.mp3", "*.ts",
+    ]
+
+    BLOCKED_THIRD_PARTY_PATTERNS = [
+        "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+        "*googlesyndication.com*", "*facebook.net*", "*facebook.com/tr*",
+        "*amazon-adsystem.com*", "*fls-eu.amazon*", "*unagi.amazon*",
+        "*hotjar.com*", "*clarity.ms*",
+    ]
+
+    # Hosts allowed to resolve in 'strict' mode: the document plus the scripts the page needs to render
+    STORE_ALLOWLISTS = {
+        "Amazon": ["amazon.in", "*.amazon.in", "amazon.com", "*.amazon.com", "*.media-amazon.com", "*.ssl-images-amazon.com"],
+        "Flipkart": ["flipkart.com", "*.flipkart.com", "*.flixcart.com"],
+    }
+
+    # Extra per-store blocks on top of the generic asset list
+    STORE_BLOCKLISTS = {
+        "Amazon": ["*/images/I/*", "*/rd/uedata*", "*/1/batch/1/OE/*"],
+        "Flipkart": ["*rukminim*.flixcart.com/image/*", "*/fk-p-linchpin*"],
+    }
+
+    # Rough transfer sizes used to estimate what a blocked request would have cost
+    TYPICAL_BYTES = {
+        "Image": 45_000, "Font": 35_000, "Media": 400_000, "Script": 60_000,
+        "Stylesheet": 20_000, "XHR": 5_000, "Fetch": 5_000, "Other": 10_000,
+    }
+
+    @staticmethod
+    def mode() -> str:
+        return os.getenv('SCRAPER_RESOURCE_POLICY', 'strict').lower()
+
+    # --- Launch-time configuration ---
+
+    @classmethod
+    def chrome_arguments(cls, proxy: Optional[str] = None) -> List[str]:
+        """
+        Command-line switches applied when a browser is launched. The browser's
+        proxy host is allowlisted too, or Chrome could not resolve its own proxy.
+        """
+        mode = cls.mode()
+        if mode == 'off':
+            return []
+        args = ['--blink-settings=imagesEnabled=false', '--autoplay-policy=user-gesture-required']
+        if mode == 'strict':
+            # Pooled browsers serve every store, so the allowlist is the union of all stores
+            hosts = sorted({host for hosts in cls.STORE_ALLOWLISTS.values() for host in hosts})
+            hosts += ["localhost", "127.0.0.1"]
+            if proxy:
+                from apps.scraper.proxy_pool import ProxyPool
+                proxy_host = ProxyPool.host(proxy)
+                if proxy_host:
+                    hosts.append(proxy_host)
+            excludes = ", ".join(f"EXCLUDE {host}" for host in hosts)
+            args.append(f'--host-resolver-rules=MAP * ~NOTFOUND, {excludes}')
+        return args
+
+    @classmethod
+    def configure_options(cls, options, proxy: Optional[str] = None) -> None:
+        """Adds launch switches and enables the performance log used for byte accounting."""
+        for arg in cls.chrome_arguments(proxy):
+            options.add_argument(arg)
+        if cls.mode() != 'off':
+            options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+    # --- Per-lease configuration ---
+
+    @classmethod
+    def blocked_patterns(cls, store_name: Optional[str] = None) -> List[str]:
+        if cls.mode() == 'off':
+            return []
+        patterns = cls.BLOCKED_ASSET_PATTERNS + cls.BLOCKED_THIRD_PARTY_PATTERNS
+        if store_name:
+            key = "Amazon" if store_name.lower() == "amazon" else "Flipkart"
+            patterns = patterns + cls.STORE_BLOCKLISTS.get(key, [])
+        return patterns
+
+    @classmethod
+    def apply(cls, driver, store_name: Optional[str] = None) -> None:
+        """Installs the URL blocklist for the store the driver is about to scrape."""
+        patterns = cls.blocked_patterns(store_name)
+        if not patterns:
+            return
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+        except Exception as e:
+            logger.warning(f"ResourcePolicy: Could not install blocklist: {e}")
+
+    # --- Accounting ---
+
+    @classmethod
+    def page_bytes(cls, driver) -> Optional[Dict[str, int]]:
+        """
+        Drains the performance log and returns {transferred, blocked, saved_estimate}
+        for everything loaded since the last call. None if logging is unavailable.
+        """
+        try:
+            entries = driver.get_log('performance')
+        except Exception:
+            return None
+
+        request_types: Dict[str, str] = {}
+        transferred, blocked, saved = 0, 0, 0
+        for entry in entries:
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, ValueError):
+                continue
+            method, params = message.get("method"), message.get("params", {})
+            if method == "Network.requestWillBeSent":
+                request_types[params.get("requestId")] = params.get("type", "Other")
+            elif method == "Network.loadingFinished":
+                transferred += int(params.get("encodedDataLength", 0))
+            elif method == "Network.loadingFailed" and (
+                params.get("blockedReason")
+                # Resolver allowlist ('strict') rejections surface as DNS failures
+                or "NAME_NOT_RESOLVED" in params.get("errorText", "")
+            ):
+                blocked += 1
+                resource_type = params.get("type") or request_types.get(params.get("requestId"), "Other")
+                saved += cls.TYPICAL_BYTES.get(resource_type, cls.TYPICAL_BYTES["Other"])
+
+        return {"transferred": transferred, "blocked": blocked, "saved_estimate": saved}
+
+    @classmethod
+    def record_page(cls, driver, store_name: Optional[str] = None) -> None:
+        """Reports one page's byte accounting to the shared telemetry."""
+        if cls.mode() == 'off':
+            return
+        stats = cls.page_bytes(driver)
+        if not stats:
+            return
+        from apps.scraper.services.metrics import ScraperMetrics
+        label = store_name or "unknown"
+        ScraperMetrics.observe("resource_policy.bytes_transferred", stats["transferred"], label)
+        ScraperMetrics.observe("resource_policy.bytes_saved_estimate", stats["saved_estimate"], label)
+        ScraperMetrics.observe("resource_policy.blocked_requests", stats["blocked"], label)
+        logger.debug(f"ResourcePolicy: {label} page transferred {stats['transferred']}B, "
+                     f"blocked {stats['blocked']} requests (~{stats['saved_estimate']}B saved).")
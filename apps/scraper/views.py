@@ -1,15 +1,24 @@
 from django.views.generic import TemplateView, View, ListView
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, HttpResponseForbidden, Http404, StreamingHttpResponse
+from django.urls import reverse
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django_q.tasks import async_task
 from django_q.models import Task
+import hashlib
 import logging
+from datetime import timedelta
 
 from apps.scraper.services.manager import get_coordinated_data
 from apps.scraper.decorators import simple_ratelimit
 from apps.scraper.models import Product, Watchlist
+from apps.scraper.services.live_results import SearchStream
 
 logger = logging.getLogger(__name__)
 
@@ -75,11 +84,102 @@ class ProductSearchView(TemplateView):
         
         results = get_coordinated_data(search_query) # This returns what's in DB, triggers async update if stale.
         
-        # If no results in DB, we might show empty. 
-        # To show *live* results, we'd need the polling UI.
-        # Let's return the `dashboard_results.html` with whatever we have.
-        
-        return render(request, "scraper/partials/dashboard_results.html", {'results': results})
+        # Live results are pushed over SSE (SearchStreamView) as each store finishes
+        return render(request, "scraper/partials/dashboard_results.html", {
+            'results': results,
+            'stream_url': start_live_search(search_query, request.user, results),
+        })
+
+LIVE_SEARCH_STORES = ['Amazon', 'Flipkart']
+
+def _stale_stores(results, stores) -> list:
+    """
+    Stores without a price checked inside SCRAPER_LIVE_SEARCH_FRESH_FOR among
+    `results`, which must come from apps.scraper.services.manager.get_coordinated_data
+    (the StorePrice rows search_and_scrape_task and the IngestionWriter write).
+    """
+    fresh_for = timedelta(seconds=getattr(settings, 'SCRAPER_LIVE_SEARCH_FRESH_FOR', 6 * 60 * 60))
+    cutoff = timezone.now() - fresh_for
+    fresh = {
+        price.get('store')
+        for product in results or []
+        for price in product.get('prices', [])
+        if price.get('last_updated') and price['last_updated'] >= cutoff
+    }
+    return [store for store in stores if store not in fresh]
+
+def start_live_search(query: str, user, results=None) -> str:
+    """
+    Opens a live result stream for the query and starts the store searches.
+    Returns the SSE URL the results partial subscribes to, or '' when there is
+    nothing to search: an empty query, or every store already has fresh rows in
+    `results`. Concurrent searches for the same normalised query share one
+    stream (and one set of scrapes) for the stream's lifetime.
+    """
+    query = ' '.join((query or '').split())
+    if not query:
+        return ''
+    stores = _stale_stores(results, LIVE_SEARCH_STORES)
+    if not stores:
+        return ''
+    from apps.scraper.tasks import search_and_scrape_task
+
+    user_id = user.pk if user.is_authenticated else None
+    dedupe_key = f"live_search:{hashlib.sha1(query.lower().encode('utf-8')).hexdigest()}"
+    running = cache.get(dedupe_key)
+    if running and SearchStream.share(running, user_id):
+        return reverse('dashboard:search_stream', args=[running])
+
+    stream_id = SearchStream.open(query, stores, user_id)
+    if not cache.add(dedupe_key, stream_id, getattr(settings, 'SCRAPER_STREAM_TIMEOUT', 120)):
+        # Lost the race to a concurrent identical search: follow that one instead
+        running = cache.get(dedupe_key)
+        if running and SearchStream.share(running, user_id):
+            return reverse('dashboard:search_stream', args=[running])
+    search_and_scrape_task.apply_async(kwargs={'query': query, 'user_id': user_id, 'stores': stores, 'stream_id': stream_id})
+    return reverse('dashboard:search_stream', args=[stream_id])
+
+class SearchStreamView(View):
+    """
+    Server-Sent Events feed of a live search.
+    Per-store cards and extracted products are pushed as the Celery tasks publish
+    them, replacing TaskStatusView polling. Async, so under ASGI (config/asgi.py)
+    an open stream holds no worker thread; reconnects resume from Last-Event-ID.
+    Under WSGI a streamed body would be buffered until the search ends, so each
+    request instead returns the events available now and EventSource polls.
+    """
+
+    async def get(self, request, stream_id, *args, **kwargs):
+        meta = await sync_to_async(SearchStream.meta)(stream_id)
+        if meta is None:
+            raise Http404("Unknown or expired search stream")
+        user_id = await sync_to_async(lambda: request.user.pk if request.user.is_authenticated else None)()
+        if not SearchStream.can_view(meta, user_id):
+            return HttpResponseForbidden("Not your search stream")
+
+        try:
+            resume_after = int(request.headers.get('Last-Event-ID', 0))
+        except ValueError:
+            resume_after = 0
+
+        async def frames():
+            # Tell EventSource to reconnect after 3s if the connection drops
+            yield "retry: 3000\n\n"
+            async for event in SearchStream.listen(stream_id, resume_after):
+                yield SearchStream.format_sse(event)
+
+        if isinstance(request, ASGIRequest):
+            response = StreamingHttpResponse(frames(), content_type='text/event-stream')
+        else:
+            # WSGI fallback: one read pass, then the browser reconnects after `retry`
+            body = ["retry: 1000\n\n"]
+            async for event in SearchStream.listen(stream_id, resume_after, wait=0):
+                body.append(SearchStream.format_sse(event))
+            response = HttpResponse("".join(body), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Keep nginx from buffering the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
 
 class TaskStatusView(View):
     def get(self, request, task_id, *args, **kwargs):
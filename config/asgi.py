@@ -3,4 +3,6 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
+# Serve with an ASGI server (e.g. `uvicorn config.asgi:application`) so the async
+# SSE search stream (apps.scraper.views.SearchStreamView) holds no worker thread per client.
 application = get_asgi_application()
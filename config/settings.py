@@ -67,6 +67,8 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
+# Serve with an ASGI server (uvicorn/daphne) for live SSE search streams; under WSGI they fall back to polling
+ASGI_APPLICATION = 'config.asgi.application'
 
 # --- DATABASE LOGIC ---
 USE_SQLITE = os.getenv('USE_SQLITE', 'False') == 'True'
@@ -181,6 +183,98 @@ LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'dashboard_home'
 LOGOUT_REDIRECT_URL = 'login'
 
+# --- CACHE ---
+# Scraper coordination (rate limits, tier memory, telemetry) must be shared by
+# every web and worker process, so production points this at Redis.
+REDIS_CACHE_URL = os.getenv('REDIS_CACHE_URL')
+if REDIS_CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_CACHE_URL,
+        }
+    }
+
+# --- SCRAPER ENGINE ---
+# Beat price sweep runs through the asyncio batch engine (HTTP tier) when enabled
+SCRAPER_ASYNC_SWEEP = os.getenv('SCRAPER_ASYNC_SWEEP', 'True') == 'True'
+SCRAPER_ASYNC_BATCH_SIZE = int(os.getenv('SCRAPER_ASYNC_BATCH_SIZE', 2000))
+SCRAPER_ASYNC_DOMAIN_CONCURRENCY = int(os.getenv('SCRAPER_ASYNC_DOMAIN_CONCURRENCY', 8))
+SCRAPER_ASYNC_MAX_IN_FLIGHT = int(os.getenv('SCRAPER_ASYNC_MAX_IN_FLIGHT', 200))
+
+# Per-domain token bucket: refills at 1 token per robots crawl-delay
+SCRAPER_RATE_BURST = float(os.getenv('SCRAPER_RATE_BURST', 1))
+SCRAPER_RATE_MAX_INLINE_WAIT = float(os.getenv('SCRAPER_RATE_MAX_INLINE_WAIT', 5))
+# Longest Retry-After a 429/503 may impose; the URL is rescheduled with it, never slept on
+SCRAPER_MAX_RETRY_AFTER = int(os.getenv('SCRAPER_MAX_RETRY_AFTER', 600))
+
+# Single-flight: concurrent scrapes of one product share a result (seconds)
+SCRAPER_SINGLEFLIGHT_RESULT_TTL = int(os.getenv('SCRAPER_SINGLEFLIGHT_RESULT_TTL', 60))
+SCRAPER_SINGLEFLIGHT_LOCK_TTL = int(os.getenv('SCRAPER_SINGLEFLIGHT_LOCK_TTL', 180))
+SCRAPER_SINGLEFLIGHT_WAIT = int(os.getenv('SCRAPER_SINGLEFLIGHT_WAIT', 90))
+
+# Batch scraping: URLs per scrape_batch_task (1 = one task per URL) and per-URL retries
+SCRAPER_BATCH_SIZE = int(os.getenv('SCRAPER_BATCH_SIZE', 25))
+SCRAPER_BATCH_MAX_RETRIES = int(os.getenv('SCRAPER_BATCH_MAX_RETRIES', 2))
+
+# Bulk ingestion: scrape results written per chunk (bulk_create/bulk_update + one alert message)
+SCRAPER_INGEST_CHUNK_SIZE = int(os.getenv('SCRAPER_INGEST_CHUNK_SIZE', 500))
+
+# Search: result cards read per store search (their prices are saved as provisional)
+SCRAPER_SEARCH_RESULT_LIMIT = int(os.getenv('SCRAPER_SEARCH_RESULT_LIMIT', 10))
+
+# Live search stream (SSE): event log lifetime, max stream duration (seconds) and the
+# Redis used for pub/sub wake-ups (falls back to polling the cache when unset)
+SCRAPER_STREAM_TTL = int(os.getenv('SCRAPER_STREAM_TTL', 600))
+SCRAPER_STREAM_TIMEOUT = int(os.getenv('SCRAPER_STREAM_TIMEOUT', 120))
+SCRAPER_STREAM_REDIS_URL = os.getenv('SCRAPER_STREAM_REDIS_URL') or REDIS_CACHE_URL
+# Dashboard searches only start live store scrapes for stores without a price checked this recently (seconds)
+SCRAPER_LIVE_SEARCH_FRESH_FOR = int(os.getenv('SCRAPER_LIVE_SEARCH_FRESH_FOR', 6 * 60 * 60))
+
+# Per-store circuit breaker (bot walls / 429 / 503 / timeouts pause a store cluster-wide)
+SCRAPER_BREAKER_THRESHOLD = float(os.getenv('SCRAPER_BREAKER_THRESHOLD', 6))
+SCRAPER_BREAKER_WINDOW = int(os.getenv('SCRAPER_BREAKER_WINDOW', 120))
+SCRAPER_BREAKER_COOLDOWN = int(os.getenv('SCRAPER_BREAKER_COOLDOWN', 300))
+SCRAPER_BREAKER_MAX_COOLDOWN = int(os.getenv('SCRAPER_BREAKER_MAX_COOLDOWN', 3600))
+SCRAPER_BREAKER_PROBE_TIMEOUT = int(os.getenv('SCRAPER_BREAKER_PROBE_TIMEOUT', 120))
+
+# Proxy pool: comma-separated proxy URLs and/or a file with one per line.
+# user:pass@host entries are used by the HTTP tiers only; Chrome ignores proxy credentials.
+SCRAPER_PROXIES = [p.strip() for p in os.getenv('SCRAPER_PROXIES', '').split(',') if p.strip()]
+SCRAPER_PROXY_FILE = os.getenv('SCRAPER_PROXY_FILE', '')
+SCRAPER_PROXY_QUARANTINE = int(os.getenv('SCRAPER_PROXY_QUARANTINE', 300))
+SCRAPER_PROXY_MAX_QUARANTINE = int(os.getenv('SCRAPER_PROXY_MAX_QUARANTINE', 21600))
+SCRAPER_PROXY_STRIKE_DECAY = int(os.getenv('SCRAPER_PROXY_STRIKE_DECAY', 3600))
+
+# Freshness Scheduler: per-price refresh interval (minutes), scaled by volatility and demand
+SCRAPER_REFRESH_BASE_MINUTES = int(os.getenv('SCRAPER_REFRESH_BASE_MINUTES', 120))
+SCRAPER_REFRESH_MIN_MINUTES = int(os.getenv('SCRAPER_REFRESH_MIN_MINUTES', 10))
+SCRAPER_REFRESH_MAX_MINUTES = int(os.getenv('SCRAPER_REFRESH_MAX_MINUTES', 1440))
+SCRAPER_REFRESH_BATCH_SIZE = int(os.getenv('SCRAPER_REFRESH_BATCH_SIZE', 500))
+
+# Product aggregates (lowest price, trend, search vector) are recomputed once per debounce window (seconds)
+SCRAPER_AGGREGATE_DEBOUNCE = int(os.getenv('SCRAPER_AGGREGATE_DEBOUNCE', 30))
+SCRAPER_AGGREGATE_BATCH_SIZE = int(os.getenv('SCRAPER_AGGREGATE_BATCH_SIZE', 500))
+
+CELERY_BEAT_SCHEDULE = {
+    'dispatch-due-refreshes': {
+        'task': 'apps.scraper.tasks.dispatch_due_refreshes',
+        'schedule': 60.0,
+    },
+    'recompute-dirty-products': {
+        'task': 'apps.scraper.tasks.recompute_dirty_products',
+        'schedule': 300.0,
+    },
+}
+
+# Recorded-HTML fixture corpus for offline replay/benchmarks (capture_fixtures, benchmark_scrapers)
+SCRAPER_FIXTURE_DIR = os.getenv('SCRAPER_FIXTURE_DIR', str(BASE_DIR / 'fixtures' / 'pages'))
+SCRAPER_CAPTURE_FIXTURES = os.getenv('SCRAPER_CAPTURE_FIXTURES', 'False') == 'True'
+
+# Load testing only: route every store fetch to the fake storefront (manage.py run_storefront).
+# The SSRF DNS check is skipped for it only while DEBUG is on.
+SCRAPER_STOREFRONT_URL = os.getenv('SCRAPER_STOREFRONT_URL', '')
+
 # --- SECURITY HARDENING ---
 SECURE_SSL_REDIRECT = os.getenv('DJANGO_SECURE_SSL_REDIRECT', 'False') == 'True'
 SESSION_COOKIE_SECURE = os.getenv('DJANGO_SESSION_COOKIE_SECURE', 'False') == 'True'
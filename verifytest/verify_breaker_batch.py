@@ -0,0 +1,125 @@
+import os
+import django
+import sys
+import time
+from concurrent.futures import Future
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.test import override_settings
+from apps.scraper.circuit_breaker import StoreCircuitBreaker
+from apps.scraper.logic import base_scraper
+from apps.scraper.logic.base_scraper import BaseScraper
+from apps.scraper.selectors import StoreSelector
+
+STORE = "Amazon"
+CAPTCHA = f"<html><body>{StoreSelector.bot_wall_markers(STORE)[0]}</body></html>"
+PRODUCT = "<html><body><span id='productTitle'>Phone</span></body></html>"
+
+class FakeDriver:
+    """Serves canned HTML per URL and records every navigation."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.visited = []
+
+    def get(self, url):
+        self.visited.append(url)
+
+class BatchScraper(BaseScraper):
+    STORE_NAME = STORE
+
+    def get_title(self):
+        return None
+
+    def get_price(self):
+        return None
+
+def parsed(html, store_name):
+    future = Future()
+    bot_wall = any(marker in html for marker in StoreSelector.bot_wall_markers(store_name))
+    future.set_result({"title": None if bot_wall else "Phone", "price": None if bot_wall else 999,
+                       "image_url": "", "availability": "In Stock", "bot_wall": bot_wall})
+    return future
+
+# No browser, rate limiter or parser pool: only the batch loop and the breaker are exercised
+base_scraper.ExtractionEngine.snapshot = classmethod(lambda cls, driver, store_name, timeout=10: driver.pages[driver.visited[-1]])
+base_scraper.ResourcePolicy.record_page = classmethod(lambda cls, driver, store_name: None)
+base_scraper.DomainRateLimiter.acquire = classmethod(lambda cls, url, *args, **kwargs: 0)
+base_scraper.ParsePool.submit = classmethod(lambda cls, html, store_name: parsed(html, store_name))
+
+def batch(pages):
+    scraper = BatchScraper()
+    scraper.driver = FakeDriver(pages)
+    try:
+        return scraper.driver.visited, scraper.scrape_many(list(pages))
+    finally:
+        # fetch_product_batch forgets the thread's probe after every batch
+        StoreCircuitBreaker.release_probe(STORE)
+
+def urls(prefix, count, html):
+    return {f"https://www.amazon.in/dp/{prefix}{i}": html for i in range(count)}
+
+def end_cooldown():
+    state = StoreCircuitBreaker._load(STORE)
+    state["opened_at"] -= state["cooldown"] + 1
+    StoreCircuitBreaker._save(STORE, state)
+
+def check(label, condition):
+    print(f"   [{'OK' if condition else 'FAIL'}] {label}")
+    return condition
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "verify-breaker-batch"}},
+    SCRAPER_BREAKER_THRESHOLD=6, SCRAPER_BREAKER_COOLDOWN=300,
+)
+def run_verification():
+    print("--- Batch Circuit Breaker Verification ---")
+    ok = True
+
+    # 1. Trip: the captcha is fed to the breaker on the page that shows it, not after the batch
+    print("\n1. [Trip Mid-Batch]")
+    StoreCircuitBreaker.record_failure(STORE, "bot_wall")
+    visited, results = batch({**urls("OK", 2, PRODUCT), **urls("WALL", 1, CAPTCHA), **urls("REST", 5, PRODUCT)})
+    ok &= check(f"Navigation stopped at the captcha (visited {len(visited)} of 8)", len(visited) == 3)
+    ok &= check("Circuit is open", StoreCircuitBreaker.is_open(STORE))
+    ok &= check("Finished pages kept", [r["status"] for r in results[:3]] == ["success", "success", "blocked"])
+    ok &= check("Rest deferred for the cooldown",
+                all(r["status"] == "deferred" and r["retry_after"] > 0 for r in results[3:]))
+
+    # 2. Open: nothing is loaded
+    print("\n2. [Open]")
+    visited, results = batch(urls("OPEN", 4, PRODUCT))
+    ok &= check("No navigation while open", not visited and all(r["status"] == "deferred" for r in results))
+
+    # 3. Half-open, failed probe: one page, then re-opened with a longer cooldown
+    print("\n3. [Half-Open, Probe Blocked]")
+    end_cooldown()
+    visited, results = batch({**urls("PROBE", 1, CAPTCHA), **urls("HELD", 5, PRODUCT)})
+    state = StoreCircuitBreaker._load(STORE)
+    ok &= check(f"Exactly one probe page loaded (visited {len(visited)})", len(visited) == 1)
+    ok &= check(f"Re-opened with a doubled cooldown ({state['cooldown']:.0f}s)", StoreCircuitBreaker.is_open(STORE) and state["cooldown"] == 600)
+    ok &= check("Rest deferred", all(r["status"] == "deferred" and r["retry_after"] > 0 for r in results[1:]))
+
+    # 4. Recovery: a clean probe closes the circuit; the held pages come back straight away
+    print("\n4. [Half-Open, Probe Succeeds]")
+    end_cooldown()
+    visited, results = batch(urls("RECOVER", 5, PRODUCT))
+    ok &= check(f"Exactly one probe page loaded (visited {len(visited)})", len(visited) == 1)
+    ok &= check("Circuit closed", StoreCircuitBreaker._load(STORE)["state"] == StoreCircuitBreaker.CLOSED)
+    ok &= check("Held pages deferred with retry_after 0", all(r["status"] == "deferred" and r["retry_after"] == 0 for r in results[1:]))
+
+    # 5. Closed: the whole batch runs again
+    print("\n5. [Closed]")
+    visited, results = batch(urls("CLOSED", 5, PRODUCT))
+    ok &= check("Every page loaded and succeeded", len(visited) == 5 and all(r["status"] == "success" for r in results))
+
+    print(f"\n{'[OK] Trip, half-open and recovery verified.' if ok else '[FAIL] See failures above.'}")
+    print("\n--- End Verification ---")
+
+if __name__ == "__main__":
+    run_verification()
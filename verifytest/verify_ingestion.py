@@ -0,0 +1,156 @@
+import os
+import django
+import sys
+import uuid
+from decimal import Decimal
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.contrib.auth import get_user_model
+from apps.scraper.models import Product, PriceAlert, PriceHistory, StorePrice
+from apps.scraper.services.ingestion import IngestionWriter
+from apps.scraper.services.security import EnterpriseSecuritySuite
+from apps.scraper import tasks
+
+User = get_user_model()
+
+# Record alert dispatches instead of sending them to the broker
+dispatched = []
+tasks.check_alerts_batch_task.delay = lambda product_ids: dispatched.append(list(product_ids))
+
+RUN = uuid.uuid4().hex[:8]
+
+def scrape(name, price, url, store="Amazon", **extra):
+    data = {"success": True, "status": "success", "name": name, "title": name, "price": price,
+            "url": url, "store": store, "image_url": "", "availability": "In Stock"}
+    data.update(extra)
+    return data
+
+def check(label, condition):
+    print(f"   [{'OK' if condition else 'FAIL'}] {label}")
+    return condition
+
+def verify_integrity(product):
+    for sp in StorePrice.objects.filter(product=product):
+        if not sp.integrity_check():
+            return False
+    return EnterpriseSecuritySuite.verify_history_integrity(product.id)
+
+def run_verification():
+    print("--- Bulk Ingestion Writer Verification ---")
+    name = f"Verify Ingestion Phone {RUN}"
+    url = f"https://www.amazon.in/dp/VERIFY{RUN}"
+    ok = True
+
+    # 1. Created: new product, listing and first history point
+    print("\n1. [Created]")
+    writer = IngestionWriter()
+    (product, changed), = writer.write([scrape(name, "1299.5", url)])
+    sp = StorePrice.objects.get(product=product, store_name="Amazon")
+    ok &= check("Product and listing created", product is not None and changed and writer.stats["created"] == 1)
+    ok &= check(f"Price stored as 1299.50 (got {sp.current_price})", sp.current_price == Decimal("1299.50"))
+    ok &= check("One history row", PriceHistory.objects.filter(store_price=sp).count() == 1)
+    ok &= check("StorePrice.integrity_check and verify_history_integrity pass", verify_integrity(product))
+
+    # 2. Unchanged: same page again only bumps last_seen
+    print("\n2. [Unchanged]")
+    last_seen = sp.last_seen
+    writer = IngestionWriter()
+    (_, changed), = writer.write([scrape(name, "1299.50", url)])
+    sp.refresh_from_db()
+    ok &= check("Reported unchanged", not changed and writer.stats["unchanged"] == 1)
+    ok &= check("No new history row", PriceHistory.objects.filter(store_price=sp).count() == 1)
+    ok &= check("last_seen heartbeat moved", sp.last_seen and sp.last_seen >= last_seen)
+
+    # 3. Changed: price drop writes a history row with the change and evaluates alerts
+    print("\n3. [Changed]")
+    user, _ = User.objects.get_or_create(email="verify-ingestion@example.invalid", defaults={"username": "verify-ingestion"})
+    alert = PriceAlert.objects.create(user=user, product_url=url, target_price=Decimal("1500.00"))
+    dispatched.clear()
+    writer = IngestionWriter()
+    (_, changed), = writer.write([scrape(name, 1169.55, url)])
+    latest = PriceHistory.objects.filter(store_price=sp).order_by("-recorded_at").first()
+    ok &= check("Reported changed", changed and writer.stats["changed"] == 1)
+    ok &= check(f"Change percentage -10.00 (got {latest.change_percentage})", latest.change_percentage == Decimal("-10.00"))
+    ok &= check("Alerts evaluated for the product", [product.pk] in dispatched)
+    ok &= check("Integrity still verifies after the update", verify_integrity(product))
+
+    # 4. Partial scrape: "success" without a price or title must not touch the listing or alerts
+    print("\n4. [Partial Scrape]")
+    dispatched.clear()
+    writer = IngestionWriter()
+    outcomes = writer.write([scrape(name, None, url), scrape(None, "999", url)])
+    sp.refresh_from_db()
+    ok &= check("Both rows skipped", outcomes == [(None, False), (None, False)] and writer.stats["partial"] == 2)
+    ok &= check(f"Price untouched (got {sp.current_price})", sp.current_price == Decimal("1169.55"))
+    ok &= check("No 0.00 price anywhere", not StorePrice.objects.filter(current_price=0, product_url=url).exists())
+    ok &= check("No history row, no alert dispatch", PriceHistory.objects.filter(store_price=sp).count() == 2 and not dispatched)
+    ok &= check("No 'Unknown Product' created", not Product.objects.filter(name="Unknown Product", prices__product_url=url).exists())
+
+    # 5. Conflict: another writer inserts the listing between our lookup and our insert
+    print("\n5. [Conflict]")
+    flipkart_url = f"https://www.flipkart.com/p/verify{RUN}"
+    original_products = IngestionWriter._products
+
+    def racing_products(latest, existing):
+        products = original_products(latest, existing)
+        StorePrice.objects.create(product=products[name], store_name="Flipkart", current_price=Decimal("1400.00"), product_url=flipkart_url)
+        return products
+
+    IngestionWriter._products = staticmethod(racing_products)
+    try:
+        writer = IngestionWriter()
+        (_, changed), = writer.write([scrape(name, "1350", flipkart_url, store="Flipkart")])
+    finally:
+        IngestionWriter._products = staticmethod(original_products)
+    racer = StorePrice.objects.get(product=product, store_name="Flipkart")
+    ok &= check("Concurrent row updated, not duplicated", changed and writer.stats["created"] == 0 and writer.stats["changed"] == 1)
+    ok &= check(f"Our price won (got {racer.current_price})", racer.current_price == Decimal("1350.00"))
+    ok &= check("Integrity verifies after the conflict path", verify_integrity(product))
+
+    # 6. Provisional: a detail page titled differently from its search card confirms the card's listing
+    print("\n6. [Provisional Confirmation]")
+    from apps.scraper.services.services import ScraperService
+    card_name, card_url = f"Verify Card Phone {RUN}", f"https://www.amazon.in/dp/CARD{RUN}"
+    url_name, url_url = f"Verify Url Phone {RUN}", f"https://www.flipkart.com/p/card{RUN}"
+    card, url_card = ScraperService().save_search_results([
+        {"name": card_name, "url": card_url, "price": "999", "store": "Amazon"},
+        {"name": url_name, "url": url_url, "price": "899", "store": "Flipkart"},
+    ])
+    pinned = StorePrice.objects.get(product=card, store_name="Amazon")
+    writer = IngestionWriter()
+    outcomes = writer.write([
+        scrape(f"{card_name} (8GB RAM, 128GB)", "949", card_url, store_price_id=pinned.pk),
+        scrape(f"{url_name} 5G", "879", url_url, store="Flipkart"),
+    ])
+    pinned.refresh_from_db()
+    by_url = StorePrice.objects.get(product=url_card, store_name="Flipkart")
+    ok &= check("Confirmed by pk: provisional cleared, price updated",
+                outcomes[0][0] == card and not pinned.is_provisional and pinned.current_price == Decimal("949.00"))
+    ok &= check("Confirmed by URL: provisional cleared", outcomes[1][0] == url_card and not by_url.is_provisional)
+    ok &= check("No second product from the detail titles",
+                not Product.objects.filter(name__in=[f"{card_name} (8GB RAM, 128GB)", f"{url_name} 5G"]).exists())
+
+    # 7. Availability: the scraped text decides, so an out-of-stock page stays out of stock
+    print("\n7. [Availability]")
+    writer = IngestionWriter()
+    writer.write([scrape(f"{card_name} (8GB RAM, 128GB)", "949", card_url, store_price_id=pinned.pk,
+                         availability="Currently unavailable.")])
+    pinned.refresh_from_db()
+    ok &= check("Listing marked unavailable", not pinned.is_available)
+
+    # Cleanup
+    alert.delete()
+    product.delete()
+    card.delete()
+    url_card.delete()
+
+    print(f"\n{'[OK] All ingestion paths verified.' if ok else '[FAIL] See failures above.'}")
+    print("\n--- End Verification ---")
+
+if __name__ == "__main__":
+    run_verification()